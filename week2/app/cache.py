@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Entry:
+    __slots__ = ("value", "weight", "expires_at", "tag")
+
+    def __init__(
+        self, value: Any, weight: int, expires_at: Optional[float], tag: Optional[Hashable]
+    ):
+        self.value = value
+        self.weight = weight
+        self.expires_at = expires_at
+        self.tag = tag
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and total weight, with TTL.
+
+    Entries may carry a ``tag`` so that every key derived from the same
+    underlying record (e.g. all listing pages of one note) can be invalidated
+    at once without scanning the cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_weight: Optional[int] = None,
+        ttl: Optional[float] = None,
+        weigher: Optional[Callable[[Any], int]] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self.ttl = ttl
+        self.weigher = weigher or (lambda value: 1)
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._weight = 0
+        # Bumped by every invalidation; loads that straddle one are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._weight -= entry.weight
+        if entry.tag is not None:
+            keys = self._tags.get(entry.tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[entry.tag]
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return ``(found, value)``, refreshing the entry's recency on a hit"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry.expires_at is not None
+                and entry.expires_at <= time.monotonic()
+            ):
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry.value
+
+    def put(self, key: Hashable, value: Any, tag: Optional[Hashable] = None) -> None:
+        with self._lock:
+            self._put(key, value, tag)
+
+    def _put(self, key: Hashable, value: Any, tag: Optional[Hashable]) -> None:
+        weight = self.weigher(value)
+        if self.max_weight is not None and weight > self.max_weight:
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = _Entry(value, weight, expires_at, tag)
+        self._weight += weight
+        if tag is not None:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries or (
+            self.max_weight is not None and self._weight > self.max_weight
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def get_or_load(
+        self, key: Hashable, loader: Callable[[], T], tag: Optional[Hashable] = None
+    ) -> T:
+        """Read-through lookup; ``loader`` runs outside the lock on a miss.
+
+        A value loaded while an invalidation happened is returned but not
+        cached, so a concurrent write can never be masked by a stale read.
+        """
+        found, value = self.get(key)
+        if found:
+            return value
+        with self._lock:
+            generation = self._generation
+        value = loader()
+        with self._lock:
+            if generation == self._generation:
+                self._put(key, value, tag)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+            self._weight = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "weight": self._weight,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Iterable, Iterator, List, Optional, TypeVar
+
+from fastapi import Request
+
+from .config import settings
+from .exceptions import ExtractionCancelledError
+from .metrics import EXTRACTION_CANCELLATIONS
+
+T = TypeVar("T")
+
+REASON_DEADLINE = "deadline"
+REASON_DISCONNECTED = "disconnected"
+
+# How often blocked waits (futures, coalesced calls) re-check for cancellation
+POLL_INTERVAL_SECONDS = 0.05
+# How often a request's watcher asks the server whether the client is gone
+DISCONNECT_POLL_INTERVAL_SECONDS = 0.1
+
+
+class Cancellation:
+    """Cancelled explicitly (e.g. the client disconnected) or once ``deadline`` passes.
+
+    ``deadline`` is a ``time.monotonic()`` timestamp. Checks are cheap polls,
+    so blocking code looks at ``cancelled`` between units of work (model
+    output chunks, short waits) rather than being interrupted.
+    """
+
+    def __init__(self, deadline: Optional[float] = None) -> None:
+        self.deadline = deadline
+        self._reason: Optional[str] = None
+
+    @classmethod
+    def after(cls, seconds: float) -> "Cancellation":
+        return cls(time.monotonic() + seconds)
+
+    def cancel(self, reason: str = REASON_DISCONNECTED) -> None:
+        if self._reason is None:
+            self._reason = reason
+
+    @property
+    def reason(self) -> Optional[str]:
+        if self._reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self._reason = REASON_DEADLINE
+        return self._reason
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def raise_if_cancelled(self) -> None:
+        reason = self.reason
+        if reason is not None:
+            raise ExtractionCancelledError(reason)
+
+
+class SharedCancellation(Cancellation):
+    """Cancellation of work done for several callers: cancelled only once all of them are.
+
+    A caller without a cancellation (e.g. a background job) keeps the shared
+    work alive for good.
+    """
+
+    def __init__(self, members: Iterable[Optional[Cancellation]] = ()) -> None:
+        super().__init__()
+        self._members: List[Optional[Cancellation]] = list(members)
+
+    def join(self, member: Optional[Cancellation]) -> None:
+        self._members.append(member)
+
+    @property
+    def reason(self) -> Optional[str]:
+        if self._reason is None:
+            members = list(self._members)
+            if members and all(member is not None and member.cancelled for member in members):
+                self._reason = members[-1].reason  # type: ignore[union-attr]
+        return self._reason
+
+
+_current: ContextVar[Optional[Cancellation]] = ContextVar("week2_cancellation", default=None)
+
+
+def current_cancellation() -> Optional[Cancellation]:
+    """Cancellation of the work running in this context, if it can be cancelled"""
+    return _current.get()
+
+
+@contextmanager
+def cancellation_scope(cancellation: Optional[Cancellation]) -> Iterator[Optional[Cancellation]]:
+    token = _current.set(cancellation)
+    try:
+        yield cancellation
+    finally:
+        _current.reset(token)
+
+
+def wait_future(future: "Future[T]", cancellation: Optional[Cancellation]) -> T:
+    """``future.result()``, giving up with ExtractionCancelledError once cancelled"""
+    if cancellation is None:
+        return future.result()
+    while True:
+        cancellation.raise_if_cancelled()
+        try:
+            return future.result(timeout=POLL_INTERVAL_SECONDS)
+        except FutureTimeoutError:
+            continue
+
+
+def _retrieve_result(future: "asyncio.Future[object]") -> None:
+    # The abandoned work still finishes (or notices the cancellation) on its
+    # own; retrieving the outcome keeps asyncio from logging it as unhandled
+    if not future.cancelled():
+        future.exception()
+
+
+async def await_cancellable(awaitable: Awaitable[T], cancellation: Optional[Cancellation]) -> T:
+    """Await ``awaitable``, but stop waiting once ``cancellation`` is cancelled.
+
+    Meant for executor calls: the thread cannot be interrupted, so it is left
+    to notice the same cancellation at its next check, while the request can
+    answer right away.
+    """
+    future = asyncio.ensure_future(awaitable)
+    if cancellation is None:
+        return await future
+    try:
+        while True:
+            done, _ = await asyncio.wait({future}, timeout=POLL_INTERVAL_SECONDS)
+            if done:
+                return future.result()
+            cancellation.raise_if_cancelled()
+    except BaseException:
+        # Also reached when the request task itself is cancelled
+        if not future.done():
+            future.add_done_callback(_retrieve_result)
+        raise
+
+
+def request_deadline(timeout_seconds: Optional[float]) -> Optional[float]:
+    """Deadline from a request's timeout, capped by ``settings.llm_request_timeout_seconds``"""
+    limits = [
+        limit
+        for limit in (timeout_seconds, settings.llm_request_timeout_seconds)
+        if limit is not None
+    ]
+    return time.monotonic() + min(limits) if limits else None
+
+
+async def _watch_disconnect(request: Request, cancellation: Cancellation) -> None:
+    while not cancellation.cancelled:
+        if await request.is_disconnected():
+            cancellation.cancel(REASON_DISCONNECTED)
+            return
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def request_cancellation(
+    request: Request, timeout_seconds: Optional[float]
+) -> AsyncIterator[Cancellation]:
+    """Cancellation for one request: its deadline, plus a watcher for client disconnects"""
+    cancellation = Cancellation(request_deadline(timeout_seconds))
+    watcher = asyncio.create_task(_watch_disconnect(request, cancellation))
+    try:
+        yield cancellation
+    except ExtractionCancelledError as e:
+        EXTRACTION_CANCELLATIONS.inc(e.reason)
+        raise
+    finally:
+        watcher.cancel()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
@@ -9,20 +9,163 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # Database settings
-    database_url: str = Field(default="sqlite:///./data/app.db", description="Database URL")
-    database_path: Path = Field(default=Path("./data/app.db"), description="Path to SQLite database")
-    
+    database_path: Path = Field(
+        default=Path("./data/app.db"), description="Path to SQLite database, relative to week2/"
+    )
+    storage_backend: Literal["sqlite", "memory"] = Field(
+        default="sqlite",
+        description=(
+            "Where notes, action items, jobs and caches live: the SQLite database, "
+            "or process memory (lost on restart)"
+        ),
+    )
+    db_pool_size: int = Field(
+        default=8, ge=1, description="Maximum number of pooled SQLite connections"
+    )
+    db_pool_timeout: float = Field(
+        default=10.0, gt=0.0, description="Seconds to wait for a free pooled connection"
+    )
+    db_busy_timeout_ms: int = Field(
+        default=5000, ge=0, description="SQLite busy timeout in milliseconds"
+    )
+    db_cache_size_kib: int = Field(
+        default=8192, ge=0, description="SQLite page cache size per connection (KiB)"
+    )
+    db_mmap_size: int = Field(
+        default=64 * 1024 * 1024, ge=0, description="SQLite memory-mapped I/O size in bytes"
+    )
+    cache_max_entries: int = Field(
+        default=2048, ge=1, description="Maximum cached note/action-item lookups per cache"
+    )
+    cache_max_bytes: int = Field(
+        default=16 * 1024 * 1024, ge=0, description="Approximate byte budget per lookup cache"
+    )
+    cache_ttl_seconds: float = Field(
+        default=30.0, gt=0.0, description="Lifetime of cached lookups in seconds"
+    )
+
     # Ollama settings
     ollama_model: str = Field(default="qwen3:4b", description="Ollama model to use for extraction")
-    ollama_temperature: float = Field(default=0.0, ge=0.0, le=1.0, description="Ollama temperature setting")
-    
+    ollama_temperature: float = Field(
+        default=0.0, ge=0.0, le=1.0, description="Ollama temperature setting"
+    )
+    ollama_host: Optional[str] = Field(
+        default=None, description="Ollama server URL (defaults to OLLAMA_HOST or localhost)"
+    )
+    ollama_keep_alive: str = Field(
+        default="30m", description="How long Ollama keeps the model loaded after a call"
+    )
+    ollama_timeout_seconds: float = Field(
+        default=300.0, gt=0.0, description="HTTP timeout for Ollama calls"
+    )
+    ollama_http_keepalive_seconds: float = Field(
+        default=300.0, ge=0.0, description="Idle lifetime of pooled HTTP connections to Ollama"
+    )
+    ollama_warmup: bool = Field(
+        default=True, description="Load the model with a warm-up call at startup"
+    )
+    llm_cache_enabled: bool = Field(
+        default=True, description="Cache LLM extraction results in the storage backend"
+    )
+    llm_cache_max_entries: int = Field(
+        default=10000, ge=1, description="Maximum cached LLM extraction results"
+    )
+    llm_max_concurrency: int = Field(
+        default=2, ge=1, description="Worker threads reserved for LLM extraction calls"
+    )
+    llm_chunk_tokens: int = Field(
+        default=1500, ge=64, description="Estimated token budget per LLM prompt window"
+    )
+    llm_chunk_concurrency: int = Field(
+        default=4, ge=1, description="Concurrent model calls for chunked extraction"
+    )
+    llm_batch_enabled: bool = Field(
+        default=True, description="Pack notes submitted close together into one model call"
+    )
+    llm_batch_window_ms: float = Field(
+        default=25.0, ge=0.0, description="How long a batch waits for more notes"
+    )
+    llm_batch_max_tokens: int = Field(
+        default=4000, ge=64, description="Estimated note tokens per batched model call"
+    )
+    llm_batch_max_notes: int = Field(
+        default=16, ge=1, description="Maximum notes per batched model call"
+    )
+    llm_request_timeout_seconds: Optional[float] = Field(
+        default=None,
+        gt=0.0,
+        description=(
+            "Deadline for LLM extraction requests; "
+            "the X-Request-Timeout header can only shorten it"
+        ),
+    )
+
+    # Upload settings
+    upload_insert_batch_size: int = Field(
+        default=500,
+        ge=1,
+        description="Action items found in an upload that are stored per transaction",
+    )
+    upload_max_line_chars: int = Field(
+        default=1024 * 1024,
+        ge=1,
+        description=(
+            "Longest line an upload may carry over between reads; "
+            "longer ones are rejected with 413"
+        ),
+    )
+    upload_max_buffered_chars: int = Field(
+        default=8 * 1024 * 1024,
+        ge=1,
+        description=(
+            "Characters an upload's extraction keeps for deduplication and the sentence fallback; "
+            "past it both are truncated"
+        ),
+    )
+
+    # Background job settings
+    job_workers: int = Field(
+        default=2, ge=0, description="Worker threads draining the job queue (0 disables them)"
+    )
+    job_max_attempts: int = Field(
+        default=3, ge=1, description="Attempts per job before it is marked failed"
+    )
+    job_retry_backoff_seconds: float = Field(
+        default=2.0,
+        ge=0.0,
+        description="Base delay before retrying a failed job, doubled per attempt",
+    )
+    job_poll_interval_seconds: float = Field(
+        default=1.0, gt=0.0, description="How often idle workers check for runnable jobs"
+    )
+    job_long_poll_max_seconds: float = Field(
+        default=30.0, ge=0.0, description="Longest a status request may wait for a job to finish"
+    )
+
+    # Idempotency-Key settings
+    idempotency_ttl_seconds: float = Field(
+        default=24 * 3600,
+        gt=0.0,
+        description="How long a finished request's response is replayed for its key",
+    )
+    idempotency_wait_seconds: float = Field(
+        default=60.0,
+        ge=0.0,
+        description="How long a duplicate waits for the in-flight original before 409",
+    )
+    idempotency_lock_seconds: float = Field(
+        default=600.0,
+        gt=0.0,
+        description="After this long an unfinished request's key can be claimed again",
+    )
+
     # App settings
     app_title: str = Field(default="Action Item Extractor", description="Application title")
     debug: bool = Field(default=False, description="Enable debug mode")
-    
+
     class Config:
         env_file = ".env"
 
 
 # Create a global settings instance
-settings = Settings()
\ No newline at end of file
+settings = Settings()
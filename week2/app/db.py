@@ -1,83 +1,141 @@
 from __future__ import annotations
 
+import json
 import sqlite3
+import threading
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, Optional, Union
 
+from .config import settings
+from .metrics import DB_CALL_SECONDS, timed
+from .migrations import apply_migrations
+from .pool import ConnectionPool
 
 BASE_DIR = Path(__file__).resolve().parents[1]
-DATA_DIR = BASE_DIR / "data"
-DB_PATH = DATA_DIR / "app.db"
+# Relative database paths are resolved against the week2 directory, not the
+# working directory, so the default stays week2/data/app.db
+DB_PATH = (
+    settings.database_path
+    if settings.database_path.is_absolute()
+    else BASE_DIR / settings.database_path
+)
+DATA_DIR = DB_PATH.parent
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
 
 
 def ensure_data_directory_exists() -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    pool = _pool
+    if pool is not None and not pool.closed:
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            ensure_data_directory_exists()
+            _pool = ConnectionPool(
+                DB_PATH,
+                max_size=settings.db_pool_size,
+                timeout=settings.db_pool_timeout,
+                busy_timeout_ms=settings.db_busy_timeout_ms,
+                cache_size_kib=settings.db_cache_size_kib,
+                mmap_size=settings.db_mmap_size,
+            )
+        return _pool
+
+
+def close_pool() -> None:
+    """Close all pooled connections; the next database call opens a fresh pool"""
+    global _pool, _llm_cache_count
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+        _llm_cache_count = None
+
+
+def pool_stats() -> Dict[str, Union[int, float]]:
+    return get_pool().stats()
+
+
 @contextmanager
-def get_db_connection():
-    """Context manager for database connections"""
-    ensure_data_directory_exists()
-    connection = sqlite3.connect(DB_PATH)
-    connection.row_factory = sqlite3.Row
-    try:
+def get_db_connection() -> Iterator[sqlite3.Connection]:
+    """Context manager that borrows a connection from the pool"""
+    with get_pool().connection() as connection:
         yield connection
-    finally:
-        connection.close()
 
 
-def get_connection() -> sqlite3.Connection:
-    """Legacy function for compatibility - should be replaced with context manager"""
-    ensure_data_directory_exists()
-    connection = sqlite3.connect(DB_PATH)
-    connection.row_factory = sqlite3.Row
-    return connection
+@timed(DB_CALL_SECONDS)
+def init_db() -> int:
+    """Bring the schema up to date; returns the resulting schema version"""
+    with get_db_connection() as connection:
+        return apply_migrations(connection)
 
 
-def init_db() -> None:
-    ensure_data_directory_exists()
+@timed(DB_CALL_SECONDS)
+def insert_note(content: str) -> sqlite3.Row:
+    """Insert a note and return the stored row, read back by the same statement"""
     with get_db_connection() as connection:
         cursor = connection.cursor()
         cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS notes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                content TEXT NOT NULL,
-                created_at TEXT DEFAULT (datetime('now'))
-            );
-            """
-        )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS action_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                note_id INTEGER,
-                text TEXT NOT NULL,
-                done INTEGER DEFAULT 0,
-                created_at TEXT DEFAULT (datetime('now')),
-                FOREIGN KEY (note_id) REFERENCES notes(id)
-            );
-            """
+            "INSERT INTO notes (content) VALUES (?) RETURNING id, content, created_at",
+            (content,),
         )
+        row = cursor.fetchone()
         connection.commit()
+        return row
+
+
+# Keyset pagination: every listing is "id < ? ORDER BY id DESC LIMIT ?" so the
+# cost of a page depends only on its size, never on how deep the client is.
+# Unpaged calls bind the maximum rowid and LIMIT -1 (no limit), keeping a
+# single statement shape per query.
+MAX_ROWID = 2**63 - 1
+
+LIST_NOTES_SQL = "SELECT id, content, created_at FROM notes WHERE id < ? ORDER BY id DESC LIMIT ?"
 
 
-def insert_note(content: str) -> int:
+# Rows fetched per round trip when streaming a whole table
+STREAM_BATCH_SIZE = 500
+
+
+def _page_params(limit: Optional[int], before_id: Optional[int]) -> tuple[int, int]:
+    return (MAX_ROWID if before_id is None else before_id, -1 if limit is None else limit)
+
+
+@timed(DB_CALL_SECONDS)
+def list_notes(limit: Optional[int] = None, before_id: Optional[int] = None) -> list[sqlite3.Row]:
     with get_db_connection() as connection:
         cursor = connection.cursor()
-        cursor.execute("INSERT INTO notes (content) VALUES (?)", (content,))
-        connection.commit()
-        return int(cursor.lastrowid)
+        cursor.execute(LIST_NOTES_SQL, _page_params(limit, before_id))
+        return cursor.fetchall()
 
 
-def list_notes() -> list[sqlite3.Row]:
+@timed(DB_CALL_SECONDS)
+def iter_notes(
+    before_id: Optional[int] = None, batch_size: int = STREAM_BATCH_SIZE
+) -> Iterator[sqlite3.Row]:
+    """Yield every note newest first, fetching ``batch_size`` rows at a time.
+
+    The pooled connection is held until the generator is exhausted or closed.
+    """
     with get_db_connection() as connection:
         cursor = connection.cursor()
-        cursor.execute("SELECT id, content, created_at FROM notes ORDER BY id DESC")
-        return list(cursor.fetchall())
+        cursor.execute(LIST_NOTES_SQL, _page_params(None, before_id))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
 
 
+@timed(DB_CALL_SECONDS)
 def get_note(note_id: int) -> Optional[sqlite3.Row]:
     with get_db_connection() as connection:
         cursor = connection.cursor()
@@ -89,40 +147,430 @@ def get_note(note_id: int) -> Optional[sqlite3.Row]:
         return row
 
 
+@timed(DB_CALL_SECONDS)
+def get_action_item(action_item_id: int) -> Optional[sqlite3.Row]:
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT id, note_id, text, done, created_at FROM action_items WHERE id = ?",
+            (action_item_id,),
+        )
+        return cursor.fetchone()
+
+
+# Rows per multi-row INSERT; keeps bound parameters well below SQLITE_MAX_VARIABLE_NUMBER
+INSERT_CHUNK_SIZE = 400
+
+
+def _insert_rows_returning_ids(
+    cursor: sqlite3.Cursor, table: str, columns: tuple[str, ...], rows: list[tuple]
+) -> list[int]:
+    """Insert ``rows`` with multi-row ``INSERT ... RETURNING id`` statements.
+
+    Rowids for one statement are assigned in VALUES order, so sorting the
+    returned ids maps them back to the input rows.
+    """
+    ids: list[int] = []
+    placeholders = "(" + ", ".join("?" for _ in columns) + ")"
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        chunk = rows[start : start + INSERT_CHUNK_SIZE]
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+            + ", ".join(placeholders for _ in chunk)
+            + " RETURNING id",
+            [value for row in chunk for value in row],
+        )
+        ids.extend(sorted(int(row[0]) for row in cursor.fetchall()))
+    return ids
+
+
+@timed(DB_CALL_SECONDS)
 def insert_action_items(items: list[str], note_id: Optional[int] = None) -> list[int]:
+    if not items:
+        return []
     with get_db_connection() as connection:
         cursor = connection.cursor()
-        ids: list[int] = []
-        for item in items:
-            cursor.execute(
-                "INSERT INTO action_items (note_id, text) VALUES (?, ?)",
-                (note_id, item),
-            )
-            ids.append(int(cursor.lastrowid))
+        ids = _insert_rows_returning_ids(
+            cursor, "action_items", ("note_id", "text"), [(note_id, item) for item in items]
+        )
         connection.commit()
         return ids
 
 
-def list_action_items(note_id: Optional[int] = None) -> list[sqlite3.Row]:
+def _insert_extraction_entries(
+    cursor: sqlite3.Cursor, entries: list[tuple[str, list[str]]], save_notes: bool
+) -> list[tuple[Optional[int], list[int]]]:
+    note_ids: list[Optional[int]]
+    if save_notes:
+        note_ids = _insert_rows_returning_ids(
+            cursor, "notes", ("content",), [(content,) for content, _ in entries]
+        )
+    else:
+        note_ids = [None] * len(entries)
+
+    item_rows = [
+        (note_id, item) for note_id, (_, items) in zip(note_ids, entries) for item in items
+    ]
+    item_ids = _insert_rows_returning_ids(cursor, "action_items", ("note_id", "text"), item_rows)
+
+    results: list[tuple[Optional[int], list[int]]] = []
+    offset = 0
+    for note_id, (_, items) in zip(note_ids, entries):
+        results.append((note_id, item_ids[offset : offset + len(items)]))
+        offset += len(items)
+    return results
+
+
+@timed(DB_CALL_SECONDS)
+def insert_extraction_batch(
+    entries: list[tuple[str, list[str]]], save_notes: bool = True
+) -> list[tuple[Optional[int], list[int]]]:
+    """Insert notes and their action items for many inputs in one transaction.
+
+    Returns one ``(note_id, action_item_ids)`` pair per entry, in input order.
+    ``note_id`` is None when ``save_notes`` is False.
+    """
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            results = _insert_extraction_entries(cursor, entries, save_notes)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    return results
+
+
+LIST_ACTION_ITEMS_SQL = (
+    "SELECT id, note_id, text, done, created_at FROM action_items "
+    "WHERE id < ? ORDER BY id DESC LIMIT ?"
+)
+LIST_ACTION_ITEMS_BY_NOTE_SQL = (
+    "SELECT id, note_id, text, done, created_at FROM action_items "
+    "WHERE note_id = ? AND id < ? ORDER BY id DESC LIMIT ?"
+)
+
+
+@timed(DB_CALL_SECONDS)
+def list_action_items(
+    note_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    before_id: Optional[int] = None,
+) -> list[sqlite3.Row]:
     with get_db_connection() as connection:
         cursor = connection.cursor()
         if note_id is None:
+            cursor.execute(LIST_ACTION_ITEMS_SQL, _page_params(limit, before_id))
+        else:
             cursor.execute(
-                "SELECT id, note_id, text, done, created_at FROM action_items ORDER BY id DESC"
+                LIST_ACTION_ITEMS_BY_NOTE_SQL, (note_id, *_page_params(limit, before_id))
             )
+        return cursor.fetchall()
+
+
+@timed(DB_CALL_SECONDS)
+def iter_action_items(
+    note_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[sqlite3.Row]:
+    """Yield action items newest first, fetching ``batch_size`` rows at a time"""
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        if note_id is None:
+            cursor.execute(LIST_ACTION_ITEMS_SQL, _page_params(None, before_id))
         else:
+            cursor.execute(LIST_ACTION_ITEMS_BY_NOTE_SQL, (note_id, *_page_params(None, before_id)))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+
+
+@timed(DB_CALL_SECONDS)
+def mark_action_item_done(action_item_id: int, done: bool) -> Optional[sqlite3.Row]:
+    """Update ``done`` and return the updated row, or None if no row matched"""
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            "UPDATE action_items SET done = ? WHERE id = ? "
+            "RETURNING id, note_id, text, done, created_at",
+            (1 if done else 0, action_item_id),
+        )
+        rows = cursor.fetchall()
+        connection.commit()
+        return rows[0] if rows else None
+
+
+# A cache hit only rewrites last_used_at once it is this stale, so hits stay
+# plain reads instead of each taking the database's write lock
+LLM_CACHE_TOUCH_SECONDS = 60.0
+
+# Rows in llm_extraction_cache, counted once per pool and then kept up to date
+# by put_llm_cache_entry, which holds the lock for its whole transaction
+_llm_cache_count: Optional[int] = None
+_llm_cache_lock = threading.Lock()
+
+
+@timed(DB_CALL_SECONDS)
+def get_llm_cache_entry(key: str, used_at: float) -> Optional[str]:
+    """Return the cached items JSON for ``key``, marking it recently used if it was not already"""
+    with get_db_connection() as connection:
+        row = connection.execute(
+            "SELECT items, last_used_at FROM llm_extraction_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None and used_at - row["last_used_at"] >= LLM_CACHE_TOUCH_SECONDS:
+            connection.execute(
+                "UPDATE llm_extraction_cache SET last_used_at = ? WHERE key = ?", (used_at, key)
+            )
+            connection.commit()
+        return None if row is None else row["items"]
+
+
+@timed(DB_CALL_SECONDS)
+def put_llm_cache_entry(
+    key: str, model: str, items_json: str, used_at: float, max_entries: int
+) -> int:
+    """Store an extraction result and evict least recently used entries over ``max_entries``.
+
+    Returns the number of evicted entries.
+    """
+    global _llm_cache_count
+    with _llm_cache_lock, get_db_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            if _llm_cache_count is None:
+                _llm_cache_count = cursor.execute(
+                    "SELECT COUNT(*) FROM llm_extraction_cache"
+                ).fetchone()[0]
+            count = _llm_cache_count
             cursor.execute(
-                "SELECT id, note_id, text, done, created_at FROM action_items WHERE note_id = ? ORDER BY id DESC",
-                (note_id,),
+                "UPDATE llm_extraction_cache SET model = ?, items = ?, last_used_at = ? "
+                "WHERE key = ?",
+                (model, items_json, used_at, key),
             )
-        return list(cursor.fetchall())
+            if cursor.rowcount == 0:
+                cursor.execute(
+                    "INSERT INTO llm_extraction_cache (key, model, items, last_used_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, model, items_json, used_at),
+                )
+                count += 1
+            evicted = 0
+            if count > max_entries:
+                cursor.execute(
+                    """
+                    DELETE FROM llm_extraction_cache WHERE key IN (
+                        SELECT key FROM llm_extraction_cache ORDER BY last_used_at ASC LIMIT ?
+                    )
+                    """,
+                    (count - max_entries,),
+                )
+                evicted = cursor.rowcount
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            _llm_cache_count = None
+            raise
+        _llm_cache_count = count - evicted
+        return evicted
+
 
+JOB_COLUMNS = (
+    "id, kind, payload, status, attempts, max_attempts, run_after, result, error, "
+    "created_at, updated_at"
+)
 
-def mark_action_item_done(action_item_id: int, done: bool) -> None:
+
+@timed(DB_CALL_SECONDS)
+def insert_job(kind: str, payload: str, max_attempts: int, run_after: float) -> sqlite3.Row:
     with get_db_connection() as connection:
         cursor = connection.cursor()
         cursor.execute(
-            "UPDATE action_items SET done = ? WHERE id = ?",
-            (1 if done else 0, action_item_id),
+            "INSERT INTO jobs (kind, payload, max_attempts, run_after) VALUES (?, ?, ?, ?) "
+            f"RETURNING {JOB_COLUMNS}",
+            (kind, payload, max_attempts, run_after),
+        )
+        row = cursor.fetchone()
+        connection.commit()
+        return row
+
+
+@timed(DB_CALL_SECONDS)
+def get_job(job_id: int) -> Optional[sqlite3.Row]:
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,))
+        return cursor.fetchone()
+
+
+@timed(DB_CALL_SECONDS)
+def claim_job(now: float) -> Optional[sqlite3.Row]:
+    """Atomically move the oldest runnable pending job to 'running' and return it"""
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            f"""
+            UPDATE jobs
+            SET status = 'running', attempts = attempts + 1, updated_at = datetime('now')
+            WHERE id = (
+                SELECT id FROM jobs WHERE status = 'pending' AND run_after <= ?
+                ORDER BY run_after, id LIMIT 1
+            )
+            RETURNING {JOB_COLUMNS}
+            """,
+            (now,),
+        )
+        row = cursor.fetchone()
+        connection.commit()
+        return row
+
+
+def extraction_job_result(note_id: Optional[int], ids: list[int], items: list[str]) -> dict:
+    """The stored result of an extraction job, shaped like ActionItemExtractResponse"""
+    return {"note_id": note_id, "items": [{"id": i, "text": t} for i, t in zip(ids, items)]}
+
+
+def _mark_job_succeeded(cursor: sqlite3.Cursor, job_id: int, result: dict) -> None:
+    cursor.execute(
+        "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, "
+        "updated_at = datetime('now') WHERE id = ?",
+        (json.dumps(result, ensure_ascii=False), job_id),
+    )
+
+
+@timed(DB_CALL_SECONDS)
+def complete_extraction_job(
+    job_id: int, text: str, items: list[str], save_note: bool
+) -> tuple[Optional[int], list[int]]:
+    """Persist an extraction and mark its job succeeded in the same transaction.
+
+    A crash between the two can therefore never store the note twice when the
+    job is retried.
+    """
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            note_id, ids = _insert_extraction_entries(cursor, [(text, items)], save_note)[0]
+            _mark_job_succeeded(cursor, job_id, extraction_job_result(note_id, ids, items))
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    return note_id, ids
+
+
+@timed(DB_CALL_SECONDS)
+def reschedule_job(job_id: int, error: str, run_after: float) -> None:
+    """Return a failed attempt to the queue, runnable again from ``run_after``"""
+    with get_db_connection() as connection:
+        connection.execute(
+            "UPDATE jobs SET status = 'pending', error = ?, run_after = ?, "
+            "updated_at = datetime('now') WHERE id = ?",
+            (error, run_after, job_id),
+        )
+        connection.commit()
+
+
+@timed(DB_CALL_SECONDS)
+def fail_job(job_id: int, error: str) -> None:
+    with get_db_connection() as connection:
+        connection.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, updated_at = datetime('now') "
+            "WHERE id = ?",
+            (error, job_id),
+        )
+        connection.commit()
+
+
+@timed(DB_CALL_SECONDS)
+def requeue_running_jobs() -> int:
+    """Make jobs left 'running' by a previous process runnable again; returns the count"""
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            "UPDATE jobs SET status = 'pending', updated_at = datetime('now') "
+            "WHERE status = 'running'"
+        )
+        requeued = cursor.rowcount
+        connection.commit()
+        return requeued
+
+
+IDEMPOTENCY_COLUMNS = (
+    "scope, key, request_hash, status, status_code, response, created_at, expires_at"
+)
+
+
+@timed(DB_CALL_SECONDS)
+def claim_idempotency_key(
+    scope: str, key: str, request_hash: str, now: float, lock_seconds: float
+) -> tuple[bool, Optional[sqlite3.Row]]:
+    """Claim ``key`` for a new request, or return the live row that holds it.
+
+    A key whose row has expired (a finished response past its TTL, or an
+    unfinished request whose lock ran out because its process died) is taken
+    over. Returns ``(True, None)`` when claimed and ``(False, row)`` otherwise;
+    ``row`` is None if the holder released the key in the meantime.
+    """
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            INSERT INTO idempotency_keys (scope, key, request_hash, status, created_at, expires_at)
+            VALUES (?, ?, ?, 'in_progress', ?, ?)
+            ON CONFLICT (scope, key) DO UPDATE SET
+                request_hash = excluded.request_hash, status = 'in_progress', status_code = NULL,
+                response = NULL, created_at = excluded.created_at, expires_at = excluded.expires_at
+            WHERE idempotency_keys.expires_at <= excluded.created_at
+            RETURNING key
+            """,
+            (scope, key, request_hash, now, now + lock_seconds),
+        )
+        claimed = cursor.fetchone() is not None
+        row = None
+        if not claimed:
+            cursor.execute(
+                f"SELECT {IDEMPOTENCY_COLUMNS} FROM idempotency_keys WHERE scope = ? AND key = ?",
+                (scope, key),
+            )
+            row = cursor.fetchone()
+        connection.commit()
+        return claimed, row
+
+
+@timed(DB_CALL_SECONDS)
+def complete_idempotency_key(
+    scope: str, key: str, status_code: int, response: str, expires_at: float
+) -> None:
+    """Store the response to replay for ``key`` until ``expires_at``"""
+    with get_db_connection() as connection:
+        connection.execute(
+            "UPDATE idempotency_keys SET status = 'completed', status_code = ?, response = ?, "
+            "expires_at = ? WHERE scope = ? AND key = ?",
+            (status_code, response, expires_at, scope, key),
         )
-        connection.commit()
\ No newline at end of file
+        connection.commit()
+
+
+@timed(DB_CALL_SECONDS)
+def release_idempotency_key(scope: str, key: str) -> None:
+    """Forget an unfinished key so a retry runs the request again"""
+    with get_db_connection() as connection:
+        connection.execute(
+            "DELETE FROM idempotency_keys WHERE scope = ? AND key = ? AND status = 'in_progress'",
+            (scope, key),
+        )
+        connection.commit()
+
+
+@timed(DB_CALL_SECONDS)
+def purge_idempotency_keys(now: float) -> int:
+    """Delete keys that expired by ``now``; returns the number deleted"""
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+        purged = cursor.rowcount
+        connection.commit()
+        return purged
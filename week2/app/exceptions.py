@@ -5,6 +5,7 @@ from typing import Optional
 
 class ActionItemExtractionError(Exception):
     """Raised when action item extraction fails"""
+
     def __init__(self, message: str, original_exception: Optional[Exception] = None):
         self.message = message
         self.original_exception = original_exception
@@ -13,6 +14,7 @@ class ActionItemExtractionError(Exception):
 
 class NoteNotFoundError(Exception):
     """Raised when a note is not found"""
+
     def __init__(self, note_id: int):
         self.note_id = note_id
         super().__init__(f"Note with id {note_id} not found")
@@ -20,14 +22,40 @@ class NoteNotFoundError(Exception):
 
 class ActionItemNotFoundError(Exception):
     """Raised when an action item is not found"""
+
     def __init__(self, action_item_id: int):
         self.action_item_id = action_item_id
         super().__init__(f"Action item with id {action_item_id} not found")
 
 
+class JobNotFoundError(Exception):
+    """Raised when a background job is not found"""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        super().__init__(f"Job with id {job_id} not found")
+
+
 class DatabaseOperationError(Exception):
     """Raised when a database operation fails"""
+
     def __init__(self, operation: str, message: str):
         self.operation = operation
         self.message = message
-        super().__init__(f"Database operation '{operation}' failed: {message}")
\ No newline at end of file
+        super().__init__(f"Database operation '{operation}' failed: {message}")
+
+
+class InvalidCursorError(Exception):
+    """Raised when a pagination cursor cannot be decoded"""
+
+    def __init__(self, cursor: str):
+        self.cursor = cursor
+        super().__init__(f"Invalid pagination cursor: {cursor!r}")
+
+
+class ExtractionCancelledError(Exception):
+    """Raised when an extraction is abandoned: its deadline passed or its client disconnected"""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        super().__init__(f"Extraction cancelled ({reason})")
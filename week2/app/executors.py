@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+# Database calls and model calls run on separate executors so a burst of slow
+# LLM extractions can never occupy the threads that serve cheap DB reads.
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    executor = _executors.get(name)
+    if executor is not None:
+        return executor
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f"week2-{name}"
+            )
+        return _executors[name]
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    # One worker per pooled connection: more threads would only queue on the pool
+    return _get_executor("db", settings.db_pool_size)
+
+
+def get_llm_executor() -> ThreadPoolExecutor:
+    return _get_executor("llm", settings.llm_max_concurrency)
+
+
+def get_llm_chunk_executor() -> ThreadPoolExecutor:
+    """Bounded pool shared by all map-reduce extractions of long notes"""
+    return _get_executor("llm-chunks", settings.llm_chunk_concurrency)
+
+
+def get_llm_batch_executor() -> ThreadPoolExecutor:
+    """Runs micro-batched model calls; callers block on futures, not on these threads"""
+    return _get_executor("llm-batches", settings.llm_max_concurrency)
+
+
+async def _run(executor: ThreadPoolExecutor, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking database call on the dedicated DB executor"""
+    return await _run(get_db_executor(), fn, *args, **kwargs)
+
+
+async def run_llm(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking model call on the dedicated LLM executor"""
+    return await _run(get_llm_executor(), fn, *args, **kwargs)
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from .config import settings
+from .exceptions import DatabaseOperationError, ExtractionCancelledError
+from .executors import get_db_executor
+from .metrics import IDEMPOTENCY_REQUESTS
+from .repositories import AsyncIdempotencyRepository, IdempotencyRepository
+from .responses import EncodedJSONResponse
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# How often a duplicate re-reads the key while the original is in flight
+WAIT_POLL_INTERVAL_SECONDS = 0.1
+
+
+def request_fingerprint(scope: str, payload: BaseModel) -> str:
+    """Hash of the request body, so a key reused for a different request is caught"""
+    return hashlib.sha256(f"{scope}\n{payload.model_dump_json()}".encode("utf-8")).hexdigest()
+
+
+def _release_later(scope: str, key: str) -> None:
+    """Release the key without awaiting, e.g. while the request task is being cancelled"""
+
+    def release() -> None:
+        try:
+            IdempotencyRepository.release(scope, key)
+        except DatabaseOperationError as e:
+            logging.warning(f"Could not release Idempotency-Key {key!r} ({scope}): {e.message}")
+
+    get_db_executor().submit(release)
+
+
+async def idempotent(
+    scope: str,
+    key: Optional[str],
+    payload: BaseModel,
+    handler: Callable[[], Awaitable[Any]],
+    status_code: int = 200,
+) -> Any:
+    """Run ``handler`` at most once per ``Idempotency-Key`` within ``scope``.
+
+    Without a key the handler simply runs. With one, the first request claims
+    the key and its response (2xx or 4xx) is stored for
+    ``settings.idempotency_ttl_seconds``; repeats get that response back with
+    an ``Idempotent-Replayed: true`` header, without running the handler. A
+    repeat that arrives while the original is still running waits up to
+    ``settings.idempotency_wait_seconds`` for it, then gets 409. Reusing a key
+    with a different body is a 422. On a 5xx, a cancelled extraction, or when
+    the client goes away, the key is released so a retry runs the request again.
+    """
+    if key is None:
+        return await handler()
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency-Key must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters",
+        )
+
+    request_hash = request_fingerprint(scope, payload)
+    deadline = time.monotonic() + settings.idempotency_wait_seconds
+    while True:
+        claimed, row = await AsyncIdempotencyRepository.claim(scope, key, request_hash)
+        if claimed:
+            break
+        if row is None:
+            # The holder released the key between our two statements; claim again
+            continue
+        if row["request_hash"] != request_hash:
+            IDEMPOTENCY_REQUESTS.inc("mismatch")
+            raise HTTPException(
+                status_code=422, detail="Idempotency-Key was already used for a different request"
+            )
+        if row["status"] == "completed":
+            IDEMPOTENCY_REQUESTS.inc("replayed")
+            return EncodedJSONResponse(
+                row["response"].encode("utf-8"),
+                status_code=row["status_code"],
+                headers={REPLAYED_HEADER: "true"},
+            )
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            IDEMPOTENCY_REQUESTS.inc("in_progress")
+            raise HTTPException(
+                status_code=409, detail="A request with this Idempotency-Key is still in progress"
+            )
+        await asyncio.sleep(min(WAIT_POLL_INTERVAL_SECONDS, remaining))
+
+    IDEMPOTENCY_REQUESTS.inc("executed")
+    try:
+        result = await handler()
+        response: Response = JSONResponse(jsonable_encoder(result), status_code=status_code)
+    except HTTPException as e:
+        if e.status_code >= 500:
+            await AsyncIdempotencyRepository.release(scope, key)
+            raise
+        response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+    except ExtractionCancelledError:
+        await AsyncIdempotencyRepository.release(scope, key)
+        raise
+    except BaseException:
+        _release_later(scope, key)
+        raise
+
+    try:
+        await AsyncIdempotencyRepository.complete(
+            scope, key, response.status_code, bytes(response.body).decode("utf-8")
+        )
+    except DatabaseOperationError as e:
+        # The work is done; releasing the key would let a retry repeat it, so
+        # the key stays locked until idempotency_lock_seconds pass
+        logging.error(
+            f"Could not store the response for Idempotency-Key {key!r} ({scope}): {e.message}"
+        )
+    return response
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import settings
+from .repositories import JobRepository
+from .services.extract import extract_action_items_llm_strict
+
+JOB_EXTRACT_LLM = "extract_llm"
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+FINISHED_STATUSES = frozenset({STATUS_SUCCEEDED, STATUS_FAILED})
+
+# Shutdown waits this long for in-progress attempts; a job still running after
+# that is requeued the next time the workers start
+STOP_TIMEOUT_SECONDS = 10.0
+
+
+def _run_extract_llm(job_id: int, payload: Dict[str, Any]) -> None:
+    text = payload["text"]
+    # Raises on model failures so the attempt is retried instead of storing []
+    items = extract_action_items_llm_strict(text, use_cache=not payload.get("bypass_cache", False))
+    JobRepository.complete_extraction_job(job_id, text, items, payload.get("save_note", False))
+
+
+JOB_HANDLERS: Dict[str, Callable[[int, Dict[str, Any]], None]] = {
+    JOB_EXTRACT_LLM: _run_extract_llm,
+}
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff after the ``attempts``-th failed attempt"""
+    return settings.job_retry_backoff_seconds * (2 ** (attempts - 1))
+
+
+class JobWorkerPool:
+    """Worker threads that drain the persisted ``jobs`` table.
+
+    Jobs are claimed with a single atomic UPDATE, so workers never run the
+    same job twice. On start, jobs a previous process left 'running' are put
+    back in the queue, which assumes one application process owns the queue.
+    """
+
+    def __init__(self) -> None:
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+
+    def start(self, workers: Optional[int] = None) -> None:
+        if self._threads:
+            return
+        workers = settings.job_workers if workers is None else workers
+        requeued = JobRepository.requeue_running_jobs()
+        if requeued:
+            logging.info("Requeued %d interrupted job(s)", requeued)
+        self._stopping.clear()
+        for index in range(workers):
+            thread = threading.Thread(
+                target=self._work, name=f"week2-job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self) -> None:
+        """Wake idle workers, e.g. right after a job was submitted"""
+        self._wakeup.set()
+
+    def stop(self, timeout: Optional[float] = STOP_TIMEOUT_SECONDS) -> None:
+        """Stop claiming new jobs and wait for in-progress attempts to finish"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = JobRepository.claim_job()
+            except Exception as e:
+                logging.error(f"Claiming a job failed: {str(e)}")
+                job = None
+            if job is None:
+                self._wakeup.wait(settings.job_poll_interval_seconds)
+                self._wakeup.clear()
+                continue
+            self._execute(job)
+
+    def _execute(self, job) -> None:
+        job_id = job["id"]
+        try:
+            handler = JOB_HANDLERS[job["kind"]]
+            handler(job_id, json.loads(job["payload"]))
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+            try:
+                if job["attempts"] >= job["max_attempts"] or job["kind"] not in JOB_HANDLERS:
+                    logging.error(
+                        f"Job {job_id} failed after {job['attempts']} attempt(s): {error}"
+                    )
+                    JobRepository.fail_job(job_id, error)
+                else:
+                    logging.warning(
+                        f"Job {job_id} attempt {job['attempts']} failed, retrying: {error}"
+                    )
+                    JobRepository.reschedule_job(job_id, error, retry_delay(job["attempts"]))
+            except Exception as db_error:
+                # Left 'running'; the next start() puts it back in the queue
+                logging.error(f"Recording the outcome of job {job_id} failed: {str(db_error)}")
+
+
+job_workers = JobWorkerPool()
@@ -6,30 +6,57 @@ from typing import Any, AsyncGenerator, Dict, Optional
 
 import logging
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from .config import settings
-from .db import init_db
-from .exceptions import ActionItemExtractionError, NoteNotFoundError, ActionItemNotFoundError, DatabaseOperationError
-from .routers import action_items, notes
+from .db import close_pool, init_db, pool_stats
+from .cancellation import REASON_DEADLINE
+from .exceptions import (
+    ActionItemExtractionError,
+    NoteNotFoundError,
+    ActionItemNotFoundError,
+    DatabaseOperationError,
+    ExtractionCancelledError,
+)
+from .executors import run_llm, shutdown_executors
+from .jobs import job_workers
+from .metrics import MetricsMiddleware
+from .routers import action_items, jobs, metrics, notes
+from .services import llm
+from .storage import get_backend, reset_backend
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan to handle startup and shutdown events"""
     # Startup
-    logging.info("Initializing database...")
-    init_db()
-    logging.info("Database initialized successfully")
-    
+    logging.info("Storing notes, action items, jobs and caches in %s storage", get_backend().name)
+    if get_backend().name == "sqlite":
+        logging.info("Initializing database...")
+        schema_version = init_db()
+        logging.info("Database initialized successfully (schema version %d)", schema_version)
+    if settings.ollama_warmup:
+        # Loads the model before the first request; logs cold vs. warm latency
+        await run_llm(llm.warm_up)
+    job_workers.start()
+
     yield  # Application runs here
-    
+
     # Shutdown
+    job_workers.stop()
+    shutdown_executors()
+    llm.close_client()
+    if get_backend().name == "sqlite":
+        logging.info("Closing database connection pool (stats: %s)", pool_stats())
+        close_pool()
+    # In-memory storage lives exactly as long as the app
+    reset_backend()
     logging.info("Application shutdown")
 
 
 app = FastAPI(title=settings.app_title, debug=settings.debug, lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.exception_handler(NoteNotFoundError)
@@ -39,7 +66,9 @@ async def handle_note_not_found(request, exc: NoteNotFoundError):
 
 @app.exception_handler(ActionItemNotFoundError)
 async def handle_action_item_not_found(request, exc: ActionItemNotFoundError):
-    return HTTPException(status_code=404, detail=f"Action item with id {exc.action_item_id} not found")
+    return HTTPException(
+        status_code=404, detail=f"Action item with id {exc.action_item_id} not found"
+    )
 
 
 @app.exception_handler(DatabaseOperationError)
@@ -56,6 +85,14 @@ async def handle_extraction_error(request, exc: ActionItemExtractionError):
     return HTTPException(status_code=500, detail="Action item extraction failed")
 
 
+@app.exception_handler(ExtractionCancelledError)
+async def handle_extraction_cancelled(request, exc: ExtractionCancelledError):
+    if exc.reason == REASON_DEADLINE:
+        return JSONResponse(status_code=504, content={"detail": "Extraction deadline exceeded"})
+    # The client is gone; 499 (client closed request) only shows up in logs and metrics
+    return JSONResponse(status_code=499, content={"detail": "Client disconnected"})
+
+
 @app.get("/", response_class=HTMLResponse)
 def index() -> str:
     html_path = Path(__file__).resolve().parents[1] / "frontend" / "index.html"
@@ -64,7 +101,9 @@ def index() -> str:
 
 app.include_router(notes.router)
 app.include_router(action_items.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
 
 
 static_dir = Path(__file__).resolve().parents[1] / "frontend"
-app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
\ No newline at end of file
+app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import bisect
+import functools
+import inspect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+F = TypeVar("F", bound=Callable[..., Any])
+M = TypeVar("M", bound="_Metric")
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+CALL_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+# A collector returns (name, type, help, [(labels, value), ...]) families
+# computed at scrape time, e.g. from a component's stats() snapshot
+Sample = Tuple[Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+Collector = Callable[[], List[Family]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    @abstractmethod
+    def _render_samples(self) -> List[str]:
+        """Sample lines of the exposition, after the HELP and TYPE lines"""
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self._labels(k))} {_format_value(v)}" for k, v in values
+        ]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self._labels(k))} {_format_value(v)}" for k, v in values
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = CALL_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (non-cumulative) + overflow, sum]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self, *labels: str) -> Tuple[int, float]:
+        """(count, sum) observed for one label set"""
+        with self._lock:
+            series = self._series.get(labels)
+            return (sum(series[0]), series[1]) if series else (0, 0.0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            series = [
+                (labels, list(counts), total) for labels, (counts, total) in self._series.items()
+            ]
+        lines: List[str] = []
+        for labels, counts, total in series:
+            base = self._labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels({**base, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(base)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(base)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, type_name, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {type_name}")
+                lines.extend(
+                    f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    for labels, value in samples
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(
+    Counter("week2_http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+)
+HTTP_REQUEST_SECONDS = registry.register(
+    Histogram(
+        "week2_http_request_duration_seconds",
+        "HTTP request latency, until the last response byte was sent.",
+        ("method", "route"),
+        buckets=REQUEST_BUCKETS,
+    )
+)
+HTTP_IN_FLIGHT = registry.register(
+    Gauge("week2_http_requests_in_flight", "HTTP requests currently being handled.", ("method",))
+)
+DB_CALL_SECONDS = registry.register(
+    Histogram(
+        "week2_db_call_duration_seconds", "Duration of week2 db.* calls.", ("function", "outcome")
+    )
+)
+EXTRACTION_SECONDS = registry.register(
+    Histogram(
+        "week2_extraction_duration_seconds",
+        "Duration of action item extraction calls, including failures that return [].",
+        ("function", "outcome"),
+    )
+)
+IDEMPOTENCY_REQUESTS = registry.register(
+    Counter(
+        "week2_idempotency_requests_total",
+        "Requests carrying an Idempotency-Key, "
+        "by outcome (executed, replayed, in_progress, mismatch).",
+        ("outcome",),
+    )
+)
+EXTRACTION_CANCELLATIONS = registry.register(
+    Counter(
+        "week2_extraction_cancellations_total",
+        "Extraction requests abandoned before their results were stored, "
+        "by reason (deadline, disconnected).",
+        ("reason",),
+    )
+)
+LLM_ABANDONED_CALLS = registry.register(
+    Counter(
+        "week2_llm_abandoned_calls_total",
+        "Model calls abandoned because every request waiting for them was cancelled, "
+        "by reason and stage "
+        "(queued: never sent, streaming: aborted mid-reply).",
+        ("reason", "stage"),
+    )
+)
+LLM_SECONDS_SAVED = registry.register(
+    Counter(
+        "week2_llm_abandoned_seconds_saved_total",
+        "Estimated model time not spent on abandoned calls: "
+        "the average completed call of the same kind minus the time already spent.",
+        ("reason",),
+    )
+)
+
+
+class CallTimer:
+    __slots__ = ("outcome",)
+
+    def __init__(self) -> None:
+        self.outcome = "ok"
+
+    def fail(self) -> None:
+        """Record the call as failed even though no exception escapes it"""
+        self.outcome = "error"
+
+    def cancel(self) -> None:
+        """Record the call as cancelled rather than failed"""
+        self.outcome = "cancelled"
+
+
+@contextmanager
+def time_call(histogram: Histogram, function: str) -> Iterator[CallTimer]:
+    """Observe the block's duration under ``function`` and its outcome (ok/error, or the timer's)"""
+    timer = CallTimer()
+    started = time.perf_counter()
+    try:
+        yield timer
+    except BaseException:
+        if timer.outcome == "ok":
+            timer.outcome = "error"
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started, function, timer.outcome)
+
+
+def timed(histogram: Histogram, name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator form of time_call; generator functions are timed over the whole iteration"""
+
+    def decorate(fn: F) -> F:
+        function = name or fn.__name__
+
+        if inspect.isgeneratorfunction(fn):
+
+            @functools.wraps(fn)
+            def generator_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with time_call(histogram, function):
+                    return (yield from fn(*args, **kwargs))
+
+            return generator_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # Inlined rather than using time_call: this wraps hot-path calls
+            outcome = "error"
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                histogram.observe(time.perf_counter() - started, function, outcome)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route counts, latency and in-flight requests.
+
+    The route label is the matched path template (``/notes/{note_id}``), never
+    the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(method)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "<unmatched>"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method, route_path)
+            HTTP_REQUESTS.inc(method, route_path, str(status))
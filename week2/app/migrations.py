@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+from typing import NamedTuple, Tuple
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    statements: Tuple[str, ...]
+
+
+# Ordered schema migrations. ``PRAGMA user_version`` records the last applied
+# version; every statement must be idempotent so that databases created before
+# migrations existed (user_version 0, tables already present) upgrade cleanly.
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(
+        1,
+        "create notes and action_items tables",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS notes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content TEXT NOT NULL,
+                created_at TEXT DEFAULT (datetime('now'))
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS action_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                note_id INTEGER,
+                text TEXT NOT NULL,
+                done INTEGER DEFAULT 0,
+                created_at TEXT DEFAULT (datetime('now')),
+                FOREIGN KEY (note_id) REFERENCES notes(id)
+            )
+            """,
+        ),
+    ),
+    Migration(
+        2,
+        "index for action items listed by note",
+        (
+            # Serves "WHERE note_id = ? ORDER BY id DESC" in index order:
+            # equality on note_id, then id order, one rowid lookup per row
+            # returned. The unfiltered listing needs no index: the rowid table
+            # is already ordered by id.
+            """
+            CREATE INDEX IF NOT EXISTS idx_action_items_note
+            ON action_items (note_id, id)
+            """,
+        ),
+    ),
+    Migration(
+        3,
+        "persistent cache of LLM extraction results",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS llm_extraction_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                items TEXT NOT NULL,
+                created_at TEXT DEFAULT (datetime('now')),
+                last_used_at REAL NOT NULL
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_llm_extraction_cache_last_used
+            ON llm_extraction_cache (last_used_at)
+            """,
+        ),
+    ),
+    Migration(
+        4,
+        "durable background job queue",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                run_after REAL NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at TEXT DEFAULT (datetime('now')),
+                updated_at TEXT DEFAULT (datetime('now'))
+            )
+            """,
+            # Workers only ever look for the oldest runnable pending job, so the
+            # index covers just those rows and stays small as jobs finish
+            """
+            CREATE INDEX IF NOT EXISTS idx_jobs_pending
+            ON jobs (run_after, id) WHERE status = 'pending'
+            """,
+        ),
+    ),
+    Migration(
+        5,
+        "idempotency keys of replayable POST requests",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                request_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                status_code INTEGER,
+                response TEXT,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (scope, key)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at
+            ON idempotency_keys (expires_at)
+            """,
+        ),
+    ),
+    Migration(
+        6,
+        "replace the covering action-items index with (note_id, id)",
+        (
+            # Earlier builds of migration 2 indexed (note_id, id, text, done,
+            # created_at), a second copy of every item's text that doubled the
+            # table's size for no measurable gain on per-note listings
+            "DROP INDEX IF EXISTS idx_action_items_note_id",
+            """
+            CREATE INDEX IF NOT EXISTS idx_action_items_note
+            ON action_items (note_id, id)
+            """,
+        ),
+    ),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_schema_version(connection: sqlite3.Connection) -> int:
+    return int(connection.execute("PRAGMA user_version").fetchone()[0])
+
+
+def apply_migrations(connection: sqlite3.Connection) -> int:
+    """Apply pending migrations in order, each in its own transaction.
+
+    Returns the schema version after migrating.
+    """
+    current = get_schema_version(connection)
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        logging.info("Applying migration %d: %s", migration.version, migration.description)
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the write lock
+            if get_schema_version(connection) >= migration.version:
+                connection.rollback()
+                current = get_schema_version(connection)
+                continue
+            for statement in migration.statements:
+                connection.execute(statement)
+            connection.execute(f"PRAGMA user_version = {int(migration.version)}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        current = migration.version
+    return current
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import List, Optional, Sequence, Tuple, TypeVar
+
+from .exceptions import InvalidCursorError
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+T = TypeVar("T")
+
+
+def encode_cursor(last_id: int) -> str:
+    """Build an opaque cursor pointing just past the row with ``last_id``"""
+    payload = json.dumps({"before": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Return the keyset boundary id for ``cursor`` (None for the first page)"""
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        before = json.loads(base64.urlsafe_b64decode(padded.encode()))["before"]
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise InvalidCursorError(cursor) from None
+    if not isinstance(before, int) or isinstance(before, bool) or before < 1:
+        raise InvalidCursorError(cursor)
+    return before
+
+
+def split_page(rows: Sequence[T], limit: int) -> Tuple[List[T], Optional[str]]:
+    """Trim a ``limit + 1`` fetch to one page and derive the next cursor"""
+    page = list(rows[:limit])
+    if len(rows) > limit and page:
+        return page, encode_cursor(page[-1]["id"])
+    return page, None
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+
+class PoolClosedError(Exception):
+    """Raised when a connection is requested from a pool that has been shut down"""
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available within the timeout"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        super().__init__(f"Timed out after {timeout:.2f}s waiting for a database connection")
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived, pre-configured SQLite connections.
+
+    Connections are opened lazily up to ``max_size`` and handed out LIFO, so
+    the most recently used (warmest) connection is reused first. Every
+    connection is configured once when it is opened (WAL journal,
+    ``synchronous=NORMAL``, page cache, mmap and busy timeout), so callers
+    never pay the open/PRAGMA cost on the request path.
+    """
+
+    def __init__(
+        self,
+        database: Union[str, Path],
+        max_size: int = 8,
+        timeout: float = 10.0,
+        busy_timeout_ms: int = 5000,
+        cache_size_kib: int = 8192,
+        mmap_size: int = 64 * 1024 * 1024,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.database = str(database)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+
+        # None is a wake-up sentinel that close() hands to blocked acquirers
+        self._idle: "queue.LifoQueue[Optional[sqlite3.Connection]]" = queue.LifoQueue()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._waiting = 0
+
+        # Metrics
+        self._in_use = 0
+        self._acquired = 0
+        self._waits = 0
+        self._wait_time = 0.0
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.database,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+        )
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        return connection
+
+    def acquire(self) -> sqlite3.Connection:
+        """Borrow a connection, opening a new one if the pool is not yet full"""
+        with self._lock:
+            if self._closed:
+                raise PoolClosedError("Connection pool is closed")
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = None
+                if len(self._connections) < self.max_size:
+                    connection = self._open()
+                    self._connections.append(connection)
+            if connection is not None:
+                self._in_use += 1
+                self._acquired += 1
+                return connection
+            self._waits += 1
+            self._waiting += 1
+
+        # Pool exhausted: block outside the lock until a connection is released
+        started = time.perf_counter()
+        try:
+            connection = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(self.timeout) from None
+        finally:
+            waited = time.perf_counter() - started
+            with self._lock:
+                self._wait_time += waited
+                self._waiting -= 1
+
+        with self._lock:
+            if connection is None or self._closed:
+                if connection is not None:
+                    connection.close()
+                raise PoolClosedError("Connection pool is closed")
+            self._in_use += 1
+            self._acquired += 1
+        return connection
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        """Return a borrowed connection, rolling back any unfinished transaction"""
+        if connection.in_transaction:
+            connection.rollback()
+        with self._lock:
+            self._in_use -= 1
+            if self._closed:
+                connection.close()
+                return
+            self._idle.put(connection)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self) -> None:
+        """Close idle connections and fail blocked acquirers; busy ones are closed on release"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            while True:
+                try:
+                    connection = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if connection is not None:
+                    connection.close()
+            self._connections.clear()
+            for _ in range(self._waiting):
+                self._idle.put(None)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Snapshot of pool metrics"""
+        with self._lock:
+            return {
+                "size": len(self._connections),
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "acquired": self._acquired,
+                "waits": self._waits,
+                "wait_time_seconds": self._wait_time,
+            }
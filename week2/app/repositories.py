@@ -1,32 +1,92 @@
 from __future__ import annotations
 
+import json
 import sqlite3
+import time
 from pathlib import Path
-from typing import Optional, List
+from typing import Any, AsyncIterator, Dict, Mapping, Optional, List, Tuple
 
 from . import db
-from .exceptions import NoteNotFoundError, ActionItemNotFoundError, DatabaseOperationError
+from .cache import LRUCache
+from .config import settings
+from .exceptions import (
+    NoteNotFoundError,
+    ActionItemNotFoundError,
+    DatabaseOperationError,
+    JobNotFoundError,
+)
+from .executors import run_db
+from .storage import Row, get_backend
+
+
+def _approximate_size(value: Any) -> int:
+    """Rough in-memory footprint of cached rows, used to bound cache size"""
+    if value is None:
+        return 0
+    if isinstance(value, sqlite3.Row):
+        return 64 + sum(len(str(column)) for column in value)
+    if isinstance(value, Mapping):
+        # Rows of the memory storage backend
+        return 64 + sum(len(str(column)) for column in value.values())
+    return 64 + sum(_approximate_size(row) for row in value)
+
+
+def _new_cache() -> LRUCache:
+    return LRUCache(
+        max_entries=settings.cache_max_entries,
+        max_weight=settings.cache_max_bytes,
+        ttl=settings.cache_ttl_seconds,
+        weigher=_approximate_size,
+    )
+
+
+# Read-through caches for the lookups dashboards poll: single notes by id and
+# action-item listings filtered by note. Every write path invalidates exactly
+# the entries it affects (listings are tagged with their note id).
+note_cache = _new_cache()
+action_item_cache = _new_cache()
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return {"notes": note_cache.stats(), "action_items": action_item_cache.stats()}
+
+
+def clear_caches() -> None:
+    note_cache.clear()
+    action_item_cache.clear()
+
+
+# Rows per page when a listing is streamed; each page is its own DB call
+STREAM_PAGE_SIZE = db.STREAM_BATCH_SIZE
+
+
+def _invalidate_note_items(note_ids) -> None:
+    for note_id in set(note_ids):
+        if note_id is not None:
+            action_item_cache.invalidate_tag(note_id)
 
 
 class NoteRepository:
     @staticmethod
-    def create_note(content: str) -> int:
+    def create_note(content: str) -> Row:
         try:
-            return db.insert_note(content)
+            row = get_backend().insert_note(content)
         except Exception as e:
             raise DatabaseOperationError("insert_note", str(e))
+        note_cache.invalidate(row["id"])
+        return row
 
     @staticmethod
-    def get_note(note_id: int) -> Optional[sqlite3.Row]:
+    def get_note(note_id: int) -> Optional[Row]:
         try:
-            return db.get_note(note_id)
+            return note_cache.get_or_load(note_id, lambda: get_backend().get_note(note_id))
         except Exception as e:
             raise DatabaseOperationError("get_note", str(e))
 
     @staticmethod
-    def list_notes() -> List[sqlite3.Row]:
+    def list_notes(limit: Optional[int] = None, before_id: Optional[int] = None) -> List[Row]:
         try:
-            return db.list_notes()
+            return get_backend().list_notes(limit=limit, before_id=before_id)
         except Exception as e:
             raise DatabaseOperationError("list_notes", str(e))
 
@@ -35,41 +95,295 @@ class ActionItemRepository:
     @staticmethod
     def create_action_items(items: List[str], note_id: Optional[int] = None) -> List[int]:
         try:
-            return db.insert_action_items(items, note_id)
+            ids = get_backend().insert_action_items(items, note_id)
         except Exception as e:
             raise DatabaseOperationError("insert_action_items", str(e))
+        _invalidate_note_items([note_id])
+        return ids
 
     @staticmethod
-    def list_action_items(note_id: Optional[int] = None) -> List[sqlite3.Row]:
+    def create_extraction(
+        text: str, items: List[str], save_note: bool = False
+    ) -> Tuple[Optional[int], List[int]]:
+        """Persist one extraction (optional note plus its items) in one transaction"""
         try:
-            return db.list_action_items(note_id)
+            note_id, ids = get_backend().insert_extraction_batch(
+                [(text, items)], save_notes=save_note
+            )[0]
+        except Exception as e:
+            raise DatabaseOperationError("insert_extraction_batch", str(e))
+        if note_id is not None:
+            note_cache.invalidate(note_id)
+        _invalidate_note_items([note_id])
+        return note_id, ids
+
+    @staticmethod
+    def create_notes_with_action_items(
+        entries: List[Tuple[str, List[str]]], save_notes: bool = True
+    ) -> List[Tuple[Optional[int], List[int]]]:
+        try:
+            results = get_backend().insert_extraction_batch(entries, save_notes=save_notes)
+        except Exception as e:
+            raise DatabaseOperationError("insert_extraction_batch", str(e))
+        note_ids = [note_id for note_id, _ in results if note_id is not None]
+        for note_id in note_ids:
+            note_cache.invalidate(note_id)
+        _invalidate_note_items(note_ids)
+        return results
+
+    @staticmethod
+    def list_action_items(
+        note_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> List[Row]:
+        try:
+            if note_id is None or not use_cache:
+                return get_backend().list_action_items(note_id, limit=limit, before_id=before_id)
+            return action_item_cache.get_or_load(
+                (note_id, limit, before_id),
+                lambda: get_backend().list_action_items(note_id, limit=limit, before_id=before_id),
+                tag=note_id,
+            )
         except Exception as e:
             raise DatabaseOperationError("list_action_items", str(e))
 
     @staticmethod
-    def mark_action_item_done(action_item_id: int, done: bool) -> None:
+    def mark_action_item_done(action_item_id: int, done: bool) -> Row:
         try:
-            # Check if action item exists
-            action_item = ActionItemRepository.get_action_item(action_item_id)
-            if not action_item:
-                raise ActionItemNotFoundError(action_item_id)
-            
-            db.mark_action_item_done(action_item_id, done)
-        except ActionItemNotFoundError:
-            raise
+            row = get_backend().mark_action_item_done(action_item_id, done)
         except Exception as e:
             raise DatabaseOperationError("mark_action_item_done", str(e))
+        if row is None:
+            raise ActionItemNotFoundError(action_item_id)
+        _invalidate_note_items([row["note_id"]])
+        return row
+
+    @staticmethod
+    def get_action_item(action_item_id: int) -> Optional[Row]:
+        try:
+            return get_backend().get_action_item(action_item_id)
+        except Exception as e:
+            raise DatabaseOperationError("get_action_item", str(e))
+
 
+class JobRepository:
     @staticmethod
-    def get_action_item(action_item_id: int) -> Optional[sqlite3.Row]:
+    def create_job(kind: str, payload: Dict[str, Any], max_attempts: int) -> Row:
         try:
-            # We need to implement this method since it's used above
-            with db.get_connection() as connection:
-                cursor = connection.cursor()
-                cursor.execute(
-                    "SELECT id, note_id, text, done, created_at FROM action_items WHERE id = ?",
-                    (action_item_id,)
-                )
-                return cursor.fetchone()
+            return get_backend().insert_job(
+                kind, json.dumps(payload, ensure_ascii=False), max_attempts, time.time()
+            )
         except Exception as e:
-            raise DatabaseOperationError("get_action_item", str(e))
\ No newline at end of file
+            raise DatabaseOperationError("insert_job", str(e))
+
+    @staticmethod
+    def get_job(job_id: int) -> Row:
+        try:
+            row = get_backend().get_job(job_id)
+        except Exception as e:
+            raise DatabaseOperationError("get_job", str(e))
+        if row is None:
+            raise JobNotFoundError(job_id)
+        return row
+
+    @staticmethod
+    def claim_job() -> Optional[Row]:
+        try:
+            return get_backend().claim_job(time.time())
+        except Exception as e:
+            raise DatabaseOperationError("claim_job", str(e))
+
+    @staticmethod
+    def complete_extraction_job(
+        job_id: int, text: str, items: List[str], save_note: bool
+    ) -> Tuple[Optional[int], List[int]]:
+        try:
+            note_id, ids = get_backend().complete_extraction_job(job_id, text, items, save_note)
+        except Exception as e:
+            raise DatabaseOperationError("complete_extraction_job", str(e))
+        if note_id is not None:
+            note_cache.invalidate(note_id)
+        _invalidate_note_items([note_id])
+        return note_id, ids
+
+    @staticmethod
+    def reschedule_job(job_id: int, error: str, delay_seconds: float) -> None:
+        try:
+            get_backend().reschedule_job(job_id, error, time.time() + delay_seconds)
+        except Exception as e:
+            raise DatabaseOperationError("reschedule_job", str(e))
+
+    @staticmethod
+    def fail_job(job_id: int, error: str) -> None:
+        try:
+            get_backend().fail_job(job_id, error)
+        except Exception as e:
+            raise DatabaseOperationError("fail_job", str(e))
+
+    @staticmethod
+    def requeue_running_jobs() -> int:
+        try:
+            return get_backend().requeue_running_jobs()
+        except Exception as e:
+            raise DatabaseOperationError("requeue_running_jobs", str(e))
+
+
+# Expired idempotency keys are purged by the claims themselves, at most this often
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = 60.0
+_last_idempotency_purge = 0.0
+
+
+class IdempotencyRepository:
+    @staticmethod
+    def claim(scope: str, key: str, request_hash: str) -> Tuple[bool, Optional[Row]]:
+        global _last_idempotency_purge
+        now = time.time()
+        try:
+            if now - _last_idempotency_purge >= IDEMPOTENCY_PURGE_INTERVAL_SECONDS:
+                _last_idempotency_purge = now
+                get_backend().purge_idempotency_keys(now)
+            return get_backend().claim_idempotency_key(
+                scope, key, request_hash, now, settings.idempotency_lock_seconds
+            )
+        except Exception as e:
+            raise DatabaseOperationError("claim_idempotency_key", str(e))
+
+    @staticmethod
+    def complete(scope: str, key: str, status_code: int, response: str) -> None:
+        try:
+            get_backend().complete_idempotency_key(
+                scope, key, status_code, response, time.time() + settings.idempotency_ttl_seconds
+            )
+        except Exception as e:
+            raise DatabaseOperationError("complete_idempotency_key", str(e))
+
+    @staticmethod
+    def release(scope: str, key: str) -> None:
+        try:
+            get_backend().release_idempotency_key(scope, key)
+        except Exception as e:
+            raise DatabaseOperationError("release_idempotency_key", str(e))
+
+
+class AsyncNoteRepository:
+    """Awaitable counterpart of NoteRepository; calls run on the DB executor"""
+
+    @staticmethod
+    async def create_note(content: str) -> Row:
+        return await run_db(NoteRepository.create_note, content)
+
+    @staticmethod
+    async def get_note(note_id: int) -> Optional[Row]:
+        return await run_db(NoteRepository.get_note, note_id)
+
+    @staticmethod
+    async def list_notes(limit: Optional[int] = None, before_id: Optional[int] = None) -> List[Row]:
+        return await run_db(NoteRepository.list_notes, limit=limit, before_id=before_id)
+
+    @staticmethod
+    async def iter_notes(before_id: Optional[int] = None) -> AsyncIterator[List[Row]]:
+        """Every note from ``before_id`` on, newest first, in keyset pages.
+
+        Each page is a separate DB call, so no connection is held while the
+        caller consumes it.
+        """
+        while True:
+            page = await run_db(
+                NoteRepository.list_notes, limit=STREAM_PAGE_SIZE, before_id=before_id
+            )
+            if page:
+                yield page
+            if len(page) < STREAM_PAGE_SIZE:
+                return
+            before_id = page[-1]["id"]
+
+
+class AsyncActionItemRepository:
+    """Awaitable counterpart of ActionItemRepository; calls run on the DB executor"""
+
+    @staticmethod
+    async def create_action_items(items: List[str], note_id: Optional[int] = None) -> List[int]:
+        return await run_db(ActionItemRepository.create_action_items, items, note_id=note_id)
+
+    @staticmethod
+    async def create_extraction(
+        text: str, items: List[str], save_note: bool = False
+    ) -> Tuple[Optional[int], List[int]]:
+        return await run_db(
+            ActionItemRepository.create_extraction, text, items, save_note=save_note
+        )
+
+    @staticmethod
+    async def create_notes_with_action_items(
+        entries: List[Tuple[str, List[str]]], save_notes: bool = True
+    ) -> List[Tuple[Optional[int], List[int]]]:
+        return await run_db(
+            ActionItemRepository.create_notes_with_action_items, entries, save_notes=save_notes
+        )
+
+    @staticmethod
+    async def list_action_items(
+        note_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+    ) -> List[Row]:
+        return await run_db(
+            ActionItemRepository.list_action_items, note_id, limit=limit, before_id=before_id
+        )
+
+    @staticmethod
+    async def iter_action_items(
+        note_id: Optional[int] = None, before_id: Optional[int] = None
+    ) -> AsyncIterator[List[Row]]:
+        """Like AsyncNoteRepository.iter_notes; pages bypass the listing cache"""
+        while True:
+            page = await run_db(
+                ActionItemRepository.list_action_items,
+                note_id,
+                limit=STREAM_PAGE_SIZE,
+                before_id=before_id,
+                use_cache=False,
+            )
+            if page:
+                yield page
+            if len(page) < STREAM_PAGE_SIZE:
+                return
+            before_id = page[-1]["id"]
+
+    @staticmethod
+    async def mark_action_item_done(action_item_id: int, done: bool) -> Row:
+        return await run_db(ActionItemRepository.mark_action_item_done, action_item_id, done)
+
+    @staticmethod
+    async def get_action_item(action_item_id: int) -> Optional[Row]:
+        return await run_db(ActionItemRepository.get_action_item, action_item_id)
+
+
+class AsyncJobRepository:
+    """Awaitable counterpart of JobRepository; calls run on the DB executor"""
+
+    @staticmethod
+    async def create_job(kind: str, payload: Dict[str, Any], max_attempts: int) -> Row:
+        return await run_db(JobRepository.create_job, kind, payload, max_attempts)
+
+    @staticmethod
+    async def get_job(job_id: int) -> Row:
+        return await run_db(JobRepository.get_job, job_id)
+
+
+class AsyncIdempotencyRepository:
+    """Awaitable counterpart of IdempotencyRepository; calls run on the DB executor"""
+
+    @staticmethod
+    async def claim(scope: str, key: str, request_hash: str) -> Tuple[bool, Optional[Row]]:
+        return await run_db(IdempotencyRepository.claim, scope, key, request_hash)
+
+    @staticmethod
+    async def complete(scope: str, key: str, status_code: int, response: str) -> None:
+        await run_db(IdempotencyRepository.complete, scope, key, status_code, response)
+
+    @staticmethod
+    async def release(scope: str, key: str) -> None:
+        await run_db(IdempotencyRepository.release, scope, key)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Generic, Mapping, Optional, TypeVar
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from .schemas.response import NoteRecord
+
+try:
+    import orjson
+except ImportError:  # optional, the "fast-json" extra
+    orjson = None
+
+
+T = TypeVar("T")
+
+
+class EncodedJSONResponse(Response):
+    """JSON response whose body has already been encoded to bytes"""
+
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+class ResponseEncoder(Generic[T]):
+    """Serializer compiled once for a route's response type.
+
+    Routes return ``encoder.response(payload)`` directly, so FastAPI neither
+    re-validates the payload against ``response_model`` nor walks it through
+    ``jsonable_encoder``. Payloads are plain dicts, lists and datetimes, which
+    orjson encodes fastest when installed; otherwise the schema's TypeAdapter
+    writes the same JSON through pydantic-core.
+    """
+
+    def __init__(self, schema: type[T]) -> None:
+        self._adapter: TypeAdapter[T] = TypeAdapter(schema)
+
+    def encode(self, payload: T) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(payload)
+        return self._adapter.dump_json(payload)
+
+    def response(self, payload: T, status_code: int = 200) -> EncodedJSONResponse:
+        return EncodedJSONResponse(self.encode(payload), status_code=status_code)
+
+
+def success_payload(data: Any, next_cursor: Optional[str] = None) -> Dict[str, Any]:
+    """The fields of a successful APIResponse, in APIResponse field order"""
+    return {
+        "success": True,
+        "message": None,
+        "data": data,
+        "error": None,
+        "next_cursor": next_cursor,
+    }
+
+
+def note_record(row: Mapping[str, Any]) -> NoteRecord:
+    created_at = row["created_at"]
+    if isinstance(created_at, str):
+        # SQLite hands back text; parse it as Note(created_at=...) would
+        created_at = datetime.fromisoformat(created_at)
+    return {"content": row["content"], "id": row["id"], "created_at": created_at}
@@ -1,40 +1,93 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import json
+import logging
+from typing import Any, AsyncIterator, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 
 from .. import db
-from ..exceptions import ActionItemNotFoundError, DatabaseOperationError
-from ..repositories import ActionItemRepository, NoteRepository
-from ..schemas.action_item import ActionItemExtractRequest, ActionItemMarkDoneRequest
-from ..schemas.response import ActionItemExtractResponse, APIResponse
-from ..services.extract import extract_action_items, extract_action_items_llm
-
+from ..config import settings
+from ..cancellation import (
+    REASON_DEADLINE,
+    REASON_DISCONNECTED,
+    Cancellation,
+    await_cancellable,
+    request_cancellation,
+)
+from ..exceptions import (
+    ActionItemNotFoundError,
+    DatabaseOperationError,
+    ExtractionCancelledError,
+    InvalidCursorError,
+)
+from ..executors import run_llm
+from ..idempotency import idempotent
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, split_page
+from ..repositories import AsyncActionItemRepository, AsyncNoteRepository
+from ..responses import ResponseEncoder, success_payload
+from ..schemas.action_item import (
+    ActionItemExtractBatchRequest,
+    ActionItemExtractRequest,
+    ActionItemMarkDoneRequest,
+)
+from ..schemas.response import (
+    ActionItemExtractBatchResponse,
+    ActionItemExtractResponse,
+    ActionItemListResponse,
+    ActionItemProgressiveExtractResponse,
+    ActionItemRecord,
+    ActionItemTieredExtractResponse,
+    ActionItemUploadExtractResponse,
+    APIResponse,
+)
+from ..services.extract import (
+    ActionItemStreamParser,
+    extract_action_items,
+    extract_action_items_llm,
+    extract_action_items_llm_many,
+    merge_action_items,
+    stream_action_items_llm,
+)
+from ..services.tiered import extract_action_items_tiered_async, tiered_stats
+from ..streaming import ndjson_response, sse_event, sse_response, wants_ndjson
+from ..uploads import iter_upload_text
 
 router = APIRouter(prefix="/action-items", tags=["action-items"])
 
+ACTION_ITEM_LIST_JSON = ResponseEncoder(ActionItemListResponse)
+
 
 @router.post("/extract", response_model=APIResponse)
-def extract(payload: ActionItemExtractRequest) -> APIResponse:
+async def extract(
+    payload: ActionItemExtractRequest, idempotency_key: Optional[str] = Header(default=None)
+) -> Any:
+    return await idempotent(
+        "POST /action-items/extract", idempotency_key, payload, lambda: _extract(payload)
+    )
+
+
+async def _extract(payload: ActionItemExtractRequest) -> APIResponse:
     try:
         text = payload.text.strip()
         if not text:
             raise HTTPException(status_code=400, detail="text is required")
 
-        note_id: Optional[int] = None
-        if payload.save_note:
-            note_id = NoteRepository.create_note(text)
+        items = await run_in_threadpool(extract_action_items, text)
+        note_id, ids = await AsyncActionItemRepository.create_extraction(
+            text, items, save_note=payload.save_note
+        )
 
-        items = extract_action_items(text)
-        ids = ActionItemRepository.create_action_items(items, note_id=note_id)
-        
         response_data = ActionItemExtractResponse(
-            note_id=note_id,
-            items=[{"id": i, "text": t} for i, t in zip(ids, items)]
+            note_id=note_id, items=[{"id": i, "text": t} for i, t in zip(ids, items)]
         )
-        
+
         return APIResponse(success=True, data=response_data)
+    except HTTPException:
+        raise
     except DatabaseOperationError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
     except Exception as e:
@@ -42,48 +95,360 @@ def extract(payload: ActionItemExtractRequest) -> APIResponse:
 
 
 @router.post("/extract-llm", response_model=APIResponse)
-def extract_llm(payload: ActionItemExtractRequest) -> APIResponse:
-    """New endpoint for LLM-powered action item extraction"""
+async def extract_llm(
+    payload: ActionItemExtractRequest,
+    request: Request,
+    idempotency_key: Optional[str] = Header(default=None),
+    x_request_timeout: Optional[float] = Header(default=None, gt=0),
+) -> Any:
+    """New endpoint for LLM-powered action item extraction.
+
+    Abandoned, without storing anything, when the client disconnects or the
+    deadline (``X-Request-Timeout`` seconds, capped by
+    ``settings.llm_request_timeout_seconds``) passes.
+    """
+    async with request_cancellation(request, x_request_timeout) as cancellation:
+        return await idempotent(
+            "POST /action-items/extract-llm",
+            idempotency_key,
+            payload,
+            lambda: _extract_llm(payload, cancellation),
+        )
+
+
+async def _extract_llm(
+    payload: ActionItemExtractRequest, cancellation: Cancellation
+) -> APIResponse:
     try:
         text = payload.text.strip()
         if not text:
             raise HTTPException(status_code=400, detail="text is required")
 
-        note_id: Optional[int] = None
-        if payload.save_note:
-            note_id = NoteRepository.create_note(text)
+        items = await await_cancellable(
+            run_llm(
+                extract_action_items_llm,
+                text,
+                use_cache=not payload.bypass_cache,
+                cancellation=cancellation,
+            ),
+            cancellation,
+        )
+        # Nobody will read the result any more, so do not store it
+        cancellation.raise_if_cancelled()
+        note_id, ids = await AsyncActionItemRepository.create_extraction(
+            text, items, save_note=payload.save_note
+        )
 
-        items = extract_action_items_llm(text)
-        ids = ActionItemRepository.create_action_items(items, note_id=note_id)
-        
         response_data = ActionItemExtractResponse(
+            note_id=note_id, items=[{"id": i, "text": t} for i, t in zip(ids, items)]
+        )
+
+        return APIResponse(success=True, data=response_data)
+    except (HTTPException, ExtractionCancelledError):
+        raise
+    except DatabaseOperationError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+@router.post("/extract-stream")
+async def extract_stream(
+    payload: ActionItemExtractRequest,
+    request: Request,
+    x_request_timeout: Optional[float] = Header(default=None, gt=0),
+) -> StreamingResponse:
+    """Progressive extraction as Server-Sent Events.
+
+    ``heuristic`` carries the regex results as soon as they are computed,
+    ``llm_item`` each LLM item as the model produces it (``llm_error`` if the
+    model fails), and ``done`` the merged, deduplicated items with their
+    stored ids. On a deadline the stream ends with ``error`` and nothing is
+    stored; a client that disconnects aborts the model call the same way.
+    """
+    text = payload.text.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="text is required")
+    return sse_response(_extract_stream_events(text, payload, request, x_request_timeout))
+
+
+async def _extract_stream_events(
+    text: str, payload: ActionItemExtractRequest, request: Request, timeout_seconds: Optional[float]
+) -> AsyncIterator[bytes]:
+    try:
+        async with request_cancellation(request, timeout_seconds) as cancellation:
+            try:
+                heuristic = await run_in_threadpool(extract_action_items, text)
+                yield sse_event("heuristic", {"items": heuristic})
+
+                llm_items: List[str] = []
+                llm_failed = False
+                items = stream_action_items_llm(
+                    text, use_cache=not payload.bypass_cache, cancellation=cancellation
+                )
+                try:
+                    # One step of the model stream at a time on the LLM executor
+                    while (
+                        item := await await_cancellable(run_llm(next, items, None), cancellation)
+                    ) is not None:
+                        llm_items.append(item)
+                        yield sse_event("llm_item", {"text": item})
+                except ExtractionCancelledError:
+                    raise
+                except Exception as e:
+                    logging.error(f"LLM extraction failed: {str(e)}")
+                    llm_failed = True
+                    yield sse_event("llm_error", {"detail": f"LLM extraction failed: {str(e)}"})
+
+                merged = merge_action_items(heuristic, llm_items)
+                cancellation.raise_if_cancelled()
+                note_id, ids = await AsyncActionItemRepository.create_extraction(
+                    text, merged, save_note=payload.save_note
+                )
+                response_data = ActionItemProgressiveExtractResponse(
+                    note_id=note_id,
+                    items=[{"id": i, "text": t} for i, t in zip(ids, merged)],
+                    llm_failed=llm_failed,
+                )
+                yield sse_event("done", response_data.model_dump())
+            except BaseException:
+                # Including the client going away mid-stream: stop the model call too
+                cancellation.cancel()
+                raise
+    except ExtractionCancelledError as e:
+        if e.reason == REASON_DEADLINE:
+            yield sse_event("error", {"detail": "Extraction deadline exceeded"})
+    except DatabaseOperationError as e:
+        yield sse_event("error", {"detail": f"Database error: {e.message}"})
+
+
+@router.post("/extract-tiered", response_model=APIResponse)
+async def extract_tiered(
+    payload: ActionItemExtractRequest,
+    request: Request,
+    idempotency_key: Optional[str] = Header(default=None),
+    x_request_timeout: Optional[float] = Header(default=None, gt=0),
+) -> Any:
+    """Heuristic extraction, escalated to the LLM only when the heuristics are unsure"""
+    async with request_cancellation(request, x_request_timeout) as cancellation:
+        return await idempotent(
+            "POST /action-items/extract-tiered",
+            idempotency_key,
+            payload,
+            lambda: _extract_tiered(payload, cancellation),
+        )
+
+
+async def _extract_tiered(
+    payload: ActionItemExtractRequest, cancellation: Cancellation
+) -> APIResponse:
+    try:
+        text = payload.text.strip()
+        if not text:
+            raise HTTPException(status_code=400, detail="text is required")
+
+        result = await extract_action_items_tiered_async(
+            text, use_cache=not payload.bypass_cache, cancellation=cancellation
+        )
+        cancellation.raise_if_cancelled()
+        note_id, ids = await AsyncActionItemRepository.create_extraction(
+            text, result.items, save_note=payload.save_note
+        )
+
+        response_data = ActionItemTieredExtractResponse(
             note_id=note_id,
-            items=[{"id": i, "text": t} for i, t in zip(ids, items)]
+            items=[{"id": i, "text": t} for i, t in zip(ids, result.items)],
+            tier=result.tier,
         )
-        
+
         return APIResponse(success=True, data=response_data)
+    except (HTTPException, ExtractionCancelledError):
+        raise
     except DatabaseOperationError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
-@router.get("", response_model=APIResponse)
-def list_all(note_id: Optional[int] = None) -> APIResponse:
+@router.get("/extract-tiered/stats", response_model=APIResponse)
+async def extract_tiered_stats() -> APIResponse:
+    return APIResponse(success=True, data=tiered_stats.snapshot())
+
+
+@router.post("/extract-batch", response_model=APIResponse)
+async def extract_batch(
+    payload: ActionItemExtractBatchRequest,
+    request: Request,
+    idempotency_key: Optional[str] = Header(default=None),
+    x_request_timeout: Optional[float] = Header(default=None, gt=0),
+) -> Any:
+    """Extraction over many texts, persisted in a single transaction.
+
+    Heuristic by default; with ``use_llm`` the texts are packed into as few
+    batched model calls as the token budget allows.
+    """
+    async with request_cancellation(request, x_request_timeout) as cancellation:
+        return await idempotent(
+            "POST /action-items/extract-batch",
+            idempotency_key,
+            payload,
+            lambda: _extract_batch(payload, cancellation),
+        )
+
+
+async def _extract_batch(
+    payload: ActionItemExtractBatchRequest, cancellation: Cancellation
+) -> APIResponse:
     try:
-        rows = ActionItemRepository.list_action_items(note_id=note_id)
-        action_items = [
-            {
-                "id": r["id"],
-                "note_id": r["note_id"],
-                "text": r["text"],
-                "done": bool(r["done"]),
-                "created_at": r["created_at"],
-            }
-            for r in rows
-        ]
-        
-        return APIResponse(success=True, data=action_items)
+        texts = [text.strip() for text in payload.texts]
+        for index, text in enumerate(texts):
+            if not text:
+                raise HTTPException(status_code=400, detail=f"texts[{index}] is required")
+
+        if payload.use_llm:
+            extracted = await await_cancellable(
+                run_llm(
+                    extract_action_items_llm_many,
+                    texts,
+                    use_cache=not payload.bypass_cache,
+                    cancellation=cancellation,
+                ),
+                cancellation,
+            )
+        else:
+            extracted = await run_in_threadpool(
+                lambda: [extract_action_items(text) for text in texts]
+            )
+        cancellation.raise_if_cancelled()
+        entries = list(zip(texts, extracted))
+        stored = await AsyncActionItemRepository.create_notes_with_action_items(
+            entries, save_notes=payload.save_note
+        )
+
+        response_data = ActionItemExtractBatchResponse(
+            results=[
+                ActionItemExtractResponse(
+                    note_id=note_id,
+                    items=[{"id": i, "text": t} for i, t in zip(ids, items)],
+                )
+                for (_, items), (note_id, ids) in zip(entries, stored)
+            ]
+        )
+
+        return APIResponse(success=True, data=response_data)
+    except (HTTPException, ExtractionCancelledError):
+        raise
+    except DatabaseOperationError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+@router.post("/extract-upload", response_model=APIResponse)
+async def extract_upload(
+    request: Request,
+    note_id: Optional[int] = Query(
+        default=None, description="Existing note to attach the action items to"
+    ),
+) -> APIResponse:
+    """Heuristic extraction from a large ``text/plain`` or ``multipart/form-data`` upload.
+
+    The body is scanned line by line as it arrives and action items are stored
+    in batches of ``settings.upload_insert_batch_size`` as they are found;
+    with the line limit and ``settings.upload_max_buffered_chars``, memory
+    stays bounded whatever the upload size. The upload itself is not
+    saved as a note; ``note_id`` attaches the items to an existing one.
+    """
+    stored = 0
+    try:
+        if note_id is not None and await AsyncNoteRepository.get_note(note_id) is None:
+            raise HTTPException(status_code=404, detail="note not found")
+
+        batch_size = settings.upload_insert_batch_size
+        parser = ActionItemStreamParser(settings.upload_max_buffered_chars)
+        pending: List[str] = []
+        async for text in iter_upload_text(request):
+            pending.extend(await run_in_threadpool(parser.feed, text))
+            while len(pending) >= batch_size:
+                stored += len(
+                    await AsyncActionItemRepository.create_action_items(
+                        pending[:batch_size], note_id
+                    )
+                )
+                del pending[:batch_size]
+        # The imperative-sentence fallback is only decided at the end
+        pending.extend(parser.close())
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start : start + batch_size]
+            stored += len(await AsyncActionItemRepository.create_action_items(batch, note_id))
+
+        response_data = ActionItemUploadExtractResponse(
+            note_id=note_id,
+            items_created=stored,
+            used_fallback=parser.used_fallback,
+            truncated=parser.truncated,
+        )
+        return APIResponse(success=True, data=response_data)
+    except ClientDisconnect:
+        raise ExtractionCancelledError(REASON_DISCONNECTED)
+    except HTTPException as e:
+        if stored:
+            # Batches stored before the failure are kept
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=f"{e.detail} ({stored} action items were stored before the error)",
+            )
+        raise
+    except DatabaseOperationError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+def _action_item_dict(r) -> ActionItemRecord:
+    return {
+        "id": r["id"],
+        "note_id": r["note_id"],
+        "text": r["text"],
+        "done": bool(r["done"]),
+        "created_at": r["created_at"],
+    }
+
+
+@router.get("", response_model=ActionItemListResponse)
+async def list_all(
+    note_id: Optional[int] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    accept: Optional[str] = Header(default=None),
+) -> Response:
+    """List action items newest first, one keyset page at a time.
+
+    With ``?stream=1`` or ``Accept: application/x-ndjson`` every matching item
+    from the cursor onwards is streamed as NDJSON instead, ignoring ``limit``.
+    """
+    try:
+        before_id = decode_cursor(cursor)
+        if wants_ndjson(accept, stream):
+            pages = AsyncActionItemRepository.iter_action_items(
+                note_id=note_id, before_id=before_id
+            )
+            return ndjson_response(
+                pages, lambda r: json.dumps(_action_item_dict(r), ensure_ascii=False)
+            )
+
+        rows, next_cursor = split_page(
+            await AsyncActionItemRepository.list_action_items(
+                note_id=note_id, limit=limit + 1, before_id=before_id
+            ),
+            limit,
+        )
+        action_items = [_action_item_dict(r) for r in rows]
+
+        return ACTION_ITEM_LIST_JSON.response(success_payload(action_items, next_cursor))
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
     except DatabaseOperationError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
     except Exception as e:
@@ -91,16 +456,13 @@ def list_all(note_id: Optional[int] = None) -> APIResponse:
 
 
 @router.post("/{action_item_id}/done", response_model=APIResponse)
-def mark_done(action_item_id: int, payload: ActionItemMarkDoneRequest) -> APIResponse:
+async def mark_done(action_item_id: int, payload: ActionItemMarkDoneRequest) -> APIResponse:
     try:
-        done = payload.done
-        ActionItemRepository.mark_action_item_done(action_item_id, done)
-        
-        result = {"id": action_item_id, "done": done}
-        return APIResponse(success=True, data=result)
+        row = await AsyncActionItemRepository.mark_action_item_done(action_item_id, payload.done)
+        return APIResponse(success=True, data=_action_item_dict(row))
     except ActionItemNotFoundError:
         raise HTTPException(status_code=404, detail="action item not found")
     except DatabaseOperationError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+
+from ..config import settings
+from ..exceptions import DatabaseOperationError, JobNotFoundError
+from ..idempotency import idempotent
+from ..jobs import FINISHED_STATUSES, JOB_EXTRACT_LLM, STATUS_SUCCEEDED, job_workers
+from ..repositories import AsyncJobRepository
+from ..schemas.action_item import ActionItemExtractRequest
+from ..schemas.response import ActionItemExtractResponse, APIResponse, JobResponse
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# How often a long-polling request re-reads the job row
+LONG_POLL_INTERVAL_SECONDS = 0.2
+
+
+def _job_response(row) -> JobResponse:
+    return JobResponse(
+        id=row["id"],
+        kind=row["kind"],
+        status=row["status"],
+        attempts=row["attempts"],
+        max_attempts=row["max_attempts"],
+        error=row["error"],
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+        result=json.loads(row["result"]) if row["result"] is not None else None,
+    )
+
+
+async def _wait_for_job(job_id: int, wait: float):
+    """Re-read the job until it has finished or ``wait`` seconds have passed"""
+    deadline = time.monotonic() + min(wait, settings.job_long_poll_max_seconds)
+    row = await AsyncJobRepository.get_job(job_id)
+    while row["status"] not in FINISHED_STATUSES:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(LONG_POLL_INTERVAL_SECONDS, remaining))
+        row = await AsyncJobRepository.get_job(job_id)
+    return row
+
+
+@router.post("/extract-llm", response_model=APIResponse, status_code=202)
+async def submit_extract_llm(
+    payload: ActionItemExtractRequest, idempotency_key: Optional[str] = Header(default=None)
+) -> Any:
+    """Queue an LLM extraction and return its job id without waiting for the model"""
+    return await idempotent(
+        "POST /jobs/extract-llm",
+        idempotency_key,
+        payload,
+        lambda: _submit_extract_llm(payload),
+        status_code=202,
+    )
+
+
+async def _submit_extract_llm(payload: ActionItemExtractRequest) -> APIResponse:
+    try:
+        text = payload.text.strip()
+        if not text:
+            raise HTTPException(status_code=400, detail="text is required")
+
+        row = await AsyncJobRepository.create_job(
+            JOB_EXTRACT_LLM,
+            {"text": text, "save_note": payload.save_note, "bypass_cache": payload.bypass_cache},
+            settings.job_max_attempts,
+        )
+        job_workers.notify()
+
+        return APIResponse(success=True, data=_job_response(row))
+    except HTTPException:
+        raise
+    except DatabaseOperationError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+@router.get("/{job_id}", response_model=APIResponse)
+async def get_job(job_id: int, wait: float = Query(default=0.0, ge=0.0)) -> APIResponse:
+    """Job status; with ``wait`` the request long-polls until the job finishes"""
+    try:
+        row = await _wait_for_job(job_id, wait)
+        return APIResponse(success=True, data=_job_response(row))
+    except JobNotFoundError:
+        raise HTTPException(status_code=404, detail="job not found")
+    except DatabaseOperationError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+@router.get("/{job_id}/result", response_model=APIResponse)
+async def get_job_result(job_id: int, wait: float = Query(default=0.0, ge=0.0)) -> APIResponse:
+    """The extraction result of a succeeded job; 409 while it is unfinished or if it failed"""
+    try:
+        row = await _wait_for_job(job_id, wait)
+        if row["status"] != STATUS_SUCCEEDED:
+            detail = f"job is {row['status']}"
+            if row["error"]:
+                detail = f"{detail}: {row['error']}"
+            raise HTTPException(status_code=409, detail=detail)
+
+        return APIResponse(
+            success=True, data=ActionItemExtractResponse(**json.loads(row["result"]))
+        )
+    except HTTPException:
+        raise
+    except JobNotFoundError:
+        raise HTTPException(status_code=404, detail="job not found")
+    except DatabaseOperationError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Mapping, Optional, Union
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from .. import db, repositories
+from ..metrics import CONTENT_TYPE, Family, registry
+from ..services import extract, llm_cache
+from ..services.tiered import tiered_stats
+from ..storage import get_backend
+
+router = APIRouter(tags=["metrics"])
+
+Number = Union[int, float]
+
+
+def _families(
+    prefix: str,
+    stats: Mapping[str, Number],
+    gauges: Iterable[str],
+    labels: Optional[Dict[str, str]] = None,
+    source: str = "",
+) -> List[Family]:
+    """Turn a component's stats() snapshot into metric families.
+
+    Keys listed in ``gauges`` are point-in-time values; every other key is a
+    monotonically increasing count and is exported as a ``_total`` counter.
+    """
+    gauges = set(gauges)
+    families: List[Family] = []
+    for key, value in stats.items():
+        if key in gauges:
+            families.append(
+                (f"{prefix}_{key}", "gauge", f"{source} {key}.", [(labels or {}, value)])
+            )
+        else:
+            families.append(
+                (f"{prefix}_{key}_total", "counter", f"{source} {key}.", [(labels or {}, value)])
+            )
+    return families
+
+
+def _merge(families: List[Family]) -> List[Family]:
+    """Join same-named families (e.g. one per cache) so each name is declared once"""
+    merged: Dict[str, Family] = {}
+    for name, type_name, documentation, samples in families:
+        if name in merged:
+            merged[name][3].extend(samples)
+        else:
+            merged[name] = (name, type_name, documentation, list(samples))
+    return list(merged.values())
+
+
+def collect_component_stats() -> List[Family]:
+    families: List[Family] = []
+    if get_backend().name == "sqlite":
+        families += _families(
+            "week2_db_pool",
+            db.pool_stats(),
+            ("size", "max_size", "in_use", "idle"),
+            source="Connection pool",
+        )
+    for cache_name, stats in repositories.cache_stats().items():
+        families += _families(
+            "week2_lookup_cache",
+            stats,
+            ("entries", "weight"),
+            {"cache": cache_name},
+            source="Lookup cache",
+        )
+    families += _families(
+        "week2_llm_cache", llm_cache.stats(), (), source="Persistent LLM result cache"
+    )
+    families += _families(
+        "week2_llm_singleflight",
+        extract.llm_flight.stats(),
+        ("in_flight",),
+        source="LLM call coalescing",
+    )
+    families += _families(
+        "week2_llm_batcher", extract.llm_batcher.stats(), (), source="LLM micro-batcher"
+    )
+    tiered = tiered_stats.snapshot()
+    families += _families(
+        "week2_tiered",
+        {key: tiered[key] for key in ("requests", "heuristic_served", "escalated", "llm_failures")},
+        (),
+        source="Tiered extraction",
+    )
+    families.append(
+        (
+            "week2_tiered_estimated_seconds_saved",
+            "gauge",
+            "Model time the heuristic tier is estimated to have saved.",
+            [({}, tiered["estimated_seconds_saved"])],
+        )
+    )
+    return _merge(families)
+
+
+registry.register_collector(collect_component_stats)
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """Prometheus text exposition of request, DB, extraction and component metrics"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
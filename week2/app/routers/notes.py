@@ -1,38 +1,34 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response
 
-from ..exceptions import NoteNotFoundError, DatabaseOperationError
-from ..repositories import NoteRepository
+from ..exceptions import NoteNotFoundError, DatabaseOperationError, InvalidCursorError
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, split_page
+from ..repositories import AsyncNoteRepository
+from ..responses import ResponseEncoder, note_record, success_payload
 from ..schemas.note import Note, NoteCreate, NoteExtractRequest
-from ..schemas.response import APIResponse
-
+from ..schemas.response import NoteListResponse, NoteResponse
+from ..streaming import ndjson_response, wants_ndjson
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
+NOTE_JSON = ResponseEncoder(NoteResponse)
+NOTE_LIST_JSON = ResponseEncoder(NoteListResponse)
+
 
-@router.post("", response_model=APIResponse)
-def create_note(note_create: NoteCreate) -> APIResponse:
+@router.post("", response_model=NoteResponse)
+async def create_note(note_create: NoteCreate) -> Response:
     try:
         content = note_create.content.strip()
         if not content:
             raise HTTPException(status_code=400, detail="content is required")
-        
-        note_id = NoteRepository.create_note(content)
-        note_row = NoteRepository.get_note(note_id)
-        
-        if not note_row:
-            raise HTTPException(status_code=500, detail="Failed to retrieve created note")
-        
-        note = Note(
-            id=note_row["id"],
-            content=note_row["content"],
-            created_at=note_row["created_at"]
-        )
-        
-        return APIResponse(success=True, data=note)
+
+        note_row = await AsyncNoteRepository.create_note(content)
+
+        return NOTE_JSON.response(success_payload(note_record(note_row)))
     except HTTPException:
         raise
     except DatabaseOperationError as e:
@@ -41,20 +37,14 @@ def create_note(note_create: NoteCreate) -> APIResponse:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
-@router.get("/{note_id}", response_model=APIResponse)
-def get_single_note(note_id: int) -> APIResponse:
+@router.get("/{note_id}", response_model=NoteResponse)
+async def get_single_note(note_id: int) -> Response:
     try:
-        row = NoteRepository.get_note(note_id)
+        row = await AsyncNoteRepository.get_note(note_id)
         if row is None:
             raise NoteNotFoundError(note_id)
-        
-        note = Note(
-            id=row["id"],
-            content=row["content"],
-            created_at=row["created_at"]
-        )
-        
-        return APIResponse(success=True, data=note)
+
+        return NOTE_JSON.response(success_payload(note_record(row)))
     except NoteNotFoundError:
         raise HTTPException(status_code=404, detail="note not found")
     except DatabaseOperationError as e:
@@ -63,22 +53,38 @@ def get_single_note(note_id: int) -> APIResponse:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
-@router.get("", response_model=APIResponse)
-def list_all_notes() -> APIResponse:
-    """New endpoint to list all notes as per assignment requirements"""
+def _note_json(row) -> str:
+    return Note(
+        id=row["id"], content=row["content"], created_at=row["created_at"]
+    ).model_dump_json()
+
+
+@router.get("", response_model=NoteListResponse)
+async def list_all_notes(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    accept: Optional[str] = Header(default=None),
+) -> Response:
+    """List notes newest first, one keyset page at a time.
+
+    With ``?stream=1`` or ``Accept: application/x-ndjson`` every note from the
+    cursor onwards is streamed as NDJSON instead, ignoring ``limit``.
+    """
     try:
-        rows = NoteRepository.list_notes()
-        notes = [
-            Note(
-                id=row["id"],
-                content=row["content"],
-                created_at=row["created_at"]
-            )
-            for row in rows
-        ]
-        
-        return APIResponse(success=True, data=notes)
+        before_id = decode_cursor(cursor)
+        if wants_ndjson(accept, stream):
+            return ndjson_response(AsyncNoteRepository.iter_notes(before_id=before_id), _note_json)
+
+        rows, next_cursor = split_page(
+            await AsyncNoteRepository.list_notes(limit=limit + 1, before_id=before_id), limit
+        )
+        notes = [note_record(row) for row in rows]
+
+        return NOTE_LIST_JSON.response(success_payload(notes, next_cursor))
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
     except DatabaseOperationError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -30,4 +30,20 @@ class ActionItemMarkDoneRequest(BaseModel):
 
 class ActionItemExtractRequest(BaseModel):
     text: str = Field(..., min_length=1, description="Text to extract action items from")
-    save_note: bool = Field(default=False, description="Whether to save the note to database")
\ No newline at end of file
+    save_note: bool = Field(default=False, description="Whether to save the note to database")
+    bypass_cache: bool = Field(
+        default=False, description="Skip cached LLM results and call the model again"
+    )
+
+
+class ActionItemExtractBatchRequest(BaseModel):
+    texts: List[str] = Field(
+        ..., min_length=1, max_length=1000, description="Texts to extract action items from"
+    )
+    save_note: bool = Field(default=True, description="Whether to save each text as a note")
+    use_llm: bool = Field(
+        default=False, description="Extract with the LLM, packing texts into batched model calls"
+    )
+    bypass_cache: bool = Field(
+        default=False, description="Skip cached LLM results and call the model again"
+    )
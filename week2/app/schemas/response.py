@@ -1,19 +1,120 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Any, List, Optional
 
 from pydantic import BaseModel
+from typing_extensions import TypedDict
 
 
 class APIResponse(BaseModel):
     """Generic API response schema"""
+
     success: bool
     message: Optional[str] = None
     data: Optional[Any] = None
     error: Optional[dict] = None
+    next_cursor: Optional[str] = None
 
 
 class ActionItemExtractResponse(BaseModel):
     """Response schema for action item extraction"""
+
     note_id: Optional[int] = None
-    items: List[dict]  # Contains id and text of each action item
\ No newline at end of file
+    items: List[dict]  # Contains id and text of each action item
+
+
+class ActionItemTieredExtractResponse(ActionItemExtractResponse):
+    """Extraction response that records which tier produced the items"""
+
+    tier: str
+
+
+class ActionItemProgressiveExtractResponse(ActionItemExtractResponse):
+    """Final event of a progressive extraction: heuristic and LLM items merged"""
+
+    llm_failed: bool
+
+
+class ActionItemUploadExtractResponse(BaseModel):
+    """Outcome of an upload extraction; its items are listed with GET /action-items"""
+
+    note_id: Optional[int] = None
+    items_created: int
+    used_fallback: bool
+    # The extraction ran out of buffer: later duplicates may have been stored,
+    # or later fallback sentences dropped
+    truncated: bool = False
+
+
+class ActionItemExtractBatchResponse(BaseModel):
+    """Response schema for batch extraction, one result per input text in order"""
+
+    results: List[ActionItemExtractResponse]
+
+
+class JobResponse(BaseModel):
+    """Status of a background job; ``result`` is set once it has succeeded"""
+
+    id: int
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+    result: Optional[ActionItemExtractResponse] = None
+
+
+# Wire shapes of the hot list/read routes. These are TypedDicts rather than
+# models so rows can be serialized straight from dicts by a compiled
+# TypeAdapter (see app/responses.py) without building a model per row.
+
+
+class NoteRecord(TypedDict):
+    """A note as returned by the API; field order matches Note"""
+
+    content: str
+    id: int
+    created_at: datetime
+
+
+class ActionItemRecord(TypedDict):
+    """An action item as returned by the API; created_at is the stored timestamp"""
+
+    id: int
+    note_id: Optional[int]
+    text: str
+    done: bool
+    created_at: str
+
+
+class NoteResponse(TypedDict):
+    """APIResponse carrying one note"""
+
+    success: bool
+    message: Optional[str]
+    data: NoteRecord
+    error: Optional[dict]
+    next_cursor: Optional[str]
+
+
+class NoteListResponse(TypedDict):
+    """APIResponse carrying one page of notes"""
+
+    success: bool
+    message: Optional[str]
+    data: List[NoteRecord]
+    error: Optional[dict]
+    next_cursor: Optional[str]
+
+
+class ActionItemListResponse(TypedDict):
+    """APIResponse carrying one page of action items"""
+
+    success: bool
+    message: Optional[str]
+    data: List[ActionItemRecord]
+    error: Optional[dict]
+    next_cursor: Optional[str]
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, ContextManager, Deque, Dict, Generic, List, Optional, TypeVar
+
+from ..cancellation import Cancellation, SharedCancellation, cancellation_scope, wait_future
+from ..exceptions import ExtractionCancelledError
+from ..executors import get_llm_batch_executor
+from .chunking import estimate_tokens
+
+T = TypeVar("T")
+
+
+class _Pending(Generic[T]):
+    __slots__ = ("text", "tokens", "enqueued_at", "future", "cancellation")
+
+    def __init__(self, text: str, cancellation: Optional[Cancellation]) -> None:
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        self.enqueued_at = time.monotonic()
+        self.future: Future[T] = Future()
+        self.cancellation = cancellation
+
+
+class MicroBatcher(Generic[T]):
+    """Pack texts submitted close together into shared model calls.
+
+    A text submitted while the batcher is idle (nothing else queued, no model
+    call in flight) is dispatched at once, so a lone request never waits.
+    Otherwise a dispatcher thread waits ``window_seconds`` after the oldest
+    queued text (or until ``max_tokens`` / ``max_notes`` is reached), hands
+    the batch to ``run_batch`` on the batch executor and resolves each
+    caller's future with its own result. A batch of one goes to ``run_single``; when ``run_batch``
+    raises (e.g. the model's answer fails validation) every text in the batch
+    is retried with ``run_single``, each as its own task on the batch executor.
+
+    Texts submitted with a cancellation that fires while they are queued are
+    left out of their batch; the model call itself runs under a
+    ``SharedCancellation`` of its texts, so it can be abandoned once none of
+    them is wanted any more.
+    """
+
+    def __init__(
+        self,
+        run_single: Callable[[str], T],
+        run_batch: Callable[[List[str]], List[T]],
+        window_seconds: Callable[[], float],
+        max_tokens: Callable[[], int],
+        max_notes: Callable[[], int],
+    ) -> None:
+        self._run_single = run_single
+        self._run_batch = run_batch
+        # Limits are read per batch so configuration changes apply immediately
+        self._window_seconds = window_seconds
+        self._max_tokens = max_tokens
+        self._max_notes = max_notes
+        self._queue: Deque[_Pending[T]] = deque()
+        self._queued_tokens = 0
+        # Batches handed to the executor and not yet finished
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._stats: Dict[str, int] = {
+            "submitted": 0,
+            "batches": 0,
+            "batched_notes": 0,
+            "single_calls": 0,
+            "fallbacks": 0,
+            "dropped": 0,
+        }
+
+    def submit(self, text: str, cancellation: Optional[Cancellation] = None) -> Future[T]:
+        return self.submit_many([text], cancellation)[0]
+
+    def submit_many(
+        self, texts: List[str], cancellation: Optional[Cancellation] = None
+    ) -> List[Future[T]]:
+        """Queue ``texts`` together, so they go out in the same batch as far as the limits allow"""
+        pendings: List[_Pending[T]] = [_Pending(text, cancellation) for text in texts]
+        with self._cond:
+            for pending in pendings:
+                self._queue.append(pending)
+                self._queued_tokens += pending.tokens
+            self._stats["submitted"] += len(pendings)
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch, name="week2-llm-batcher", daemon=True
+                )
+                self._dispatcher.start()
+            self._cond.notify()
+        return [pending.future for pending in pendings]
+
+    def extract(self, text: str, cancellation: Optional[Cancellation] = None) -> T:
+        """Submit ``text`` and block until its batch is processed (or ``cancellation`` fires)"""
+        return wait_future(self.submit(text, cancellation), cancellation)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return dict(self._stats)
+
+    def _full(self) -> bool:
+        return len(self._queue) >= self._max_notes() or self._queued_tokens >= self._max_tokens()
+
+    def _take_batch(self) -> List[_Pending[T]]:
+        max_notes, max_tokens = self._max_notes(), self._max_tokens()
+        batch = [self._queue.popleft()]
+        tokens = batch[0].tokens
+        while (
+            self._queue and len(batch) < max_notes and tokens + self._queue[0].tokens <= max_tokens
+        ):
+            pending = self._queue.popleft()
+            batch.append(pending)
+            tokens += pending.tokens
+        self._queued_tokens -= tokens
+        return batch
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                # Only hold the batch open when there is other work to pack it with
+                alone = len(self._queue) == 1 and self._in_flight == 0
+                deadline = self._queue[0].enqueued_at + self._window_seconds()
+                while not alone and not self._full():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+            self._submit(batch)
+
+    def _submit(self, batch: List[_Pending[T]]) -> None:
+        with self._cond:
+            self._in_flight += 1
+        get_llm_batch_executor().submit(self._execute, batch)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._cond:
+            self._stats[name] += amount
+
+    @staticmethod
+    def _scope(pendings: List[_Pending[T]]) -> ContextManager[Optional[Cancellation]]:
+        # Cancellable only if every text in the call was submitted with a cancellation
+        if any(pending.cancellation is None for pending in pendings):
+            return cancellation_scope(None)
+        return cancellation_scope(SharedCancellation(pending.cancellation for pending in pendings))
+
+    def _execute_single(self, pending: _Pending[T]) -> None:
+        self._count("single_calls")
+        try:
+            with self._scope([pending]):
+                pending.future.set_result(self._run_single(pending.text))
+        except Exception as e:
+            pending.future.set_exception(e)
+
+    def _drop_cancelled(self, batch: List[_Pending[T]]) -> List[_Pending[T]]:
+        """Resolve texts nobody waits for any more, as long as others remain to be run"""
+        live: List[_Pending[T]] = []
+        dropped: List[_Pending[T]] = []
+        for pending in batch:
+            cancelled = pending.cancellation is not None and pending.cancellation.cancelled
+            (dropped if cancelled else live).append(pending)
+        if not live or not dropped:
+            # A batch with no live text still goes to the model call, which
+            # abandons it before sending and accounts for it
+            return batch
+        for pending in dropped:
+            pending.future.set_exception(ExtractionCancelledError(pending.cancellation.reason))  # type: ignore[union-attr, arg-type]
+        self._count("dropped", len(dropped))
+        return live
+
+    def _execute(self, batch: List[_Pending[T]]) -> None:
+        try:
+            self._execute_batch(batch)
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+
+    def _execute_batch(self, batch: List[_Pending[T]]) -> None:
+        batch = self._drop_cancelled(batch)
+        if len(batch) == 1:
+            self._execute_single(batch[0])
+            return
+        try:
+            with self._scope(batch):
+                results = self._run_batch([pending.text for pending in batch])
+        except ExtractionCancelledError as e:
+            for pending in batch:
+                pending.future.set_exception(e)
+            return
+        except Exception as e:
+            logging.warning(
+                f"Batched extraction of {len(batch)} notes failed, retrying one by one: {str(e)}"
+            )
+            self._count("fallbacks")
+            # In parallel, and without holding this worker while they run.
+            # Not on the LLM executor: its threads may be the callers waiting
+            # on these very futures.
+            for pending in batch:
+                self._submit([pending])
+            return
+        self._count("batches")
+        self._count("batched_notes", len(batch))
+        for pending, result in zip(batch, results):
+            pending.future.set_result(result)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import re
+from typing import Callable, Iterable, List
+
+# Rough token estimate for prompt budgeting; local models average ~4 chars/token
+CHARS_PER_TOKEN = 4
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _blocks(lines: List[str], is_block_start: Callable[[str], bool]) -> Iterable[List[str]]:
+    """Group lines into blocks that start at an action line or after a blank line.
+
+    Continuation lines (wrapped text, nested detail) stay with the item they
+    belong to, so a window boundary never cuts an item in half.
+    """
+    block: List[str] = []
+    previous_blank = False
+    for line in lines:
+        blank = not line.strip()
+        if block and not blank and (previous_blank or is_block_start(line)):
+            yield block
+            block = []
+        if not (blank and not block):
+            block.append(line)
+        previous_blank = blank
+    if block:
+        yield block
+
+
+def _split_oversized(line: str, max_chars: int) -> List[str]:
+    """Split a single line that exceeds the budget at sentences, then hard limits"""
+    pieces: List[str] = []
+    current = ""
+    for sentence in SENTENCE_BOUNDARY.split(line):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int, is_block_start: Callable[[str], bool]) -> List[str]:
+    """Split ``text`` into windows of at most ``max_tokens`` estimated tokens.
+
+    Windows break on line boundaries, preferring the start of a bullet or
+    other action line; only a single line longer than the budget is split
+    inside the line. Order is preserved so results can be merged in sequence.
+    """
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    windows: List[str] = []
+    current: List[str] = []
+    current_chars = 0
+
+    def flush() -> None:
+        nonlocal current, current_chars
+        if current:
+            windows.append("\n".join(current))
+        current = []
+        current_chars = 0
+
+    for block in _blocks(text.splitlines(), is_block_start):
+        block_chars = sum(len(line) + 1 for line in block)
+        if current and current_chars + block_chars > max_chars:
+            flush()
+        if block_chars <= max_chars:
+            current.extend(block)
+            current_chars += block_chars
+            continue
+        # Oversized block: fall back to packing its individual lines
+        for line in block:
+            parts = [line] if len(line) + 1 <= max_chars else _split_oversized(line, max_chars - 1)
+            for part in parts:
+                if current and current_chars + len(part) + 1 > max_chars:
+                    flush()
+                current.append(part)
+                current_chars += len(part) + 1
+    flush()
+    return windows
@@ -1,15 +1,26 @@
 from __future__ import annotations
 
-import os
-import re
-from typing import List
+import contextvars
 import json
 import logging
-from typing import Any
-from ollama import chat
+import re
+import time
+from typing import IO, Iterable, Iterator, List, NamedTuple, Optional, Union
+
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
+from ..cancellation import Cancellation, cancellation_scope, current_cancellation, wait_future
+from ..config import settings
+from ..exceptions import ExtractionCancelledError
+from ..executors import get_llm_chunk_executor
+from ..metrics import EXTRACTION_SECONDS, LLM_ABANDONED_CALLS, LLM_SECONDS_SAVED, time_call, timed
+from . import llm, llm_cache
+from .batching import MicroBatcher
+from .chunking import chunk_text, estimate_tokens
+from .llm_cache import cache_key
+from .singleflight import SingleFlight
+
 load_dotenv()
 
 BULLET_PREFIX_PATTERN = re.compile(r"^\s*([-*•]|\d+\.)\s+")
@@ -18,62 +29,8 @@ KEYWORD_PREFIXES = (
     "action:",
     "next:",
 )
-
-
-def _is_action_line(line: str) -> bool:
-    stripped = line.strip().lower()
-    if not stripped:
-        return False
-    if BULLET_PREFIX_PATTERN.match(stripped):
-        return True
-    if any(stripped.startswith(prefix) for prefix in KEYWORD_PREFIXES):
-        return True
-    if "[ ]" in stripped or "[todo]" in stripped:
-        return True
-    return False
-
-
-def extract_action_items(text: str) -> List[str]:
-    lines = text.splitlines()
-    extracted: List[str] = []
-    for raw_line in lines:
-        line = raw_line.strip()
-        if not line:
-            continue
-        if _is_action_line(line):
-            cleaned = BULLET_PREFIX_PATTERN.sub("", line)
-            cleaned = cleaned.strip()
-            # Trim common checkbox markers
-            cleaned = cleaned.removeprefix("[ ]").strip()
-            cleaned = cleaned.removeprefix("[todo]").strip()
-            extracted.append(cleaned)
-    # Fallback: if nothing matched, heuristically split into sentences and pick imperative-like ones
-    if not extracted:
-        sentences = re.split(r"(?<=[.!?])\s+", text.strip())
-        for sentence in sentences:
-            s = sentence.strip()
-            if not s:
-                continue
-            if _looks_imperative(s):
-                extracted.append(s)
-    # Deduplicate while preserving order
-    seen: set[str] = set()
-    unique: List[str] = []
-    for item in extracted:
-        lowered = item.lower()
-        if lowered in seen:
-            continue
-        seen.add(lowered)
-        unique.append(item)
-    return unique
-
-def _looks_imperative(sentence: str) -> bool:
-    words = re.findall(r"[A-Za-z']+", sentence)
-    if not words:
-        return False
-    first = words[0]
-    # Crude heuristic: treat these as imperative starters
-    imperative_starters = {
+IMPERATIVE_STARTERS = frozenset(
+    {
         "add",
         "create",
         "implement",
@@ -87,30 +44,287 @@ def _looks_imperative(sentence: str) -> bool:
         "design",
         "investigate",
     }
-    return first.lower() in imperative_starters
+)
+
+# One pass classifies a line and captures the cleaned item text: a bullet
+# prefix is dropped, a keyword prefix is kept, a checkbox marker may appear
+# anywhere on the line, and leading "[ ]" / "[todo]" markers (case-sensitive,
+# as before) are trimmed. Lines that match none of the branches are not items.
+# The only group is the item body, which still needs an rstrip().
+_ACTION_LINE_REGEX = (
+    r"[^\S\n]*(?:"
+    r"(?:[-*•]|\d+\.)[^\S\n]+(?=\S)"
+    # re.IGNORECASE would also let "İ" match "i", which lower() never did
+    r"|(?=(?:todo|act(?-i:[iI])on|next):)"
+    r"|(?=.*?\[(?: |todo)\])"
+    r")"
+    r"(?-i:\[ \][^\S\n]*)?(?-i:\[todo\][^\S\n]*)?"
+    r"(?P<body>.*)"
+)
+ACTION_LINE_PATTERN = re.compile(_ACTION_LINE_REGEX, re.IGNORECASE)
+# Sweeps a whole block of "\n"-separated lines with one findall(); the literal
+# "\n" lead lets the regex engine jump from line start to line start
+ACTION_LINES_PATTERN = re.compile(r"\n" + _ACTION_LINE_REGEX, re.IGNORECASE)
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+")
+FIRST_WORD_PATTERN = re.compile(r"[A-Za-z']+")
+# Characters other than "\n" that str.splitlines() also breaks on
+OTHER_LINE_BREAKS = "\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+READ_CHUNK_CHARS = 64 * 1024
+
+
+def _is_action_line(line: str) -> bool:
+    return ACTION_LINE_PATTERN.match(line) is not None
+
+
+def _has_other_line_breaks(text: str) -> bool:
+    # Substring checks are much faster than a regex character class here
+    return any(char in text for char in OTHER_LINE_BREAKS)
+
+
+def _looks_imperative(sentence: str) -> bool:
+    # Crude heuristic: sentences opening with one of IMPERATIVE_STARTERS
+    first = FIRST_WORD_PATTERN.search(sentence)
+    return first is not None and first.group().lower() in IMPERATIVE_STARTERS
+
+
+class ActionItemStreamParser:
+    """Incremental heuristic extractor fed with text chunks of any size.
+
+    ``feed`` returns the action items completed by that chunk and ``close``
+    returns whatever remains, including the imperative-sentence fallback when
+    no explicit action line was seen. Besides the current partial line, the
+    parser keeps the lowercased items already returned (to drop duplicates)
+    and, until the first action line, the imperative sentences collected for
+    the fallback plus the current partial sentence.
+
+    ``max_buffered_chars`` bounds the latter two: the dedup set past it stops
+    growing, so later repeats of unremembered items come out again, and the
+    fallback stops collecting sentences. Either sets ``truncated``. Without
+    it, results match ``extract_action_items`` exactly.
+    """
+
+    def __init__(self, max_buffered_chars: Optional[int] = None) -> None:
+        self.used_fallback = True
+        self.truncated = False
+        self._max_buffered_chars = max_buffered_chars
+        self._partial_line = ""
+        # Only filled once the fallback is ruled out, or by close()
+        self._seen: set[str] = set()
+        self._seen_chars = 0
+        # Imperative sentences collected in case the fallback is needed
+        self._fallback: List[str] = []
+        self._fallback_chars = 0
+        self._sentence_parts: List[str] = []
+        self._sentence_chars = 0
+        self._sentence_last_char = ""
+        # Whether the current sentence's first word is known; when it rules the
+        # sentence out, the rest of it is not kept, so a long run of lines
+        # without sentence punctuation does not pile up
+        self._sentence_started = False
+        self._sentence_skipped = False
+
+    def feed(self, chunk: str) -> List[str]:
+        if self._partial_line:
+            chunk = self._partial_line + chunk
+            self._partial_line = ""
+        if not self.used_fallback:
+            # Once the fallback is ruled out only action lines matter, so whole
+            # chunks can be swept at once as long as "\n" is the only break
+            if "\r" in chunk:
+                chunk = chunk.replace("\r\n", "\n")
+            if not _has_other_line_breaks(chunk):
+                return self._scan_lines(chunk)
+        lines = chunk.splitlines(keepends=True)
+        # A trailing "\r" is held back too: its "\n" may start the next chunk
+        if lines and (lines[-1][-1] == "\r" or lines[-1][-1] not in "\n" + OTHER_LINE_BREAKS):
+            self._partial_line = lines.pop()
+        return self._process_lines(lines)
+
+    def close(self) -> List[str]:
+        items = self._process_lines([self._partial_line] if self._partial_line else [])
+        self._partial_line = ""
+        if self.used_fallback:
+            self._end_sentence("".join(self._sentence_parts))
+            self._sentence_parts = []
+            items.extend(self._unique(self._fallback))
+            self._fallback = []
+            self._fallback_chars = self._sentence_chars = 0
+        return items
+
+    def _scan_lines(self, chunk: str) -> List[str]:
+        """Sweep every complete "\n"-terminated line of ``chunk`` with one findall()"""
+        end = chunk.rfind("\n") + 1
+        self._partial_line = chunk[end:]
+        bodies = ACTION_LINES_PATTERN.findall("\n" + chunk[:end])
+        return self._unique(body.rstrip() for body in bodies)
+
+    def _process_lines(self, lines: List[str]) -> List[str]:
+        items: List[str] = []
+        for line in lines:
+            match = ACTION_LINE_PATTERN.match(line)
+            if match is None:
+                if self.used_fallback:
+                    self._track_sentences(line)
+                continue
+            if self.used_fallback:
+                # An explicit action line makes the sentence fallback moot
+                self.used_fallback = False
+                self._fallback = []
+                self._sentence_parts = []
+                self._fallback_chars = self._sentence_chars = 0
+            cleaned = match.group("body").rstrip()
+            if self._first_time(cleaned):
+                items.append(cleaned)
+        return items
+
+    def _track_sentences(self, line: str) -> None:
+        # Only a one-character lookbehind spans the previous line, so split the
+        # new line plus that character instead of re-splitting the whole text
+        pieces = SENTENCE_SPLIT_PATTERN.split(self._sentence_last_char + line)
+        if len(pieces) == 1:
+            tail = line
+            if not self._sentence_skipped:
+                self._sentence_parts.append(line)
+                self._sentence_chars += len(line)
+                if not self._fits(self._fallback_chars + self._sentence_chars):
+                    # Too long to keep whole, so the sentence is dropped
+                    self._skip_sentence()
+        else:
+            first = pieces[0][len(self._sentence_last_char) :]
+            if not self._sentence_skipped:
+                self._end_sentence("".join(self._sentence_parts) + first)
+            for sentence in pieces[1:-1]:
+                self._end_sentence(sentence)
+            tail = pieces[-1]
+            self._sentence_parts = [tail]
+            self._sentence_chars = len(tail)
+            self._sentence_started = self._sentence_skipped = False
+        self._sentence_last_char = tail[-1:]
+        if not self._sentence_started:
+            self._start_sentence(tail)
+
+    def _start_sentence(self, text: str) -> None:
+        # Earlier parts of the sentence had no word at all, so its first word
+        # is the first one in ``text``, once something follows it
+        first = FIRST_WORD_PATTERN.search(text)
+        if first is None or first.end() == len(text):
+            return
+        self._sentence_started = True
+        if first.group().lower() not in IMPERATIVE_STARTERS:
+            self._sentence_skipped = True
+            self._sentence_parts = []
+            self._sentence_chars = 0
+
+    def _skip_sentence(self) -> None:
+        self.truncated = True
+        self._sentence_skipped = True
+        self._sentence_parts = []
+        self._sentence_chars = 0
+
+    def _end_sentence(self, sentence: str) -> None:
+        s = sentence.strip()
+        if s and _looks_imperative(s):
+            if not self._fits(self._fallback_chars + len(s)):
+                self.truncated = True
+                return
+            self._fallback.append(s)
+            self._fallback_chars += len(s)
+
+    def _fits(self, chars: int) -> bool:
+        return self._max_buffered_chars is None or chars <= self._max_buffered_chars
+
+    def _first_time(self, item: str) -> bool:
+        """Whether ``item`` was not returned before; remembers it while the budget allows"""
+        lowered = item.lower()
+        if lowered in self._seen:
+            return False
+        if self._fits(self._seen_chars + len(lowered)):
+            self._seen.add(lowered)
+            self._seen_chars += len(lowered)
+        else:
+            self.truncated = True
+        return True
+
+    def _unique(self, items: Iterable[str]) -> List[str]:
+        return [item for item in items if self._first_time(item)]
+
+
+def _read_chunks(stream: Union[str, IO[str], Iterable[str]]) -> Iterator[str]:
+    if isinstance(stream, str):
+        for start in range(0, len(stream), READ_CHUNK_CHARS):
+            yield stream[start : start + READ_CHUNK_CHARS]
+    elif hasattr(stream, "read"):
+        while chunk := stream.read(READ_CHUNK_CHARS):
+            yield chunk
+    else:
+        yield from stream
+
+
+def iter_action_items(stream: Union[str, IO[str], Iterable[str]]) -> Iterator[str]:
+    """Yield heuristic action items from a string, text file or iterable of chunks.
+
+    Results match ``extract_action_items`` on the concatenated text, but the
+    input is scanned once and never held in memory as a whole. Items from
+    explicit action lines are yielded as soon as their line is complete; the
+    imperative-sentence fallback can only be decided at the end of the input.
+    """
+    parser = ActionItemStreamParser()
+    for chunk in _read_chunks(stream):
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+class HeuristicExtraction(NamedTuple):
+    """Heuristic result plus how it was produced"""
+
+    items: List[str]
+    # True when items came from the imperative-sentence fallback rather than
+    # explicit bullet/keyword/checkbox lines (or nothing matched at all)
+    used_fallback: bool
+
+
+def extract_action_items_detailed(text: str) -> HeuristicExtraction:
+    parser = ActionItemStreamParser()
+    items: List[str] = []
+    for chunk in _read_chunks(text):
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+    return HeuristicExtraction(items, parser.used_fallback)
+
+
+@timed(EXTRACTION_SECONDS)
+def extract_action_items(text: str) -> List[str]:
+    return extract_action_items_detailed(text).items
 
 
 class ActionItemsResponse(BaseModel):
     """Pydantic model for LLM response structure"""
+
     action_items: List[str]
 
-def extract_action_items_llm(text: str) -> List[str]:
-    """
-    Extract action items from text using LLM, with identical signature and behavior
-    as the original extract_action_items function.
-    
-    Args:
-        text: Input text containing potential action items
-        
-    Returns:
-        List of cleaned action items, deduplicated while preserving order
-    """
-    try:
-        # Create a precise prompt reflecting the original function's exact behavior
-        prompt = f"""
-You are an expert in extracting action items from text. Extract all action items following these EXACT rules:
 
-1. Identify action items by:
+class NoteActionItemsResponse(BaseModel):
+    """One note's entry in a batched LLM response"""
+
+    number: int
+    action_items: List[str]
+
+
+class BatchActionItemsResponse(BaseModel):
+    """Pydantic model for the batched LLM response structure"""
+
+    notes: List[NoteActionItemsResponse]
+
+
+# Bump whenever the prompt below changes so cached results from the old
+# prompt are no longer served.
+PROMPT_VERSION = 1
+
+llm_flight: SingleFlight[List[str]] = SingleFlight()
+
+
+# Shared by the single-note and batched prompts
+_ITEM_RULES = """1. Identify action items by:
    - Bullet point prefixes (-, *, •, or numbered lists like "1.")
    - Keyword prefixes: "todo:", "action:", "next:"
    - Checkbox markers: "[ ]" or "[todo]"
@@ -122,7 +336,15 @@ You are an expert in extracting action items from text. Extract all action items
    - Remove checkbox markers ([ ] or [todo])
    - Do NOT remove keyword prefixes (todo:, action:, next:)
    - Trim extra whitespace
+"""
 
+
+def build_prompt(text: str) -> str:
+    # Create a precise prompt reflecting the original function's exact behavior
+    return f"""
+You are an expert in extracting action items from text. Extract all action items following these EXACT rules:
+
+{_ITEM_RULES}
 3. Final processing:
    - Deduplicate items (keep only first occurrence of each unique item)
    - Preserve the original order of first occurrences
@@ -133,30 +355,389 @@ Text to analyze:
 
 IMPORTANT: Return ONLY the JSON object with the "action_items" field, no explanations or additional text.
         """
-        
-        # Call Ollama with the structured prompt and JSON format
-        response = chat(
-            model='qwen3:4b',
-            messages=[{'role': 'user', 'content': prompt}],
-            format=ActionItemsResponse.model_json_schema(),
-            options={'temperature': 0.}
+
+
+def _build_batch_prompt(texts: List[str]) -> str:
+    notes = "\n\n".join(
+        f'<note number="{number}">\n{text}\n</note>' for number, text in enumerate(texts, start=1)
+    )
+    return f"""
+You are an expert in extracting action items from text. Below are {len(texts)} independent notes.
+Extract the action items of EACH note separately, following these EXACT rules:
+
+{_ITEM_RULES}
+3. Final processing, per note:
+   - Deduplicate items (keep only first occurrence of each unique item)
+   - Preserve the original order of first occurrences
+   - Never move an item from one note to another
+
+4. Return ONLY a JSON object with a "notes" field: a list with exactly one entry per note,
+   in note order, each with the note's "number" and its cleaned "action_items" list
+   (an empty list if the note has none).
+
+Notes to analyze:
+{notes}
+
+IMPORTANT: Return ONLY the JSON object with the "notes" field, no explanations or additional text.
+        """
+
+
+def _dedupe(items: List[str]) -> List[str]:
+    # Deduplicate while preserving order (exactly matching original function behavior)
+    seen = set()
+    unique_items = []
+    for item in items:
+        lowered = item.lower()
+        if lowered not in seen:
+            seen.add(lowered)
+            unique_items.append(item)
+    return unique_items
+
+
+def _record_abandoned(function: str, reason: str, stage: str, elapsed: float) -> None:
+    # Saved time is estimated from the average completed call of the same kind
+    count, total = EXTRACTION_SECONDS.snapshot(function, "ok")
+    LLM_ABANDONED_CALLS.inc(reason, stage)
+    if count:
+        LLM_SECONDS_SAVED.inc(reason, amount=max(0.0, total / count - elapsed))
+
+
+def _chat_content(function: str, prompt: str, response_model: type[BaseModel]) -> str:
+    """Send one prompt to the model and return its reply.
+
+    Under a cancellation scope the call is skipped, or aborted mid-reply, once
+    the cancellation fires.
+    """
+    cancellation = current_cancellation()
+    reason = cancellation.reason if cancellation is not None else None
+    if reason is not None:
+        _record_abandoned(function, reason, "queued", 0.0)
+        raise ExtractionCancelledError(reason)
+
+    started = time.perf_counter()
+    with time_call(EXTRACTION_SECONDS, function) as timer:
+        try:
+            response = llm.chat(
+                [{"role": "user", "content": prompt}],
+                format=response_model.model_json_schema(),
+                cancellation=cancellation,
+            )
+        except ExtractionCancelledError as e:
+            timer.cancel()
+            _record_abandoned(function, e.reason, "streaming", time.perf_counter() - started)
+            raise
+    return response["message"]["content"]
+
+
+def _call_llm(text: str) -> List[str]:
+    """Run one model extraction; raises on transport or parsing failures"""
+    # Call Ollama with the structured prompt and JSON format
+    content = _chat_content("_call_llm", build_prompt(text), ActionItemsResponse)
+
+    # Parse the response content into our model
+    result = ActionItemsResponse.model_validate_json(content)
+    return _dedupe(result.action_items)
+
+
+def call_llm(text: str) -> List[str]:
+    """One model extraction of ``text`` with no cache, batching or coalescing; raises on failures.
+
+    For tools that score the model itself, like ``benchmarks/eval_extract.py``.
+    """
+    return _call_llm(text)
+
+
+def _call_llm_batch(texts: List[str]) -> List[List[str]]:
+    """One model call for several notes; raises unless every note is answered exactly once"""
+    content = _chat_content("_call_llm_batch", _build_batch_prompt(texts), BatchActionItemsResponse)
+    result = BatchActionItemsResponse.model_validate_json(content)
+    numbers = [note.number for note in result.notes]
+    if sorted(numbers) != list(range(1, len(texts) + 1)):
+        raise ValueError(f"batched response covers notes {numbers}, expected 1..{len(texts)}")
+    by_number = {note.number: note.action_items for note in result.notes}
+    return [_dedupe(by_number[number]) for number in range(1, len(texts) + 1)]
+
+
+# Notes extracted concurrently (parallel requests, jobs, bulk imports) share
+# model calls instead of each re-processing the instruction preamble
+llm_batcher: MicroBatcher[List[str]] = MicroBatcher(
+    run_single=lambda text: _call_llm(text),
+    run_batch=lambda texts: _call_llm_batch(texts),
+    window_seconds=lambda: settings.llm_batch_window_ms / 1000,
+    max_tokens=lambda: settings.llm_batch_max_tokens,
+    max_notes=lambda: settings.llm_batch_max_notes,
+)
+
+
+def _model_extract(text: str, batchable: bool) -> List[str]:
+    if batchable and settings.llm_batch_enabled:
+        return llm_batcher.extract(text, current_cancellation())
+    return _call_llm(text)
+
+
+def _extract_llm_single(text: str, use_cache: bool, batchable: bool = True) -> List[str]:
+    """Cached, coalesced extraction of one prompt-sized text; raises on failure.
+
+    ``batchable=False`` calls the model directly instead of via the micro-batcher.
+    """
+    caching = settings.llm_cache_enabled
+    key = cache_key(text, settings.ollama_model, settings.ollama_temperature, PROMPT_VERSION)
+    if caching and use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+
+    def run() -> List[str]:
+        # A call that finished just before we joined may already have cached it
+        if caching and use_cache:
+            cached = llm_cache.get(key)
+            if cached is not None:
+                return cached
+        items = _model_extract(text, batchable)
+        if caching:
+            llm_cache.put(key, settings.ollama_model, items)
+        return items
+
+    # Identical requests already in flight share that model call
+    return list(llm_flight.do(key, run, current_cancellation()))
+
+
+def _extract_llm_chunked(chunks: List[str], use_cache: bool) -> List[str]:
+    """Map chunks over the model concurrently, then merge in chunk order"""
+    executor = get_llm_chunk_executor()
+    cancellation = current_cancellation()
+    # Each chunk runs in a copy of this context, so it sees our cancellation.
+    # Chunks skip the micro-batcher: packing them back into one prompt would
+    # undo the parallel map.
+    futures = [
+        executor.submit(
+            contextvars.copy_context().run, _extract_llm_single, chunk, use_cache, False
         )
-        
-        # Parse the response content into our model
-        result = ActionItemsResponse.model_validate_json(response['message']['content'])
-        
-        # Deduplicate while preserving order (exactly matching original function behavior)
-        seen = set()
-        unique_items = []
-        for item in result.action_items:
-            lowered = item.lower()
-            if lowered not in seen:
-                seen.add(lowered)
-                unique_items.append(item)
-                
-        return unique_items
-        
-    except Exception as e:
-        # Log the error but return empty list to match original function behavior
-        logging.error(f"LLM extraction failed: {str(e)}")
-        return []
\ No newline at end of file
+        for chunk in chunks
+    ]
+    merged: List[str] = []
+    try:
+        for future in futures:
+            merged.extend(wait_future(future, cancellation))
+    except ExtractionCancelledError:
+        # Chunks still queued are never started; running ones stop at their next check
+        for future in futures:
+            future.cancel()
+        raise
+    return _dedupe(merged)
+
+
+@timed(EXTRACTION_SECONDS)
+def extract_action_items_llm_strict(
+    text: str, use_cache: bool = True, cancellation: Optional[Cancellation] = None
+) -> List[str]:
+    """Like extract_action_items_llm, but raises instead of returning [] on failure"""
+    with cancellation_scope(cancellation):
+        if estimate_tokens(text) > settings.llm_chunk_tokens:
+            chunks = chunk_text(text, settings.llm_chunk_tokens, _is_action_line)
+            if len(chunks) > 1:
+                return _extract_llm_chunked(chunks, use_cache)
+        return _extract_llm_single(text, use_cache)
+
+
+def extract_action_items_llm(
+    text: str, use_cache: bool = True, cancellation: Optional[Cancellation] = None
+) -> List[str]:
+    """
+    Extract action items from text using LLM, with identical signature and behavior
+    as the original extract_action_items function.
+
+    Results are cached in the storage backend keyed on the normalized text, model, temperature
+    and prompt version, so re-submitted notes skip the model entirely, and
+    concurrent calls for the same key share a single in-flight model call.
+    Texts longer than ``settings.llm_chunk_tokens`` are split on line and bullet
+    boundaries and the windows are extracted concurrently.
+
+    Args:
+        text: Input text containing potential action items
+        use_cache: Look up cached results first; when False the model is always
+            called and its result refreshes the cache
+        cancellation: Abandons the model call, if nobody else waits for it,
+            once cancelled; ExtractionCancelledError is raised instead of
+            returning []
+
+    Returns:
+        List of cleaned action items, deduplicated while preserving order
+    """
+    with time_call(EXTRACTION_SECONDS, "extract_action_items_llm") as timer:
+        try:
+            return extract_action_items_llm_strict(text, use_cache, cancellation)
+        except ExtractionCancelledError:
+            timer.cancel()
+            raise
+        except Exception as e:
+            # Log the error but return empty list to match original function behavior
+            logging.error(f"LLM extraction failed: {str(e)}")
+            timer.fail()
+            return []
+
+
+@timed(EXTRACTION_SECONDS)
+def extract_action_items_llm_many(
+    texts: List[str], use_cache: bool = True, cancellation: Optional[Cancellation] = None
+) -> List[List[str]]:
+    """Extract many notes at once, e.g. for bulk imports.
+
+    Uncached notes are submitted to the micro-batcher together, so they are
+    packed into as few model calls as the token budget allows. Like
+    extract_action_items_llm, a note whose extraction fails yields [].
+    """
+    caching = settings.llm_cache_enabled
+    results: List[List[str]] = [[] for _ in texts]
+    waiting: dict[str, tuple[List[int], str]] = {}
+    for index, text in enumerate(texts):
+        if not settings.llm_batch_enabled or estimate_tokens(text) > settings.llm_chunk_tokens:
+            # Long notes take the chunked map-reduce path on their own
+            results[index] = extract_action_items_llm(text, use_cache, cancellation)
+            continue
+        key = cache_key(text, settings.ollama_model, settings.ollama_temperature, PROMPT_VERSION)
+        if key in waiting:
+            waiting[key][0].append(index)
+            continue
+        cached = llm_cache.get(key) if caching and use_cache else None
+        if cached is not None:
+            results[index] = cached
+            continue
+        waiting[key] = ([index], text)
+
+    futures = llm_batcher.submit_many([text for _, text in waiting.values()], cancellation)
+    for (key, (indexes, _)), future in zip(waiting.items(), futures):
+        try:
+            items = wait_future(future, cancellation)
+        except ExtractionCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"LLM extraction failed: {str(e)}")
+            continue
+        if caching:
+            llm_cache.put(key, settings.ollama_model, items)
+        for index in indexes:
+            results[index] = list(items)
+    return results
+
+
+# Start of the items array in a streamed ActionItemsResponse reply
+_STREAMED_ITEMS_START = re.compile(r'"action_items"\s*:\s*\[')
+# Characters kept while looking for the array's start. Enough for the key plus
+# any sane whitespace; a reply that spreads it wider only has its items
+# yielded by the final validation instead of incrementally.
+_STREAMED_ITEMS_LOOKBACK = 64
+
+
+class StreamedItemsParser:
+    """Pull each complete item out of a partial ``{"action_items": [...]}`` reply.
+
+    ``feed`` takes the reply as it streams in and returns the items whose
+    closing quote has arrived; an item cut off mid-string waits for the rest.
+    Only the unconsumed tail of the reply is kept, so feeding stays linear in
+    the reply's length.
+    """
+
+    def __init__(self) -> None:
+        # Until the array is found, the last few characters seen; then
+        # everything after the last complete element
+        self._buffer = ""
+        self._in_array = False
+        self._finished = False
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, chunk: str) -> List[str]:
+        items: List[str] = []
+        if self._finished:
+            return items
+        buffer = self._buffer + chunk
+        position = 0
+        if not self._in_array:
+            match = _STREAMED_ITEMS_START.search(buffer)
+            if match is None:
+                self._buffer = buffer[-_STREAMED_ITEMS_LOOKBACK:]
+                return items
+            self._in_array = True
+            position = match.end()
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                break
+            if buffer[position] != '"':
+                # "]" ends the array; anything else is left to the final validation
+                self._finished = True
+                break
+            try:
+                item, position = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            items.append(item)
+        self._buffer = "" if self._finished else buffer[position:]
+        return items
+
+
+def merge_action_items(*extractions: List[str]) -> List[str]:
+    """Items of several extractions in first-seen order, deduplicated like the extractors"""
+    return _dedupe([item for items in extractions for item in items])
+
+
+def stream_action_items_llm(
+    text: str, use_cache: bool = True, cancellation: Optional[Cancellation] = None
+) -> Iterator[str]:
+    """Yield LLM action items as the model produces them.
+
+    The reply is streamed from Ollama and each item is yielded once its JSON
+    string is complete. The whole reply is validated at the end, and any item
+    the incremental parse missed is yielded then; the deduplicated result is
+    cached like ``extract_action_items_llm``'s. A cached result is yielded at
+    once, and texts longer than ``settings.llm_chunk_tokens`` go through the
+    regular chunked extraction. Raises on model failures and, once
+    ``cancellation`` fires, with ExtractionCancelledError.
+    """
+    if estimate_tokens(text) > settings.llm_chunk_tokens:
+        yield from extract_action_items_llm_strict(text, use_cache, cancellation)
+        return
+    caching = settings.llm_cache_enabled
+    key = cache_key(text, settings.ollama_model, settings.ollama_temperature, PROMPT_VERSION)
+    if caching and use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            yield from cached
+            return
+
+    parser = StreamedItemsParser()
+    seen: set[str] = set()
+    parts: List[str] = []
+    started = time.perf_counter()
+    with time_call(EXTRACTION_SECONDS, "stream_action_items_llm") as timer:
+        try:
+            for chunk in llm.stream_chat(
+                [{"role": "user", "content": build_prompt(text)}],
+                cancellation,
+                format=ActionItemsResponse.model_json_schema(),
+            ):
+                content = chunk["message"]["content"] or ""
+                parts.append(content)
+                for item in parser.feed(content):
+                    if item.lower() not in seen:
+                        seen.add(item.lower())
+                        yield item
+        except ExtractionCancelledError as e:
+            timer.cancel()
+            _record_abandoned(
+                "stream_action_items_llm", e.reason, "streaming", time.perf_counter() - started
+            )
+            raise
+        except GeneratorExit:
+            # The consumer stopped early; leaving the loop closed the stream
+            timer.cancel()
+            raise
+        items = _dedupe(ActionItemsResponse.model_validate_json("".join(parts)).action_items)
+
+    if caching:
+        llm_cache.put(key, settings.ollama_model, items)
+    for item in items:
+        if item.lower() not in seen:
+            seen.add(item.lower())
+            yield item
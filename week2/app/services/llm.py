@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional
+
+import httpx
+from ollama import ChatResponse, Client, ResponseError
+
+from ..cancellation import Cancellation
+from ..config import settings
+
+_client: Optional[Client] = None
+_client_lock = threading.Lock()
+
+WARMUP_PROMPT = "Reply with OK."
+
+
+def _connection_limits() -> httpx.Limits:
+    # Every thread that may call the model at once keeps its connection open
+    # between calls instead of re-handshaking with the Ollama server
+    concurrent_callers = (
+        settings.llm_max_concurrency + settings.llm_chunk_concurrency + settings.job_workers
+    )
+    return httpx.Limits(
+        max_connections=None,
+        max_keepalive_connections=concurrent_callers,
+        keepalive_expiry=settings.ollama_http_keepalive_seconds,
+    )
+
+
+def get_client() -> Client:
+    """Return the process-wide Ollama client, creating it on first use"""
+    global _client
+    client = _client
+    if client is not None:
+        return client
+    with _client_lock:
+        if _client is None:
+            _client = Client(
+                host=settings.ollama_host,
+                timeout=settings.ollama_timeout_seconds,
+                limits=_connection_limits(),
+            )
+        return _client
+
+
+def close_client() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def model_options() -> Dict[str, Any]:
+    return {"temperature": settings.ollama_temperature}
+
+
+def _chat_request(messages: List[Mapping[str, Any]]) -> Dict[str, Any]:
+    return {
+        "model": settings.ollama_model,
+        "messages": messages,
+        "options": model_options(),
+        "keep_alive": settings.ollama_keep_alive,
+    }
+
+
+def stream_chat(
+    messages: List[Mapping[str, Any]], cancellation: Optional[Cancellation] = None, **kwargs: Any
+) -> Iterator[ChatResponse]:
+    """Stream the configured model's reply chunk by chunk.
+
+    With a ``cancellation`` the stream is abandoned between chunks, raising
+    ExtractionCancelledError. Closing the stream, including when the caller
+    stops iterating early, drops the connection, which makes Ollama stop
+    generating.
+    """
+    stream = get_client().chat(**_chat_request(messages), stream=True, **kwargs)
+    try:
+        for chunk in stream:
+            if cancellation is not None:
+                cancellation.raise_if_cancelled()
+            yield chunk
+    finally:
+        stream.close()
+
+
+def chat(
+    messages: List[Mapping[str, Any]], cancellation: Optional[Cancellation] = None, **kwargs: Any
+):
+    """Chat with the configured model, keeping it resident for ``ollama_keep_alive``.
+
+    With a ``cancellation`` the reply is streamed and assembled here, so the
+    call can be abandoned between chunks (see ``stream_chat``).
+    """
+    if cancellation is None:
+        return get_client().chat(**_chat_request(messages), **kwargs)
+
+    parts: List[str] = []
+    final = None
+    for final in stream_chat(messages, cancellation, **kwargs):
+        parts.append(final.message.content or "")
+    if final is None:
+        raise ResponseError("empty streamed response")
+    # The last chunk carries the timings and token counts of the whole reply
+    return final.model_copy(
+        update={"message": final.message.model_copy(update={"content": "".join(parts)})}
+    )
+
+
+class WarmupReport(NamedTuple):
+    model: str
+    # First call: includes loading the model into memory if it was not resident
+    cold_seconds: float
+    # Second call against the now-loaded model
+    warm_seconds: float
+    # Server-reported load time of the first call, when available
+    load_seconds: Optional[float]
+
+
+def _timed_warmup_call() -> tuple[float, Any]:
+    started = time.perf_counter()
+    response = get_client().chat(
+        model=settings.ollama_model,
+        messages=[{"role": "user", "content": WARMUP_PROMPT}],
+        options={**model_options(), "num_predict": 1},
+        keep_alive=settings.ollama_keep_alive,
+    )
+    return time.perf_counter() - started, response
+
+
+def warm_up() -> Optional[WarmupReport]:
+    """Load the model and measure cold versus warm latency; None if Ollama is unreachable"""
+    try:
+        cold_seconds, response = _timed_warmup_call()
+        warm_seconds, _ = _timed_warmup_call()
+    except Exception as e:
+        logging.warning(f"Ollama warm-up for model {settings.ollama_model} failed: {str(e)}")
+        return None
+    load_duration = getattr(response, "load_duration", None)
+    report = WarmupReport(
+        settings.ollama_model,
+        cold_seconds,
+        warm_seconds,
+        load_duration / 1e9 if load_duration else None,
+    )
+    logging.info(
+        "Ollama model %s warmed up: cold %.3fs (load %s), warm %.3fs, kept alive for %s",
+        report.model,
+        report.cold_seconds,
+        f"{report.load_seconds:.3f}s" if report.load_seconds is not None else "n/a",
+        report.warm_seconds,
+        settings.ollama_keep_alive,
+    )
+    return report
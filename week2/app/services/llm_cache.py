@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from ..config import settings
+from ..storage import get_backend
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: stripped, non-blank lines only.
+
+    Indentation, trailing whitespace, blank lines and newline style do not
+    change what the model extracts, so re-submissions that differ only in
+    those still hit the cache.
+    """
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def cache_key(text: str, model: str, temperature: float, prompt_version: int) -> str:
+    digest = hashlib.sha256()
+    for part in (model, repr(float(temperature)), str(prompt_version), normalize_text(text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get(key: str) -> Optional[List[str]]:
+    """Cached items for ``key``, or None on a miss (or if the cache is unavailable)"""
+    try:
+        items_json = get_backend().get_llm_cache_entry(key, time.time())
+    except Exception as e:
+        logging.warning(f"LLM cache lookup failed: {str(e)}")
+        _count("errors")
+        return None
+    if items_json is None:
+        _count("misses")
+        return None
+    _count("hits")
+    return json.loads(items_json)
+
+
+def put(key: str, model: str, items: List[str]) -> None:
+    try:
+        evicted = get_backend().put_llm_cache_entry(
+            key,
+            model,
+            json.dumps(items, ensure_ascii=False),
+            time.time(),
+            settings.llm_cache_max_entries,
+        )
+    except Exception as e:
+        logging.warning(f"LLM cache store failed: {str(e)}")
+        _count("errors")
+        return
+    _count("stores")
+    if evicted:
+        _count("evictions", evicted)
+
+
+def stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+from ..cancellation import (
+    POLL_INTERVAL_SECONDS,
+    Cancellation,
+    SharedCancellation,
+    cancellation_scope,
+)
+from ..exceptions import ExtractionCancelledError
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    __slots__ = ("done", "result", "error", "waiters", "cancellation")
+
+    def __init__(self, cancellation: Optional[Cancellation]) -> None:
+        self.done = threading.Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+        self.cancellation = SharedCancellation([cancellation])
+
+
+class SingleFlight(Generic[T]):
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs ``fn``; callers arriving while it is in
+    flight block until it finishes and receive the same result (or exception).
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call[T]] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(
+        self, key: Hashable, fn: Callable[[], T], cancellation: Optional[Cancellation] = None
+    ) -> T:
+        """Run ``fn`` for ``key``, or wait for the call already in flight.
+
+        With a ``cancellation`` the caller stops waiting once it is cancelled;
+        the shared call itself runs under a ``SharedCancellation`` scope that
+        is cancelled only when every caller of it is, so ``fn`` can abandon
+        work nobody is waiting for.
+        """
+        with self._lock:
+            self.calls += 1
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is not None and not call.cancellation.cancelled:
+                    call.waiters += 1
+                    call.cancellation.join(cancellation)
+                    self.coalesced += 1
+                    leader = False
+                else:
+                    # An abandoned call still winding down is not joined
+                    call = _Call(cancellation)
+                    self._calls[key] = call
+                    self.executions += 1
+                    leader = True
+
+            if leader:
+                return self._lead(key, call, fn, cancellation is not None)
+
+            if cancellation is None:
+                call.done.wait()
+            else:
+                while not call.done.wait(POLL_INTERVAL_SECONDS):
+                    cancellation.raise_if_cancelled()
+            if isinstance(call.error, ExtractionCancelledError) and not (
+                cancellation and cancellation.cancelled
+            ):
+                # Everyone else gave up just before we joined; run it ourselves
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore[return-value]
+
+    def _lead(self, key: Hashable, call: _Call[T], fn: Callable[[], T], cancellable: bool) -> T:
+        try:
+            with cancellation_scope(call.cancellation if cancellable else None):
+                call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
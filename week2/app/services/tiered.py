@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from starlette.concurrency import run_in_threadpool
+
+from ..cancellation import Cancellation, await_cancellable
+from ..exceptions import ExtractionCancelledError
+from ..executors import run_llm
+from .extract import (
+    HeuristicExtraction,
+    extract_action_items_detailed,
+    extract_action_items_llm_strict,
+)
+
+TIER_HEURISTIC = "heuristic"
+TIER_LLM = "llm"
+# The model was needed but failed; the low-confidence heuristic result is returned
+TIER_HEURISTIC_FALLBACK = "heuristic_fallback"
+
+
+class TieredExtraction(NamedTuple):
+    items: List[str]
+    tier: str
+
+
+class TieredStats:
+    """Counters for how often the heuristics were enough and what that saved"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.heuristic_served = 0
+            self.escalated = 0
+            self.llm_failures = 0
+            self.heuristic_seconds = 0.0
+            self.llm_seconds = 0.0
+
+    def record(self, tier: str, heuristic_seconds: float, llm_seconds: float = 0.0) -> None:
+        with self._lock:
+            self.requests += 1
+            self.heuristic_seconds += heuristic_seconds
+            if tier == TIER_HEURISTIC:
+                self.heuristic_served += 1
+                return
+            self.escalated += 1
+            self.llm_seconds += llm_seconds
+            if tier == TIER_HEURISTIC_FALLBACK:
+                self.llm_failures += 1
+
+    def snapshot(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            average_llm = self.llm_seconds / self.escalated if self.escalated else 0.0
+            average_heuristic = self.heuristic_seconds / self.requests if self.requests else 0.0
+            return {
+                "requests": self.requests,
+                "heuristic_served": self.heuristic_served,
+                "escalated": self.escalated,
+                "llm_failures": self.llm_failures,
+                "heuristic_fraction": (
+                    self.heuristic_served / self.requests if self.requests else 0.0
+                ),
+                "average_llm_seconds": average_llm,
+                "average_heuristic_seconds": average_heuristic,
+                # Each request answered by the heuristics would otherwise have
+                # waited for a model call of the average observed duration
+                "estimated_seconds_saved": self.heuristic_served
+                * max(0.0, average_llm - average_heuristic),
+            }
+
+
+tiered_stats = TieredStats()
+
+
+def _run_heuristics(text: str) -> Tuple[HeuristicExtraction, float]:
+    started = time.perf_counter()
+    heuristic = extract_action_items_detailed(text)
+    return heuristic, time.perf_counter() - started
+
+
+def is_confident(heuristic: HeuristicExtraction) -> bool:
+    # Explicit action lines (bullets, keyword prefixes, checkboxes) are trusted;
+    # zero matches or the imperative-sentence fallback are not
+    return bool(heuristic.items) and not heuristic.used_fallback
+
+
+def _served_by_heuristics(
+    heuristic: HeuristicExtraction, heuristic_seconds: float
+) -> TieredExtraction:
+    tiered_stats.record(TIER_HEURISTIC, heuristic_seconds)
+    return TieredExtraction(heuristic.items, TIER_HEURISTIC)
+
+
+def _escalation_failed(heuristic: HeuristicExtraction, error: Exception) -> TieredExtraction:
+    logging.error(f"LLM escalation failed, using heuristic result: {str(error)}")
+    return TieredExtraction(heuristic.items, TIER_HEURISTIC_FALLBACK)
+
+
+async def extract_action_items_tiered_async(
+    text: str, use_cache: bool = True, cancellation: Optional[Cancellation] = None
+) -> TieredExtraction:
+    """Heuristics first; escalate to the LLM only when they are not confident.
+
+    The heuristics run on the threadpool and escalations on the LLM executor.
+
+    A cancelled escalation raises ExtractionCancelledError rather than falling
+    back to the heuristic result, since nobody is waiting for either.
+    """
+    heuristic, heuristic_seconds = await run_in_threadpool(_run_heuristics, text)
+    if is_confident(heuristic):
+        return _served_by_heuristics(heuristic, heuristic_seconds)
+
+    started = time.perf_counter()
+    try:
+        items = await await_cancellable(
+            run_llm(
+                extract_action_items_llm_strict,
+                text,
+                use_cache=use_cache,
+                cancellation=cancellation,
+            ),
+            cancellation,
+        )
+        result = TieredExtraction(items, TIER_LLM)
+    except ExtractionCancelledError:
+        raise
+    except Exception as e:
+        result = _escalation_failed(heuristic, e)
+    tiered_stats.record(result.tier, heuristic_seconds, time.perf_counter() - started)
+    return result
@@ -0,0 +1,498 @@
+from __future__ import annotations
+
+import heapq
+import json
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Protocol, Tuple
+
+from . import db
+from .config import settings
+
+Row = Mapping[str, Any]
+ExtractionResult = Tuple[Optional[int], List[int]]
+
+
+class StorageBackend(Protocol):
+    """Where notes, action items, jobs, the LLM result cache and idempotency keys are kept.
+
+    Rows are read-only mappings with the columns of the SQLite tables
+    (``id, content, created_at`` for notes; ``id, note_id, text, done,
+    created_at`` for action items; ``db.JOB_COLUMNS`` and
+    ``db.IDEMPOTENCY_COLUMNS`` for jobs and idempotency keys). Listings are
+    newest first with keyset pagination: ``before_id`` excludes ids at or
+    above it, ``limit`` None means no limit. The job, cache and idempotency
+    methods behave like the ``db`` functions of the same name.
+    """
+
+    name: str
+
+    def insert_note(self, content: str) -> Row: ...
+
+    def get_note(self, note_id: int) -> Optional[Row]: ...
+
+    def list_notes(
+        self, limit: Optional[int] = None, before_id: Optional[int] = None
+    ) -> List[Row]: ...
+
+    def iter_notes(self, before_id: Optional[int] = None) -> Iterator[Row]: ...
+
+    def insert_action_items(self, items: List[str], note_id: Optional[int] = None) -> List[int]: ...
+
+    def insert_extraction_batch(
+        self, entries: List[Tuple[str, List[str]]], save_notes: bool = True
+    ) -> List[ExtractionResult]: ...
+
+    def get_action_item(self, action_item_id: int) -> Optional[Row]: ...
+
+    def list_action_items(
+        self,
+        note_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+    ) -> List[Row]: ...
+
+    def iter_action_items(
+        self, note_id: Optional[int] = None, before_id: Optional[int] = None
+    ) -> Iterator[Row]: ...
+
+    def mark_action_item_done(self, action_item_id: int, done: bool) -> Optional[Row]: ...
+
+    def get_llm_cache_entry(self, key: str, used_at: float) -> Optional[str]: ...
+
+    def put_llm_cache_entry(
+        self, key: str, model: str, items_json: str, used_at: float, max_entries: int
+    ) -> int: ...
+
+    def insert_job(self, kind: str, payload: str, max_attempts: int, run_after: float) -> Row: ...
+
+    def get_job(self, job_id: int) -> Optional[Row]: ...
+
+    def claim_job(self, now: float) -> Optional[Row]: ...
+
+    def complete_extraction_job(
+        self, job_id: int, text: str, items: List[str], save_note: bool
+    ) -> ExtractionResult:
+        """Store a job's extraction and mark the job succeeded, atomically"""
+        ...
+
+    def reschedule_job(self, job_id: int, error: str, run_after: float) -> None: ...
+
+    def fail_job(self, job_id: int, error: str) -> None: ...
+
+    def requeue_running_jobs(self) -> int: ...
+
+    def claim_idempotency_key(
+        self, scope: str, key: str, request_hash: str, now: float, lock_seconds: float
+    ) -> Tuple[bool, Optional[Row]]: ...
+
+    def complete_idempotency_key(
+        self, scope: str, key: str, status_code: int, response: str, expires_at: float
+    ) -> None: ...
+
+    def release_idempotency_key(self, scope: str, key: str) -> None: ...
+
+    def purge_idempotency_keys(self, now: float) -> int: ...
+
+
+class SQLiteBackend:
+    """The SQLite database at ``db.DB_PATH``, through the pooled ``db`` functions"""
+
+    name = "sqlite"
+
+    def insert_note(self, content: str) -> Row:
+        return db.insert_note(content)
+
+    def get_note(self, note_id: int) -> Optional[Row]:
+        return db.get_note(note_id)
+
+    def list_notes(self, limit: Optional[int] = None, before_id: Optional[int] = None) -> List[Row]:
+        return db.list_notes(limit=limit, before_id=before_id)
+
+    def iter_notes(self, before_id: Optional[int] = None) -> Iterator[Row]:
+        return db.iter_notes(before_id=before_id)
+
+    def insert_action_items(self, items: List[str], note_id: Optional[int] = None) -> List[int]:
+        return db.insert_action_items(items, note_id)
+
+    def insert_extraction_batch(
+        self, entries: List[Tuple[str, List[str]]], save_notes: bool = True
+    ) -> List[ExtractionResult]:
+        return db.insert_extraction_batch(entries, save_notes=save_notes)
+
+    def get_action_item(self, action_item_id: int) -> Optional[Row]:
+        return db.get_action_item(action_item_id)
+
+    def list_action_items(
+        self,
+        note_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+    ) -> List[Row]:
+        return db.list_action_items(note_id, limit=limit, before_id=before_id)
+
+    def iter_action_items(
+        self, note_id: Optional[int] = None, before_id: Optional[int] = None
+    ) -> Iterator[Row]:
+        return db.iter_action_items(note_id, before_id=before_id)
+
+    def mark_action_item_done(self, action_item_id: int, done: bool) -> Optional[Row]:
+        return db.mark_action_item_done(action_item_id, done)
+
+    def get_llm_cache_entry(self, key: str, used_at: float) -> Optional[str]:
+        return db.get_llm_cache_entry(key, used_at)
+
+    def put_llm_cache_entry(
+        self, key: str, model: str, items_json: str, used_at: float, max_entries: int
+    ) -> int:
+        return db.put_llm_cache_entry(key, model, items_json, used_at, max_entries)
+
+    def insert_job(self, kind: str, payload: str, max_attempts: int, run_after: float) -> Row:
+        return db.insert_job(kind, payload, max_attempts, run_after)
+
+    def get_job(self, job_id: int) -> Optional[Row]:
+        return db.get_job(job_id)
+
+    def claim_job(self, now: float) -> Optional[Row]:
+        return db.claim_job(now)
+
+    def complete_extraction_job(
+        self, job_id: int, text: str, items: List[str], save_note: bool
+    ) -> ExtractionResult:
+        # One transaction, so a retried job can never store the note twice
+        return db.complete_extraction_job(job_id, text, items, save_note)
+
+    def reschedule_job(self, job_id: int, error: str, run_after: float) -> None:
+        db.reschedule_job(job_id, error, run_after)
+
+    def fail_job(self, job_id: int, error: str) -> None:
+        db.fail_job(job_id, error)
+
+    def requeue_running_jobs(self) -> int:
+        return db.requeue_running_jobs()
+
+    def claim_idempotency_key(
+        self, scope: str, key: str, request_hash: str, now: float, lock_seconds: float
+    ) -> Tuple[bool, Optional[Row]]:
+        return db.claim_idempotency_key(scope, key, request_hash, now, lock_seconds)
+
+    def complete_idempotency_key(
+        self, scope: str, key: str, status_code: int, response: str, expires_at: float
+    ) -> None:
+        db.complete_idempotency_key(scope, key, status_code, response, expires_at)
+
+    def release_idempotency_key(self, scope: str, key: str) -> None:
+        db.release_idempotency_key(scope, key)
+
+    def purge_idempotency_keys(self, now: float) -> int:
+        return db.purge_idempotency_keys(now)
+
+
+def _timestamp() -> str:
+    # Same format as SQLite's datetime('now') column defaults
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _page(ids: List[int], limit: Optional[int], before_id: Optional[int]) -> List[int]:
+    """Ids below ``before_id``, newest first, at most ``limit`` of them; ``ids`` is ascending"""
+    end = len(ids) if before_id is None else bisect_left(ids, before_id)
+    start = 0 if limit is None else max(0, end - limit)
+    return ids[start:end][::-1]
+
+
+class MemoryBackend:
+    """Everything in process memory, for previews and tests; nothing touches the disk.
+
+    Rows are dicts keyed by id; ids are handed out in increasing order, so the
+    id lists (all notes, all items, items per note) stay sorted by appending
+    and every keyset page is a bisect plus a slice. Pending jobs sit in a heap
+    by ``(run_after, id)``, and the LLM cache is an LRU-ordered dict. One lock
+    serializes writes, which makes each call atomic like its SQLite
+    transaction.
+    """
+
+    name = "memory"
+
+    # Rows copied per lock acquisition when iterating a whole listing
+    STREAM_BATCH_SIZE = db.STREAM_BATCH_SIZE
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._notes: Dict[int, Dict[str, Any]] = {}
+        self._note_ids: List[int] = []
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._item_ids: List[int] = []
+        self._item_ids_by_note: Dict[int, List[int]] = {}
+        self._last_note_id = 0
+        self._last_item_id = 0
+        self._jobs: Dict[int, Dict[str, Any]] = {}
+        # (run_after, id) of pending jobs; entries left behind when a job
+        # changes state are skipped when they come up
+        self._pending_jobs: List[Tuple[float, int]] = []
+        self._last_job_id = 0
+        self._llm_cache: OrderedDict[str, str] = OrderedDict()
+        self._idempotency_keys: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def _add_note(self, content: str, created_at: str) -> int:
+        self._last_note_id += 1
+        note_id = self._last_note_id
+        self._notes[note_id] = {"id": note_id, "content": content, "created_at": created_at}
+        self._note_ids.append(note_id)
+        return note_id
+
+    def _add_items(self, items: List[str], note_id: Optional[int], created_at: str) -> List[int]:
+        ids: List[int] = []
+        for text in items:
+            self._last_item_id += 1
+            item_id = self._last_item_id
+            self._items[item_id] = {
+                "id": item_id,
+                "note_id": note_id,
+                "text": text,
+                "done": 0,
+                "created_at": created_at,
+            }
+            self._item_ids.append(item_id)
+            if note_id is not None:
+                self._item_ids_by_note.setdefault(note_id, []).append(item_id)
+            ids.append(item_id)
+        return ids
+
+    def insert_note(self, content: str) -> Row:
+        with self._lock:
+            note_id = self._add_note(content, _timestamp())
+            return dict(self._notes[note_id])
+
+    def get_note(self, note_id: int) -> Optional[Row]:
+        with self._lock:
+            row = self._notes.get(note_id)
+            return None if row is None else dict(row)
+
+    def list_notes(self, limit: Optional[int] = None, before_id: Optional[int] = None) -> List[Row]:
+        with self._lock:
+            return [dict(self._notes[i]) for i in _page(self._note_ids, limit, before_id)]
+
+    def iter_notes(self, before_id: Optional[int] = None) -> Iterator[Row]:
+        while True:
+            batch = self.list_notes(limit=self.STREAM_BATCH_SIZE, before_id=before_id)
+            if not batch:
+                return
+            yield from batch
+            before_id = batch[-1]["id"]
+
+    def insert_action_items(self, items: List[str], note_id: Optional[int] = None) -> List[int]:
+        with self._lock:
+            return self._add_items(items, note_id, _timestamp())
+
+    def insert_extraction_batch(
+        self, entries: List[Tuple[str, List[str]]], save_notes: bool = True
+    ) -> List[ExtractionResult]:
+        with self._lock:
+            created_at = _timestamp()
+            # Notes first, then items, so ids come out in the same order as the
+            # multi-row inserts of the SQLite backend
+            note_ids = [
+                self._add_note(content, created_at) if save_notes else None
+                for content, _ in entries
+            ]
+            return [
+                (note_id, self._add_items(items, note_id, created_at))
+                for note_id, (_, items) in zip(note_ids, entries)
+            ]
+
+    def get_action_item(self, action_item_id: int) -> Optional[Row]:
+        with self._lock:
+            row = self._items.get(action_item_id)
+            return None if row is None else dict(row)
+
+    def list_action_items(
+        self,
+        note_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+    ) -> List[Row]:
+        with self._lock:
+            ids = self._item_ids if note_id is None else self._item_ids_by_note.get(note_id, [])
+            return [dict(self._items[i]) for i in _page(ids, limit, before_id)]
+
+    def iter_action_items(
+        self, note_id: Optional[int] = None, before_id: Optional[int] = None
+    ) -> Iterator[Row]:
+        while True:
+            batch = self.list_action_items(
+                note_id, limit=self.STREAM_BATCH_SIZE, before_id=before_id
+            )
+            if not batch:
+                return
+            yield from batch
+            before_id = batch[-1]["id"]
+
+    def mark_action_item_done(self, action_item_id: int, done: bool) -> Optional[Row]:
+        with self._lock:
+            row = self._items.get(action_item_id)
+            if row is None:
+                return None
+            row["done"] = 1 if done else 0
+            return dict(row)
+
+    def get_llm_cache_entry(self, key: str, used_at: float) -> Optional[str]:
+        with self._lock:
+            items_json = self._llm_cache.get(key)
+            if items_json is not None:
+                self._llm_cache.move_to_end(key)
+            return items_json
+
+    def put_llm_cache_entry(
+        self, key: str, model: str, items_json: str, used_at: float, max_entries: int
+    ) -> int:
+        with self._lock:
+            self._llm_cache[key] = items_json
+            self._llm_cache.move_to_end(key)
+            evicted = 0
+            while len(self._llm_cache) > max_entries:
+                self._llm_cache.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def _queue_job(self, job: Dict[str, Any]) -> None:
+        heapq.heappush(self._pending_jobs, (job["run_after"], job["id"]))
+
+    def insert_job(self, kind: str, payload: str, max_attempts: int, run_after: float) -> Row:
+        with self._lock:
+            self._last_job_id += 1
+            created_at = _timestamp()
+            job = {
+                "id": self._last_job_id,
+                "kind": kind,
+                "payload": payload,
+                "status": "pending",
+                "attempts": 0,
+                "max_attempts": max_attempts,
+                "run_after": run_after,
+                "result": None,
+                "error": None,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+            self._jobs[job["id"]] = job
+            self._queue_job(job)
+            return dict(job)
+
+    def get_job(self, job_id: int) -> Optional[Row]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else dict(job)
+
+    def claim_job(self, now: float) -> Optional[Row]:
+        with self._lock:
+            while self._pending_jobs and self._pending_jobs[0][0] <= now:
+                run_after, job_id = heapq.heappop(self._pending_jobs)
+                job = self._jobs[job_id]
+                if job["status"] != "pending" or job["run_after"] != run_after:
+                    continue
+                job.update(status="running", attempts=job["attempts"] + 1, updated_at=_timestamp())
+                return dict(job)
+            return None
+
+    def complete_extraction_job(
+        self, job_id: int, text: str, items: List[str], save_note: bool
+    ) -> ExtractionResult:
+        with self._lock:
+            created_at = _timestamp()
+            note_id = self._add_note(text, created_at) if save_note else None
+            ids = self._add_items(items, note_id, created_at)
+            result = json.dumps(db.extraction_job_result(note_id, ids, items), ensure_ascii=False)
+            self._jobs[job_id].update(
+                status="succeeded", result=result, error=None, updated_at=created_at
+            )
+            return note_id, ids
+
+    def reschedule_job(self, job_id: int, error: str, run_after: float) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(status="pending", error=error, run_after=run_after, updated_at=_timestamp())
+            self._queue_job(job)
+
+    def fail_job(self, job_id: int, error: str) -> None:
+        with self._lock:
+            self._jobs[job_id].update(status="failed", error=error, updated_at=_timestamp())
+
+    def requeue_running_jobs(self) -> int:
+        with self._lock:
+            running = [job for job in self._jobs.values() if job["status"] == "running"]
+            for job in running:
+                job.update(status="pending", updated_at=_timestamp())
+                self._queue_job(job)
+            return len(running)
+
+    def claim_idempotency_key(
+        self, scope: str, key: str, request_hash: str, now: float, lock_seconds: float
+    ) -> Tuple[bool, Optional[Row]]:
+        with self._lock:
+            row = self._idempotency_keys.get((scope, key))
+            if row is not None and row["expires_at"] > now:
+                return False, dict(row)
+            self._idempotency_keys[(scope, key)] = {
+                "scope": scope,
+                "key": key,
+                "request_hash": request_hash,
+                "status": "in_progress",
+                "status_code": None,
+                "response": None,
+                "created_at": now,
+                "expires_at": now + lock_seconds,
+            }
+            return True, None
+
+    def complete_idempotency_key(
+        self, scope: str, key: str, status_code: int, response: str, expires_at: float
+    ) -> None:
+        with self._lock:
+            row = self._idempotency_keys.get((scope, key))
+            if row is not None:
+                row.update(
+                    status="completed",
+                    status_code=status_code,
+                    response=response,
+                    expires_at=expires_at,
+                )
+
+    def release_idempotency_key(self, scope: str, key: str) -> None:
+        with self._lock:
+            row = self._idempotency_keys.get((scope, key))
+            if row is not None and row["status"] == "in_progress":
+                del self._idempotency_keys[(scope, key)]
+
+    def purge_idempotency_keys(self, now: float) -> int:
+        with self._lock:
+            expired = [k for k, row in self._idempotency_keys.items() if row["expires_at"] <= now]
+            for k in expired:
+                del self._idempotency_keys[k]
+            return len(expired)
+
+
+BACKENDS = {"sqlite": SQLiteBackend, "memory": MemoryBackend}
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> StorageBackend:
+    """Return the process-wide backend chosen by ``settings.storage_backend``"""
+    global _backend
+    backend = _backend
+    if backend is not None and backend.name == settings.storage_backend:
+        return backend
+    with _backend_lock:
+        if _backend is None or _backend.name != settings.storage_backend:
+            _backend = BACKENDS[settings.storage_backend]()
+        return _backend
+
+
+def reset_backend() -> None:
+    """Drop the current backend; the memory backend's data goes with it"""
+    global _backend
+    with _backend_lock:
+        _backend = None
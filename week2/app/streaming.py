@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Callable, List, Optional, TypeVar
+
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+T = TypeVar("T")
+
+
+def wants_ndjson(accept: Optional[str], stream: bool) -> bool:
+    """True when the client asked for NDJSON via ``?stream=1`` or the Accept header"""
+    return stream or (accept is not None and NDJSON_MEDIA_TYPE in accept)
+
+
+def _encode_page(rows: List[T], encode: Callable[[T], str]) -> bytes:
+    return ("\n".join(encode(row) for row in rows) + "\n").encode("utf-8")
+
+
+async def _encode_pages(
+    pages: AsyncIterable[List[T]], encode: Callable[[T], str]
+) -> AsyncIterator[bytes]:
+    async for rows in pages:
+        yield await run_in_threadpool(_encode_page, rows, encode)
+
+
+def ndjson_response(pages: AsyncIterable[List[T]], encode: Callable[[T], str]) -> StreamingResponse:
+    """Stream ``pages`` of rows as newline-delimited JSON, one encoded row per line.
+
+    Pages are fetched lazily (e.g. keyset pages from the repositories) and
+    each is written to the socket as one chunk, so memory stays flat
+    regardless of row count.
+    """
+    return StreamingResponse(_encode_pages(pages, encode), media_type=NDJSON_MEDIA_TYPE)
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """One Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def sse_response(events: AsyncIterable[bytes]) -> StreamingResponse:
+    """Stream encoded ``sse_event``s, each sent as soon as it is produced"""
+    # Reverse proxies such as nginx would otherwise buffer the whole stream
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events, media_type=SSE_MEDIA_TYPE, headers=headers)
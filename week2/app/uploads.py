@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import codecs
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from .config import settings
+
+try:
+    import python_multipart
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import parse_options_header
+except ImportError:  # optional, the "uploads" extra
+    python_multipart = None
+
+
+TEXT_MEDIA_TYPE = "text/plain"
+MULTIPART_MEDIA_TYPE = "multipart/form-data"
+# Form field holding the file in a multipart upload
+UPLOAD_FIELD = "file"
+
+
+def parse_content_type(content_type: Optional[str]) -> Tuple[str, str]:
+    """(media type, charset) of a Content-Type header; the charset defaults to UTF-8"""
+    media_type, *params = (content_type or "").split(";")
+    charset = "utf-8"
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            charset = value.strip().strip('"')
+    return media_type.strip().lower(), charset
+
+
+class _LineLengthGuard:
+    """Rejects input whose unfinished line, carried over between reads, grows past ``limit``"""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.current = 0
+
+    def check(self, text: str) -> None:
+        last_break = max(text.rfind("\n"), text.rfind("\r"))
+        if last_break < 0:
+            self.current += len(text)
+        else:
+            first_break = min(i for i in (text.find("\n"), text.find("\r")) if i >= 0)
+            if self.current + first_break > self.limit:
+                self._reject()
+            self.current = len(text) - last_break - 1
+        if self.current > self.limit:
+            self._reject()
+
+    def _reject(self) -> None:
+        raise HTTPException(
+            status_code=413, detail=f"Upload has a line longer than {self.limit} characters"
+        )
+
+
+class _FilePartReader:
+    """Picks the ``file`` part's bytes out of a multipart body as python-multipart parses it.
+
+    Other parts are skipped without being buffered. ``take`` hands over what
+    the file part yielded since the last call.
+    """
+
+    def __init__(self, boundary: bytes) -> None:
+        self.charset = "utf-8"
+        self.found = False
+        self._in_file = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+        self._chunks: List[bytes] = []
+        self.parser = python_multipart.MultipartParser(
+            boundary,
+            callbacks={
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    def take(self) -> List[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field, self._value = b"", b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name") != UPLOAD_FIELD.encode() or b"filename" not in options:
+            return
+        if self.found:
+            raise HTTPException(
+                status_code=400, detail=f'multipart upload has more than one "{UPLOAD_FIELD}" part'
+            )
+        self.found = self._in_file = True
+        _, self.charset = parse_content_type(
+            self._headers.get(b"content-type", b"").decode("latin-1")
+        )
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._chunks.append(bytes(data[start:end]))
+
+    def _on_part_end(self) -> None:
+        self._in_file = False
+
+
+async def _multipart_file(request: Request) -> AsyncIterator[Tuple[bytes, str]]:
+    # The body is parsed as it arrives, so the file part reaches the
+    # extraction chunk by chunk just like a text/plain body
+    if python_multipart is None:
+        raise HTTPException(
+            status_code=415,
+            detail=(
+                "multipart uploads need the python-multipart package; "
+                "send the file as text/plain instead"
+            ),
+        )
+    _, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if not boundary:
+        raise HTTPException(status_code=400, detail="multipart upload has no boundary")
+    reader = _FilePartReader(boundary)
+    try:
+        async for data in request.stream():
+            reader.parser.write(data)
+            for chunk in reader.take():
+                yield chunk, reader.charset
+        reader.parser.finalize()
+    except MultipartParseError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed multipart upload: {str(e)}")
+    for chunk in reader.take():
+        yield chunk, reader.charset
+    if not reader.found:
+        raise HTTPException(
+            status_code=400, detail=f'multipart upload needs a "{UPLOAD_FIELD}" file part'
+        )
+
+
+async def iter_upload_text(request: Request) -> AsyncIterator[str]:
+    """Text of a ``text/plain`` body, or of a ``multipart/form-data`` ``file`` part, as it arrives.
+
+    The body is decoded incrementally, never held whole. Lines longer than
+    ``settings.upload_max_line_chars`` are rejected with 413, so a
+    line-by-line consumer's buffer stays bounded too.
+    """
+    media_type, charset = parse_content_type(request.headers.get("content-type"))
+    if media_type == TEXT_MEDIA_TYPE:
+        chunks = ((data, charset) async for data in request.stream())
+    elif media_type == MULTIPART_MEDIA_TYPE:
+        chunks = _multipart_file(request)
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail=(
+                f"Upload must be {TEXT_MEDIA_TYPE} or {MULTIPART_MEDIA_TYPE}, "
+                f"not {media_type or 'untyped'}"
+            ),
+        )
+
+    decoder: Optional[codecs.IncrementalDecoder] = None
+    guard = _LineLengthGuard(settings.upload_max_line_chars)
+    try:
+        async for data, charset in chunks:
+            if decoder is None:
+                try:
+                    decoder = codecs.getincrementaldecoder(charset)()
+                except LookupError:
+                    raise HTTPException(status_code=415, detail=f"Unsupported charset {charset}")
+            text = decoder.decode(data)
+            guard.check(text)
+            if text:
+                yield text
+        if decoder is not None:
+            text = decoder.decode(b"", final=True)
+            guard.check(text)
+            if text:
+                yield text
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail=f"Upload is not valid {charset} text")
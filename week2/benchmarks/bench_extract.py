@@ -0,0 +1,155 @@
+"""Throughput of the heuristic extractor on multi-megabyte notes.
+
+Compares the single-pass streaming extractor against the original
+line-by-line implementation, kept here verbatim as the baseline.
+
+Run from the repository root:
+
+    python -m week2.benchmarks.bench_extract --size-mb 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import re
+from typing import List
+
+from ..app.services.extract import extract_action_items, iter_action_items
+from .common import best_of
+
+LEGACY_BULLET_PREFIX_PATTERN = re.compile(r"^\s*([-*•]|\d+\.)\s+")
+LEGACY_KEYWORD_PREFIXES = ("todo:", "action:", "next:")
+
+
+def _legacy_is_action_line(line: str) -> bool:
+    stripped = line.strip().lower()
+    if not stripped:
+        return False
+    if LEGACY_BULLET_PREFIX_PATTERN.match(stripped):
+        return True
+    if any(stripped.startswith(prefix) for prefix in LEGACY_KEYWORD_PREFIXES):
+        return True
+    if "[ ]" in stripped or "[todo]" in stripped:
+        return True
+    return False
+
+
+def _legacy_looks_imperative(sentence: str) -> bool:
+    words = re.findall(r"[A-Za-z']+", sentence)
+    if not words:
+        return False
+    first = words[0]
+    imperative_starters = {
+        "add",
+        "create",
+        "implement",
+        "fix",
+        "update",
+        "write",
+        "check",
+        "verify",
+        "refactor",
+        "document",
+        "design",
+        "investigate",
+    }
+    return first.lower() in imperative_starters
+
+
+def legacy_extract_action_items(text: str) -> List[str]:
+    """The extractor as it was before the single-pass rewrite"""
+    lines = text.splitlines()
+    extracted: List[str] = []
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+        if _legacy_is_action_line(line):
+            cleaned = LEGACY_BULLET_PREFIX_PATTERN.sub("", line)
+            cleaned = cleaned.strip()
+            cleaned = cleaned.removeprefix("[ ]").strip()
+            cleaned = cleaned.removeprefix("[todo]").strip()
+            extracted.append(cleaned)
+    if not extracted:
+        sentences = re.split(r"(?<=[.!?])\s+", text.strip())
+        for sentence in sentences:
+            s = sentence.strip()
+            if not s:
+                continue
+            if _legacy_looks_imperative(s):
+                extracted.append(s)
+    seen: set[str] = set()
+    unique: List[str] = []
+    for item in extracted:
+        lowered = item.lower()
+        if lowered in seen:
+            continue
+        seen.add(lowered)
+        unique.append(item)
+    return unique
+
+
+NARRATIVE = [
+    "We discussed the rollout plan for the next quarter.",
+    "Latency on the search page regressed after the last deploy.",
+    "Everyone agreed the onboarding docs are out of date.",
+    "Marketing wants the launch moved up by two weeks.",
+]
+ACTIONS = [
+    "- [ ] Fix the flaky login test #{n}",
+    "* Update the dashboard query {n}",
+    "{n}. Write the migration guide section",
+    "TODO: verify backups for shard {n}",
+    "    - Investigate memory growth in worker {n}",
+    "[todo] Refactor the billing client {n}",
+]
+
+
+def make_note(size_bytes: int, seed: int = 0, with_actions: bool = True) -> str:
+    """Generate a meeting-notes style document of roughly ``size_bytes``"""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    total = 0
+    n = 0
+    while total < size_bytes:
+        n += 1
+        if with_actions and rng.random() < 0.3:
+            line = rng.choice(ACTIONS).format(n=n)
+        else:
+            line = rng.choice(NARRATIVE)
+            if not with_actions and rng.random() < 0.2:
+                line = f"Check the alert thresholds for service {n}."
+        lines.append(line)
+        total += len(line.encode("utf-8")) + 1
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=8.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    for label, with_actions in (("action lines", True), ("prose fallback", False)):
+        text = make_note(size, with_actions=with_actions)
+        megabytes = len(text.encode("utf-8")) / (1024 * 1024)
+        assert extract_action_items(text) == legacy_extract_action_items(text)
+        cases = {
+            "legacy extract_action_items": lambda text=text: legacy_extract_action_items(text),
+            "extract_action_items": lambda text=text: extract_action_items(text),
+            "iter_action_items(file)": lambda text=text: list(iter_action_items(io.StringIO(text))),
+        }
+        print(f"{label}: {megabytes:.1f} MB")
+        baseline = None
+        for name, fn in cases.items():
+            seconds = best_of(fn, args.repeat)
+            rate = megabytes / seconds
+            baseline = baseline or rate
+            print(f"  {name:<30} {rate:8.1f} MB/s  ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
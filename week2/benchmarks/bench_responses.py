@@ -0,0 +1,110 @@
+"""Cost of encoding large list responses, old APIResponse path versus compiled encoders.
+
+The legacy routes return ``APIResponse(data=[Note(...), ...])`` under
+``response_model=APIResponse`` exactly as the list routes used to, so FastAPI
+validates the payload and walks it through ``jsonable_encoder``. The fast
+routes build plain dicts and return a ``ResponseEncoder`` response. Both run
+in-process behind the same FastAPI app, so the difference is serialization.
+
+Run from the repository root:
+
+    python -m week2.benchmarks.bench_responses --rows 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Any, Dict, List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ..app.responses import ResponseEncoder, note_record, success_payload
+from ..app.schemas.note import Note
+from ..app.schemas.response import ActionItemListResponse, APIResponse, NoteListResponse
+from .common import best_of
+
+
+def make_rows(count: int) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Rows shaped like sqlite3.Row results of the notes and action_items queries"""
+    notes = [
+        {
+            "id": n,
+            "content": f"Meeting notes {n}: follow up with the team about the rollout",
+            "created_at": "2024-05-01 12:00:00",
+        }
+        for n in range(count)
+    ]
+    items = [
+        {
+            "id": n,
+            "note_id": n // 3,
+            "text": f"Send the summary for item {n}",
+            "done": n % 2,
+            "created_at": "2024-05-01 12:00:00",
+        }
+        for n in range(count)
+    ]
+    return notes, items
+
+
+def build_app(notes: List[Dict[str, Any]], items: List[Dict[str, Any]]) -> FastAPI:
+    app = FastAPI()
+    note_list_json = ResponseEncoder(NoteListResponse)
+    action_item_list_json = ResponseEncoder(ActionItemListResponse)
+
+    def item_dict(r: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": r["id"],
+            "note_id": r["note_id"],
+            "text": r["text"],
+            "done": bool(r["done"]),
+            "created_at": r["created_at"],
+        }
+
+    @app.get("/legacy/notes", response_model=APIResponse)
+    def legacy_notes() -> APIResponse:
+        data = [
+            Note(id=row["id"], content=row["content"], created_at=row["created_at"])
+            for row in notes
+        ]
+        return APIResponse(success=True, data=data, next_cursor="abc")
+
+    @app.get("/fast/notes", response_model=NoteListResponse)
+    def fast_notes():
+        return note_list_json.response(success_payload([note_record(row) for row in notes], "abc"))
+
+    @app.get("/legacy/action-items", response_model=APIResponse)
+    def legacy_action_items() -> APIResponse:
+        return APIResponse(success=True, data=[item_dict(r) for r in items], next_cursor="abc")
+
+    @app.get("/fast/action-items", response_model=ActionItemListResponse)
+    def fast_action_items():
+        return action_item_list_json.response(success_payload([item_dict(r) for r in items], "abc"))
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    notes, items = make_rows(args.rows)
+    with TestClient(build_app(notes, items)) as client:
+        for resource in ("notes", "action-items"):
+            legacy = client.get(f"/legacy/{resource}").content
+            fast = client.get(f"/fast/{resource}").content
+            assert json.loads(legacy) == json.loads(fast)
+            print(f"{resource}: {args.rows} rows, {len(fast) / 1024:.0f} KiB")
+            baseline = None
+            for name in ("legacy", "fast"):
+                seconds = best_of(lambda path=f"/{name}/{resource}": client.get(path), args.repeat)
+                baseline = baseline or seconds
+                print(f"  {name:<8} {seconds * 1000:8.1f} ms  ({baseline / seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
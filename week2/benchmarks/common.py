@@ -0,0 +1,39 @@
+"""Helpers shared by the week2 benchmark scripts"""
+
+from __future__ import annotations
+
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    """Fastest of ``repeat`` timed calls of ``fn``, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def change(old: float, new: float) -> str:
+    """Relative change from ``old`` to ``new`` for report tables, e.g. ``+12.5%``"""
+    if not old:
+        return "   n/a"
+    return f"{100 * (new - old) / old:+6.1f}%"
+
+
+def git_revision() -> Optional[str]:
+    """Short hash of the checked-out commit, or None outside a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
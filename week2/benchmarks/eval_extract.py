@@ -0,0 +1,603 @@
+"""Offline quality and speed evaluation of the action item extractors.
+
+Scores the heuristic extractor, the LLM extractor and the tiered combination
+of both against a golden corpus of annotated notes: precision, recall and F1,
+per-note latency percentiles, throughput and model tokens per extracted item.
+Pass ``--compare`` with an earlier report to print the changes and exit
+non-zero when quality or speed regressed beyond the given tolerances.
+
+Model outputs are not produced live. ``--record`` sends every note to the
+Ollama server once and saves the replies, token counts and call durations;
+``--replay`` then feeds that recording to the LLM extractor's own client and
+validation code from a local FakeOllamaServer, offline and deterministically.
+LLM latencies are the recorded call durations; the replay's own overhead is
+reported as ``replay_latency``. Without either option the replies are
+synthesized by FakeOllamaServer, which answers with the heuristic extractor's
+items: the report is marked ``synthetic`` and its LLM quality numbers only
+exercise the harness.
+
+The corpus is generated from templates with known annotations (``--notes``,
+``--seed``) unless ``--corpus`` points at a JSONL file of
+``{"id", "text", "action_items"}`` records, e.g. hand-annotated notes.
+
+Run from the repository root:
+
+    # once, against a running model
+    python -m week2.benchmarks.eval_extract --notes 2000 --record llm_recording.json
+    # then offline, e.g. before every deploy
+    python -m week2.benchmarks.eval_extract --notes 2000 --replay llm_recording.json \\
+        --output eval_report.json --compare previous_eval_report.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from ..app.config import settings
+from ..app.services import llm
+from ..app.services.extract import (
+    PROMPT_VERSION,
+    ActionItemsResponse,
+    build_prompt,
+    call_llm,
+    extract_action_items,
+    extract_action_items_detailed,
+)
+from ..app.services.tiered import is_confident
+from .common import change, git_revision
+from .fake_ollama import FakeOllamaServer
+from .load_test import percentile
+
+SOURCE_OLLAMA = "ollama"
+SOURCE_SYNTHETIC = "synthetic"
+SYNTHETIC_NOTE = (
+    "LLM replies were synthesized by FakeOllamaServer from the heuristic extractor; "
+    "LLM quality numbers are not meaningful, record a real model with --record"
+)
+
+PEOPLE = ("Ana", "Bo", "Chen", "Dana", "Eli", "Farah", "Goran", "Hana")
+TOPICS = (
+    "report",
+    "deploy",
+    "budget",
+    "roadmap",
+    "migration",
+    "tests",
+    "docs",
+    "client call",
+    "release notes",
+    "dashboard",
+    "invoice",
+    "onboarding guide",
+    "backlog",
+    "security review",
+)
+VERBS = (
+    "Update",
+    "Fix",
+    "Write",
+    "Check",
+    "Review",
+    "Send",
+    "Schedule",
+    "Prepare",
+    "Document",
+    "Share",
+)
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+EVENTS = ("release", "demo", "offsite", "audit")
+
+# How each line of a generated note is written; only the first six carry an
+# action item. The heuristics catch the explicit markers, miss owner
+# sentences, catch imperative sentences only without any marked line and
+# starting with one of their verbs, and take every bullet, even non-tasks.
+STYLES = (
+    "bullet",
+    "numbered",
+    "keyword",
+    "checkbox",
+    "owner",
+    "imperative",
+    "distractor",
+    "narrative",
+)
+STYLE_WEIGHTS = (5, 2, 2, 2, 3, 2, 2, 3)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+QUALITY_METRICS = ("precision", "recall", "f1")
+# Latencies the --compare gate checks. Heuristic (and hence tiered) timings are
+# microseconds of wall clock that vary more run to run than any real change;
+# the model's recorded call times and the replay through its client are not.
+GATED_LATENCIES = {"llm": ("latency", "replay_latency")}
+
+
+class AnnotatedNote(NamedTuple):
+    id: str
+    text: str
+    action_items: List[str]
+
+
+class ExtractorRun(NamedTuple):
+    """Per note: extracted items, seconds taken, model tokens used and whether the call failed"""
+
+    items: List[List[str]]
+    seconds: List[float]
+    tokens: List[int]
+    failed: List[bool]
+
+
+def make_annotated_note(rng: random.Random, number: int) -> AnnotatedNote:
+    """A meeting note mixing the STYLES, annotated with the action items it really holds"""
+    lines = [f"Sync #{number} about the {rng.choice(TOPICS)}."]
+    items: List[str] = []
+    topics = iter(rng.sample(TOPICS, len(TOPICS)))
+    position = 0
+    for _ in range(rng.randint(1, 6)):
+        style = rng.choices(STYLES, STYLE_WEIGHTS)[0]
+        verb, topic, person = rng.choice(VERBS), next(topics), rng.choice(PEOPLE)
+        task = f"{verb} the {topic}"
+        if style == "bullet":
+            lines.append(f"{rng.choice('-*•')} {task}")
+            items.append(task)
+        elif style == "numbered":
+            position += 1
+            lines.append(f"{position}. {task}")
+            items.append(task)
+        elif style == "keyword":
+            item = f"{rng.choice(('todo', 'action', 'next'))}: {verb.lower()} the {topic}"
+            lines.append(item)
+            items.append(item)
+        elif style == "checkbox":
+            lines.append(f"[ ] {task}")
+            items.append(task)
+        elif style == "owner":
+            day = rng.choice(DAYS)
+            lines.append(f"{person} will {verb.lower()} the {topic} by {day}.")
+            items.append(f"{task} by {day}")
+        elif style == "imperative":
+            event = rng.choice(EVENTS)
+            lines.append(f"{task} before the {event}.")
+            items.append(f"{task} before the {event}")
+        elif style == "distractor":
+            lines.append(
+                rng.choice(
+                    (
+                        f"- Attendees: {person}, {rng.choice(PEOPLE)}",
+                        f"- Status: the {topic} is on track",
+                        f"* Notes taken by {person}",
+                    )
+                )
+            )
+        else:
+            lines.append(
+                rng.choice(
+                    (f"The {topic} demo went well.", f"{person} shared an update on the {topic}.")
+                )
+            )
+    if rng.random() < 0.5:
+        lines.append("Everyone agreed the plan looks fine.")
+    return AnnotatedNote(f"synthetic-{number}", "\n".join(lines), items)
+
+
+def build_corpus(size: int, seed: int = 0) -> List[AnnotatedNote]:
+    rng = random.Random(seed)
+    return [make_annotated_note(rng, number) for number in range(1, size + 1)]
+
+
+def load_corpus(path: Path) -> List[AnnotatedNote]:
+    with path.open(encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [AnnotatedNote(str(r["id"]), r["text"], list(r["action_items"])) for r in records]
+
+
+def write_corpus(corpus: Sequence[AnnotatedNote], path: Path) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        for note in corpus:
+            f.write(json.dumps(note._asdict(), ensure_ascii=False) + "\n")
+
+
+def _tokens(item: str) -> frozenset[str]:
+    return frozenset(TOKEN_PATTERN.findall(item.lower()))
+
+
+def _similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    union = a | b
+    return len(a & b) / len(union) if union else 1.0
+
+
+def match_items(predicted: Sequence[str], gold: Sequence[str], threshold: float) -> int:
+    """Number of one-to-one matches, pairing the most similar items first.
+
+    Items match when the Jaccard similarity of their word sets reaches
+    ``threshold``, so casing, punctuation and light rephrasing (an owner's
+    name left in, a dropped prefix) do not count as misses.
+    """
+    predicted_tokens = [_tokens(item) for item in predicted]
+    gold_tokens = [_tokens(item) for item in gold]
+    pairs = sorted(
+        (
+            (similarity, i, j)
+            for i, p in enumerate(predicted_tokens)
+            for j, g in enumerate(gold_tokens)
+            if (similarity := _similarity(p, g)) >= threshold
+        ),
+        reverse=True,
+    )
+    used_predicted: set[int] = set()
+    used_gold: set[int] = set()
+    for _, i, j in pairs:
+        if i not in used_predicted and j not in used_gold:
+            used_predicted.add(i)
+            used_gold.add(j)
+    return len(used_predicted)
+
+
+def score(
+    predictions: Sequence[List[str]], corpus: Sequence[AnnotatedNote], threshold: float
+) -> Dict[str, Any]:
+    """Micro-averaged precision, recall and F1 over all items, plus the share of exact notes"""
+    true_positives = false_positives = false_negatives = exact = 0
+    for items, note in zip(predictions, corpus):
+        matched = match_items(items, note.action_items, threshold)
+        true_positives += matched
+        false_positives += len(items) - matched
+        false_negatives += len(note.action_items) - matched
+        exact += matched == len(items) == len(note.action_items)
+    precision = (
+        true_positives / (true_positives + false_positives)
+        if true_positives + false_positives
+        else 1.0
+    )
+    recall = (
+        true_positives / (true_positives + false_negatives)
+        if true_positives + false_negatives
+        else 1.0
+    )
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+        "exact_notes": round(exact / len(corpus), 4) if corpus else 0.0,
+        "true_positives": true_positives,
+        "false_positives": false_positives,
+        "false_negatives": false_negatives,
+    }
+
+
+def latency_summary(seconds: Sequence[float]) -> Dict[str, float]:
+    ordered = sorted(seconds)
+    return {
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 4) if ordered else 0.0,
+        "p50_ms": round(1000 * percentile(ordered, 50), 4),
+        "p95_ms": round(1000 * percentile(ordered, 95), 4),
+        "p99_ms": round(1000 * percentile(ordered, 99), 4),
+        "max_ms": round(1000 * ordered[-1], 4) if ordered else 0.0,
+    }
+
+
+def summarize(
+    run: ExtractorRun, corpus: Sequence[AnnotatedNote], threshold: float
+) -> Dict[str, Any]:
+    quality = score(run.items, corpus, threshold)
+    total_seconds = sum(run.seconds)
+    total_tokens = sum(run.tokens)
+    extracted = sum(len(items) for items in run.items)
+    return {
+        "notes": len(corpus),
+        "errors": sum(run.failed),
+        "quality": quality,
+        "latency": latency_summary(run.seconds),
+        # One note at a time; for the LLM, bound by the recorded model calls
+        "throughput_notes_per_s": round(len(corpus) / total_seconds, 2) if total_seconds else 0.0,
+        "tokens": {
+            "total": total_tokens,
+            "per_item": round(total_tokens / extracted, 1) if extracted else 0.0,
+            "per_correct_item": (
+                round(total_tokens / quality["true_positives"], 1)
+                if quality["true_positives"]
+                else 0.0
+            ),
+        },
+    }
+
+
+def run_heuristic(corpus: Sequence[AnnotatedNote]) -> ExtractorRun:
+    items: List[List[str]] = []
+    seconds: List[float] = []
+    for note in corpus:
+        started = time.perf_counter()
+        items.append(extract_action_items(note.text))
+        seconds.append(time.perf_counter() - started)
+    return ExtractorRun(items, seconds, [0] * len(corpus), [False] * len(corpus))
+
+
+@contextmanager
+def _ollama_at(url: str) -> Iterator[None]:
+    saved = settings.ollama_host
+    llm.close_client()
+    settings.ollama_host = url
+    try:
+        yield
+    finally:
+        llm.close_client()
+        settings.ollama_host = saved
+
+
+def _record_one(note: AnnotatedNote) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        response = llm.chat(
+            [{"role": "user", "content": build_prompt(note.text)}],
+            format=ActionItemsResponse.model_json_schema(),
+        )
+    except Exception as e:
+        return {"error": str(e), "seconds": round(time.perf_counter() - started, 6)}
+    return {
+        "content": response.message.content or "",
+        "prompt_tokens": response.prompt_eval_count or 0,
+        "output_tokens": response.eval_count or 0,
+        "seconds": round(time.perf_counter() - started, 6),
+    }
+
+
+def record(
+    corpus: Sequence[AnnotatedNote], host: str, source: str, concurrency: int = 1
+) -> Dict[str, Any]:
+    """Send every note's extraction prompt to the model at ``host`` and keep the raw replies.
+
+    Recorded durations include any queueing at the server, so keep
+    ``concurrency`` at 1 unless the server really processes calls in parallel.
+    """
+    with _ollama_at(host), ThreadPoolExecutor(max_workers=concurrency) as pool:
+        replies = list(pool.map(_record_one, corpus))
+    return {
+        "meta": {
+            "source": source,
+            "host": host,
+            "model": settings.ollama_model,
+            "temperature": settings.ollama_temperature,
+            "prompt_version": PROMPT_VERSION,
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "notes": len(corpus),
+        },
+        "replies": {note.id: reply for note, reply in zip(corpus, replies)},
+    }
+
+
+def replay(
+    corpus: Sequence[AnnotatedNote], recording: Dict[str, Any]
+) -> tuple[ExtractorRun, List[float]]:
+    """Run the LLM extractor on recorded replies; returns the run and the replay's seconds per note.
+
+    Notes go through ``call_llm``, the single-prompt path that
+    extract_action_items_llm takes for short notes once the cache, coalescing
+    and batching are out of the picture. A failed call yields [], as in
+    extract_action_items_llm.
+    """
+    recorded_version = recording["meta"].get("prompt_version")
+    if recorded_version != PROMPT_VERSION:
+        raise ValueError(
+            f"recording was made with prompt version {recorded_version}, the prompt is now at "
+            f"version {PROMPT_VERSION}; record it again"
+        )
+    replies = recording["replies"]
+    missing = [note.id for note in corpus if note.id not in replies]
+    if missing:
+        raise ValueError(
+            f"{len(missing)} notes have no recorded reply, e.g. {missing[0]!r}; record them again"
+        )
+
+    by_text = {
+        note.text: replies[note.id]["content"] for note in corpus if "error" not in replies[note.id]
+    }
+    run = ExtractorRun([], [], [], [])
+    replay_seconds: List[float] = []
+    with FakeOllamaServer(latency_seconds=0, replies=by_text) as server, _ollama_at(server.url):
+        for note in corpus:
+            reply = replies[note.id]
+            started = time.perf_counter()
+            failed = "error" in reply
+            items: List[str] = []
+            if not failed:
+                try:
+                    items = call_llm(note.text)
+                except Exception:
+                    failed = True
+            replay_seconds.append(time.perf_counter() - started)
+            run.items.append(items)
+            run.seconds.append(reply["seconds"])
+            run.tokens.append(reply.get("prompt_tokens", 0) + reply.get("output_tokens", 0))
+            run.failed.append(failed)
+    return run, replay_seconds
+
+
+def combine_tiered(
+    corpus: Sequence[AnnotatedNote], heuristic: ExtractorRun, model: ExtractorRun
+) -> tuple[ExtractorRun, int]:
+    """What extract_action_items_tiered_async would have answered, from the two runs.
+
+    Also returns how many notes it escalated to the LLM.
+    """
+    run = ExtractorRun([], [], [], [])
+    escalations = 0
+    for index, note in enumerate(corpus):
+        escalated = not is_confident(extract_action_items_detailed(note.text))
+        escalations += escalated
+        # A failed escalation falls back to the heuristic items
+        use_model = escalated and not model.failed[index]
+        run.items.append(model.items[index] if use_model else heuristic.items[index])
+        run.seconds.append(heuristic.seconds[index] + (model.seconds[index] if escalated else 0.0))
+        run.tokens.append(model.tokens[index] if escalated else 0)
+        run.failed.append(escalated and model.failed[index])
+    return run, escalations
+
+
+def evaluate(
+    corpus: Sequence[AnnotatedNote], recording: Dict[str, Any], threshold: float
+) -> Dict[str, Any]:
+    heuristic = run_heuristic(corpus)
+    model, replay_seconds = replay(corpus, recording)
+    tiered, escalations = combine_tiered(corpus, heuristic, model)
+
+    llm_report = summarize(model, corpus, threshold)
+    llm_report["replay_latency"] = latency_summary(replay_seconds)
+    tiered_report = summarize(tiered, corpus, threshold)
+    tiered_report["escalated_fraction"] = round(escalations / len(corpus), 4) if corpus else 0.0
+    return {
+        "heuristic": summarize(heuristic, corpus, threshold),
+        "llm": llm_report,
+        "tiered": tiered_report,
+    }
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Per extractor: quality deltas and latency changes of ``current`` against ``previous``"""
+    lines: List[str] = []
+    for name, stats in current["extractors"].items():
+        old = previous.get("extractors", {}).get(name)
+        if old is None:
+            continue
+        quality = "  ".join(
+            f"{metric} {stats['quality'][metric]:.3f} "
+            f"({stats['quality'][metric] - old['quality'][metric]:+.3f})"
+            for metric in QUALITY_METRICS
+        )
+        latency = "  ".join(
+            f"{metric} {stats['latency'][metric]:10.4f} "
+            f"({change(old['latency'][metric], stats['latency'][metric])})"
+            for metric in ("p50_ms", "p95_ms")
+        )
+        lines.append(f"  {name:<10} {quality}  {latency}")
+    return lines
+
+
+def regressions(
+    previous: Dict[str, Any], current: Dict[str, Any], max_quality_drop: float, max_slowdown: float
+) -> List[str]:
+    """Quality metrics that fell by more than ``max_quality_drop``, per extractor, and
+    ``GATED_LATENCIES`` medians that rose by more than the ``max_slowdown`` fraction"""
+    found: List[str] = []
+    for name, stats in current["extractors"].items():
+        old = previous.get("extractors", {}).get(name)
+        if old is None:
+            continue
+        for metric in QUALITY_METRICS:
+            before, after = old["quality"][metric], stats["quality"][metric]
+            if before - after > max_quality_drop:
+                found.append(f"{name} {metric} fell from {before:.3f} to {after:.3f}")
+        for section in GATED_LATENCIES.get(name, ()):
+            if section not in stats or section not in old:
+                continue
+            before, after = old[section]["p50_ms"], stats[section]["p50_ms"]
+            if before and after > before * (1 + max_slowdown):
+                found.append(f"{name} {section} p50 rose from {before:.4f} ms to {after:.4f} ms")
+    return found
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=2000, help="size of the generated corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--corpus", type=Path, help="JSONL corpus of annotated notes, instead of generating one"
+    )
+    parser.add_argument("--write-corpus", type=Path, help="also save the corpus as JSONL")
+    recording_source = parser.add_mutually_exclusive_group()
+    recording_source.add_argument(
+        "--record", type=Path, help="call the model for every note and save the replies"
+    )
+    recording_source.add_argument(
+        "--replay", type=Path, help="recorded replies to evaluate offline"
+    )
+    parser.add_argument(
+        "--ollama-host", default=settings.ollama_host, help="model server to record from"
+    )
+    parser.add_argument(
+        "--record-concurrency", type=int, default=1, help="model calls in flight while recording"
+    )
+    parser.add_argument(
+        "--match-threshold", type=float, default=0.6, help="word-set similarity for items to match"
+    )
+    parser.add_argument("--output", type=Path, default=Path("eval_report.json"))
+    parser.add_argument(
+        "--compare", type=Path, help="earlier report; exit with status 1 on regressions"
+    )
+    parser.add_argument(
+        "--max-quality-drop", type=float, default=0.01, help="tolerated precision/recall/F1 drop"
+    )
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=0.25,
+        help="tolerated LLM p50 latency increase, a fraction",
+    )
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus) if args.corpus else build_corpus(args.notes, args.seed)
+    if args.write_corpus:
+        write_corpus(corpus, args.write_corpus)
+    if args.replay:
+        recording = json.loads(args.replay.read_text(encoding="utf-8"))
+    elif args.record:
+        recording = record(corpus, args.ollama_host, SOURCE_OLLAMA, args.record_concurrency)
+        args.record.write_text(json.dumps(recording, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"recording written to {args.record}")
+    else:
+        with FakeOllamaServer(latency_seconds=0) as fake:
+            recording = record(corpus, fake.url, SOURCE_SYNTHETIC, args.record_concurrency)
+        print(f"warning: {SYNTHETIC_NOTE}")
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "recording": recording["meta"],
+            **({"note": SYNTHETIC_NOTE} if recording["meta"]["source"] == SOURCE_SYNTHETIC else {}),
+        },
+        "config": {
+            "corpus": str(args.corpus) if args.corpus else f"generated, seed {args.seed}",
+            "notes": len(corpus),
+            "gold_items": sum(len(note.action_items) for note in corpus),
+            "match_threshold": args.match_threshold,
+        },
+        "extractors": evaluate(corpus, recording, args.match_threshold),
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    for name, stats in report["extractors"].items():
+        quality, latency = stats["quality"], stats["latency"]
+        print(
+            f"{name:<10} precision {quality['precision']:.3f}  recall {quality['recall']:.3f}  "
+            f"f1 {quality['f1']:.3f}  "
+            f"p50 {latency['p50_ms']:10.4f} ms  p95 {latency['p95_ms']:10.4f} ms  "
+            f"{stats['throughput_notes_per_s']:10.1f} notes/s  "
+            f"{stats['tokens']['per_item']:7.1f} tokens/item"
+        )
+    print(f"report written to {args.output}")
+
+    if args.compare:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        for line in compare(previous, report):
+            print(line)
+        found = regressions(previous, report, args.max_quality_drop, args.max_slowdown)
+        for line in found:
+            print(f"regression: {line}")
+        if found:
+            raise SystemExit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""A local stand-in for the Ollama HTTP API, for benchmarks and offline tests.
+
+Serves ``POST /api/chat`` (streaming and not) with a configurable latency
+model and answers in the JSON shapes the extractor asks for: a single-note
+``{"action_items": [...]}`` or a batched ``{"notes": [...]}``. Items are the
+canned list when one is given, otherwise what the heuristic extractor finds
+in each note, so responses look like a well-behaved model's. Single-note
+chats can instead replay recorded replies, keyed by the note's text.
+
+    with FakeOllamaServer(latency_seconds=0.2) as server:
+        settings.ollama_host = server.url
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from ..app.services.extract import extract_action_items
+
+SINGLE_NOTE_PATTERN = re.compile(r"Text to analyze:\n(.*)\n\nIMPORTANT:", re.S)
+BATCH_NOTE_PATTERN = re.compile(r'<note number="(\d+)">\n(.*?)\n</note>', re.S)
+
+# Characters per streamed chunk, roughly a few tokens as Ollama streams them
+STREAM_CHUNK_CHARS = 16
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeOllamaServer:
+    """Threaded fake Ollama server on an ephemeral localhost port.
+
+    Each chat takes ``latency_seconds`` plus ``per_note_seconds`` for every
+    note in the prompt. At most ``parallel`` chats are processed at once, like
+    ``OLLAMA_NUM_PARALLEL``; the rest queue, which is where batching and
+    request coalescing pay off.
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.05,
+        per_note_seconds: float = 0.0,
+        parallel: int = 4,
+        items: Optional[Sequence[str]] = None,
+        model: str = "fake",
+        replies: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.latency_seconds = latency_seconds
+        self.per_note_seconds = per_note_seconds
+        self.items = list(items) if items is not None else None
+        self.model = model
+        self.replies = replies
+        self._slots = threading.BoundedSemaphore(parallel)
+        self._lock = threading.Lock()
+        self._stats = {
+            "chats": 0,
+            "streamed_chats": 0,
+            "aborted_streams": 0,
+            "notes": 0,
+            "prompt_tokens": 0,
+            "output_tokens": 0,
+        }
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("server is not running")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-ollama", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _items_for(self, note: str) -> List[str]:
+        return list(self.items) if self.items is not None else extract_action_items(note)
+
+    def answer(self, prompt: str) -> tuple[str, int]:
+        """The model's reply to ``prompt`` and the number of notes it covered"""
+        batch = BATCH_NOTE_PATTERN.findall(prompt)
+        if batch:
+            notes = [
+                {"number": int(number), "action_items": self._items_for(note)}
+                for number, note in batch
+            ]
+            return json.dumps({"notes": notes}), len(batch)
+        single = SINGLE_NOTE_PATTERN.search(prompt)
+        if single:
+            note = single.group(1)
+            if self.replies is not None and note in self.replies:
+                return self.replies[note], 1
+            return json.dumps({"action_items": self._items_for(note)}), 1
+        # e.g. the startup warm-up chat
+        return "OK", 0
+
+    def _count(self, streamed: bool, notes: int, prompt: str, content: str) -> None:
+        with self._lock:
+            self._stats["chats"] += 1
+            self._stats["streamed_chats"] += int(streamed)
+            self._stats["notes"] += notes
+            self._stats["prompt_tokens"] += _estimate_tokens(prompt)
+            self._stats["output_tokens"] += _estimate_tokens(content)
+
+    def _handler_class(self) -> type:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this every
+            # response waits on the client's delayed ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self) -> None:
+                body = json.loads(
+                    self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}"
+                )
+                if self.path != "/api/chat":
+                    self._send_json(404, {"error": f"unsupported endpoint {self.path}"})
+                    return
+                prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+                content, notes = fake.answer(prompt)
+                fake._count(bool(body.get("stream")), notes, prompt, content)
+                delay = fake.latency_seconds + fake.per_note_seconds * notes
+                with fake._slots:
+                    if body.get("stream"):
+                        self._stream(body, prompt, content, delay)
+                    else:
+                        time.sleep(delay)
+                        self._send_json(200, self._final(body, content, prompt, content))
+
+            def _message(
+                self, body: Dict[str, Any], content: str, done: bool = False
+            ) -> Dict[str, Any]:
+                return {
+                    "model": body.get("model") or fake.model,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "message": {"role": "assistant", "content": content},
+                    "done": done,
+                }
+
+            def _final(
+                self, body: Dict[str, Any], content: str, prompt: str, output: str
+            ) -> Dict[str, Any]:
+                message = self._message(body, content, done=True)
+                message.update(
+                    done_reason="stop",
+                    prompt_eval_count=_estimate_tokens(prompt),
+                    eval_count=_estimate_tokens(output),
+                )
+                return message
+
+            def _stream(
+                self, body: Dict[str, Any], prompt: str, content: str, delay: float
+            ) -> None:
+                pieces = [
+                    content[i : i + STREAM_CHUNK_CHARS]
+                    for i in range(0, len(content), STREAM_CHUNK_CHARS)
+                ]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                lines = [self._message(body, piece) for piece in pieces]
+                lines.append(self._final(body, "", prompt, content))
+                try:
+                    for line in lines:
+                        time.sleep(delay / len(lines))
+                        data = (json.dumps(line) + "\n").encode("utf-8")
+                        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up mid-stream
+                    self.close_connection = True
+                    with fake._lock:
+                        fake._stats["aborted_streams"] += 1
+
+        return Handler
@@ -0,0 +1,380 @@
+"""Load test of the week2 API against a temporary DB and a fake Ollama server.
+
+Starts the app in-process (lifespan included) on a fresh SQLite file, points
+it at a local FakeOllamaServer with the given latency, then drives a mixed
+workload at each concurrency level and writes per-operation p50/p95/p99
+latency and throughput to a JSON report. Pass ``--compare`` with an earlier
+report to print the change per level and operation.
+
+Requests go through httpx's ASGI transport, so client and server share one
+event loop: absolute numbers are lower than behind a real server, but the
+comparison between versions on the same machine is what the report is for.
+
+Run from the repository root:
+
+    python -m week2.benchmarks.load_test --concurrency 1,8,32 --requests 500 \\
+        --llm-latency-ms 200 --output load_report.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence
+
+import httpx
+
+from ..app import db, repositories, storage
+from ..app.config import settings
+from ..app.services import llm
+from .common import change, git_revision
+from .fake_ollama import FakeOllamaServer
+
+DEFAULT_MIX = "create_note=2,list_notes=2,list_action_items=1,extract=2,extract_llm=1,mark_done=2"
+REQUEST_TIMEOUT_SECONDS = 120.0
+
+WORDS = (
+    "report",
+    "deploy",
+    "review",
+    "budget",
+    "roadmap",
+    "migration",
+    "tests",
+    "docs",
+    "client",
+    "release",
+)
+
+
+def make_note_text(rng: random.Random, number: int) -> str:
+    """A short meeting note with a few action lines; ``number`` keeps it unique"""
+    lines = [f"Sync #{number} about the {rng.choice(WORDS)}."]
+    for _ in range(rng.randint(1, 4)):
+        verb = rng.choice(("Update", "Fix", "Write", "Check"))
+        lines.append(f"- {verb} the {rng.choice(WORDS)} ({number})")
+    if rng.random() < 0.5:
+        lines.append(f"todo: follow up on the {rng.choice(WORDS)}")
+    lines.append("Everyone agreed the plan looks fine.")
+    return "\n".join(lines)
+
+
+class Workload:
+    """The operations of the mixed workload and the state they share"""
+
+    def __init__(self, seed: int) -> None:
+        self.rng = random.Random(seed)
+        self.counter = 0
+        self.action_item_ids: List[int] = []
+
+    def next_text(self) -> str:
+        self.counter += 1
+        return make_note_text(self.rng, self.counter)
+
+    def _remember_items(self, response: httpx.Response) -> None:
+        if response.status_code == 200:
+            self.action_item_ids.extend(item["id"] for item in response.json()["data"]["items"])
+
+    async def create_note(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.post("/notes", json={"content": self.next_text()})
+
+    async def list_notes(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.get("/notes", params={"limit": 50})
+
+    async def list_action_items(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.get("/action-items", params={"limit": 50})
+
+    async def extract(self, client: httpx.AsyncClient) -> httpx.Response:
+        response = await client.post(
+            "/action-items/extract", json={"text": self.next_text(), "save_note": True}
+        )
+        self._remember_items(response)
+        return response
+
+    async def extract_llm(self, client: httpx.AsyncClient) -> httpx.Response:
+        response = await client.post(
+            "/action-items/extract-llm", json={"text": self.next_text(), "save_note": True}
+        )
+        self._remember_items(response)
+        return response
+
+    async def mark_done(self, client: httpx.AsyncClient) -> Optional[httpx.Response]:
+        # Skipped until an extraction has returned some action items
+        if not self.action_item_ids:
+            return None
+        item_id = self.rng.choice(self.action_item_ids)
+        return await client.post(
+            f"/action-items/{item_id}/done", json={"done": self.rng.random() < 0.5}
+        )
+
+    def operation(
+        self, name: str
+    ) -> Callable[[httpx.AsyncClient], Awaitable[Optional[httpx.Response]]]:
+        if name.startswith("_") or name not in OPERATIONS:
+            raise ValueError(f"unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}")
+        return getattr(self, name)
+
+
+OPERATIONS = (
+    "create_note",
+    "list_notes",
+    "list_action_items",
+    "extract",
+    "extract_llm",
+    "mark_done",
+)
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Linearly interpolated percentile ``q`` (0-100) of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(1000 * percentile(ordered, 50), 3),
+        "p95_ms": round(1000 * percentile(ordered, 95), 3),
+        "p99_ms": round(1000 * percentile(ordered, 99), 3),
+        "max_ms": round(1000 * ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    workload: Workload,
+    mix: Dict[str, float],
+    concurrency: int,
+    requests: int,
+) -> Dict[str, Any]:
+    """Issue ``requests`` operations drawn from ``mix`` with ``concurrency`` workers.
+
+    Operations that had nothing to act on are counted under ``skipped`` and
+    left out of the latency figures.
+    """
+    plan = iter(workload.rng.choices(list(mix), weights=list(mix.values()), k=requests))
+    samples: Dict[str, List[float]] = {name: [] for name in mix}
+    errors: Dict[str, int] = {name: 0 for name in mix}
+    skipped: Dict[str, int] = {name: 0 for name in mix}
+
+    async def worker() -> None:
+        # Workers share one iterator, so the plan is split between them
+        for name in plan:
+            started = time.perf_counter()
+            try:
+                response = await workload.operation(name)(client)
+            except Exception:
+                ok = False
+            else:
+                if response is None:
+                    skipped[name] += 1
+                    continue
+                ok = response.status_code < 400
+            samples[name].append(time.perf_counter() - started)
+            if not ok:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_seconds = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "wall_seconds": round(wall_seconds, 3),
+        "overall": summarize(
+            [s for values in samples.values() for s in values], sum(errors.values()), wall_seconds
+        ),
+        "operations": {
+            name: summarize(values, errors[name], wall_seconds)
+            for name, values in samples.items()
+            if values
+        },
+        "skipped": {name: count for name, count in skipped.items() if count},
+    }
+
+
+@contextmanager
+def isolated_app(
+    data_dir: Path, ollama_url: str, storage_backend: str = "sqlite"
+) -> Iterator[None]:
+    """Point the week2 DB at ``data_dir``, the Ollama client at ``ollama_url``; pick the backend"""
+    saved_db = (db.DATA_DIR, db.DB_PATH)
+    saved_settings = (settings.ollama_host, settings.storage_backend)
+    db.close_pool()
+    llm.close_client()
+    repositories.clear_caches()
+    storage.reset_backend()
+    db.DATA_DIR, db.DB_PATH = data_dir, data_dir / "load_test.db"
+    settings.ollama_host, settings.storage_backend = ollama_url, storage_backend
+    try:
+        yield
+    finally:
+        db.close_pool()
+        llm.close_client()
+        repositories.clear_caches()
+        storage.reset_backend()
+        db.DATA_DIR, db.DB_PATH = saved_db
+        settings.ollama_host, settings.storage_backend = saved_settings
+
+
+async def _drive(
+    args: argparse.Namespace, mix: Dict[str, float], fake: FakeOllamaServer
+) -> List[Dict[str, Any]]:
+    from ..app.main import app
+
+    workload = Workload(args.seed)
+    levels: List[Dict[str, Any]] = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://week2", timeout=REQUEST_TIMEOUT_SECONDS
+        ) as client:
+            # Something to list and mark done before the first measured request
+            for _ in range(args.seed_notes):
+                await workload.extract(client)
+            for concurrency in args.concurrency:
+                before = fake.stats()
+                level = await run_level(client, workload, mix, concurrency, args.requests)
+                after = fake.stats()
+                level["fake_ollama"] = {key: after[key] - before[key] for key in after}
+                levels.append(level)
+                overall = level["overall"]
+                print(
+                    f"concurrency {concurrency:>4}: {overall['throughput_rps']:8.1f} req/s  "
+                    f"p50 {overall['p50_ms']:8.1f} ms  p95 {overall['p95_ms']:8.1f} ms  "
+                    f"p99 {overall['p99_ms']:8.1f} ms  errors {overall['errors']}"
+                )
+    return levels
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    with (
+        tempfile.TemporaryDirectory(prefix="week2-load-") as data_dir,
+        FakeOllamaServer(
+            latency_seconds=args.llm_latency_ms / 1000,
+            per_note_seconds=args.llm_per_note_ms / 1000,
+            parallel=args.llm_parallel,
+        ) as fake,
+        isolated_app(Path(data_dir), fake.url, args.storage),
+    ):
+        levels = asyncio.run(_drive(args, mix, fake))
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "concurrency": args.concurrency,
+            "requests_per_level": args.requests,
+            "mix": mix,
+            "seed": args.seed,
+            "seed_notes": args.seed_notes,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_per_note_ms": args.llm_per_note_ms,
+            "llm_parallel": args.llm_parallel,
+            "storage_backend": args.storage,
+            "llm_batch_enabled": settings.llm_batch_enabled,
+            "llm_cache_enabled": settings.llm_cache_enabled,
+        },
+        "levels": levels,
+    }
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Per level and operation: throughput and p50/p95/p99 of ``current`` against ``previous``"""
+    lines: List[str] = []
+    old_levels = {level["concurrency"]: level for level in previous.get("levels", [])}
+    for level in current["levels"]:
+        old = old_levels.get(level["concurrency"])
+        if old is None:
+            continue
+        lines.append(f"concurrency {level['concurrency']}:")
+        rows = [("overall", old["overall"], level["overall"])]
+        rows += [
+            (name, old["operations"][name], stats)
+            for name, stats in level["operations"].items()
+            if name in old["operations"]
+        ]
+        for name, before, after in rows:
+            deltas = "  ".join(
+                f"{metric} {after[metric]:9.1f} ({change(before[metric], after[metric])})"
+                for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+            )
+            lines.append(f"  {name:<18} {deltas}")
+    return lines
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--concurrency", type=lambda s: [int(n) for n in s.split(",")], default=[1, 8, 32]
+    )
+    parser.add_argument("--requests", type=int, default=300, help="requests per concurrency level")
+    parser.add_argument(
+        "--mix", default=DEFAULT_MIX, help="operation=weight pairs, comma separated"
+    )
+    parser.add_argument(
+        "--llm-latency-ms", type=float, default=200.0, help="fake Ollama latency per chat"
+    )
+    parser.add_argument(
+        "--llm-per-note-ms", type=float, default=20.0, help="extra fake latency per note in a chat"
+    )
+    parser.add_argument(
+        "--llm-parallel", type=int, default=4, help="chats the fake Ollama serves at once"
+    )
+    parser.add_argument(
+        "--storage",
+        choices=sorted(storage.BACKENDS),
+        default="sqlite",
+        help="notes/action items backend",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--seed-notes", type=int, default=20, help="notes extracted before measuring"
+    )
+    parser.add_argument("--output", type=Path, default=Path("load_report.json"))
+    parser.add_argument("--compare", type=Path, help="earlier report to compare against")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"report written to {args.output}")
+    if args.compare:
+        for line in compare(json.loads(args.compare.read_text(encoding="utf-8")), report):
+            print(line)
+    return report
+
+
+if __name__ == "__main__":
+    main()
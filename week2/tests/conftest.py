@@ -0,0 +1,43 @@
+import pytest
+
+from ..app import db, repositories, storage
+from ..app.config import settings
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def temp_db(request, tmp_path, monkeypatch):
+    """Each storage backend in turn, with the week2 database pointed at a fresh temporary file.
+
+    The memory backend must never touch that file; tests that only make sense
+    on SQLite use ``sqlite_only``.
+    """
+    db.close_pool()
+    monkeypatch.setattr(db, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "test.db")
+    monkeypatch.setattr(settings, "storage_backend", request.param)
+    storage.reset_backend()
+    repositories.clear_caches()
+    if request.param == "sqlite":
+        db.init_db()
+    yield db.DB_PATH
+    db.close_pool()
+    storage.reset_backend()
+    repositories.clear_caches()
+    if request.param == "memory":
+        assert not db.DB_PATH.exists()
+
+
+sqlite_only = pytest.mark.parametrize("temp_db", ["sqlite"], indirect=True)
+
+
+@pytest.fixture()
+def client(temp_db, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from ..app.main import app
+
+    # Tests never talk to a real Ollama server
+    monkeypatch.setattr(settings, "ollama_warmup", False)
+
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,210 @@
+import json
+import threading
+
+import pytest
+
+from ..app import db
+from ..app.config import settings
+from ..app.pool import ConnectionPool
+from ..app.routers import action_items as action_items_router
+from ..app.storage import get_backend
+from .conftest import sqlite_only
+
+
+def test_extract_batch_persists_all_notes_and_items(client):
+    texts = [
+        "- [ ] Set up database\n* Write tests",
+        "Nothing actionable here.",
+        "TODO: ship it",
+    ]
+    r = client.post("/action-items/extract-batch", json={"texts": texts})
+    assert r.status_code == 200, r.text
+    results = r.json()["data"]["results"]
+    assert len(results) == 3
+
+    assert [item["text"] for item in results[0]["items"]] == ["Set up database", "Write tests"]
+    assert results[1]["items"] == []
+    assert [item["text"] for item in results[2]["items"]] == ["TODO: ship it"]
+
+    for text, result in zip(texts, results):
+        assert get_backend().get_note(result["note_id"])["content"] == text
+        rows = get_backend().list_action_items(note_id=result["note_id"])
+        assert sorted(r["id"] for r in rows) == sorted(item["id"] for item in result["items"])
+        for item in result["items"]:
+            assert get_backend().get_action_item(item["id"])["text"] == item["text"]
+
+
+def test_extract_batch_without_saving_notes(client):
+    r = client.post(
+        "/action-items/extract-batch", json={"texts": ["- a", "- b"], "save_note": False}
+    )
+    assert r.status_code == 200, r.text
+    results = r.json()["data"]["results"]
+    assert [result["note_id"] for result in results] == [None, None]
+    assert [len(result["items"]) for result in results] == [1, 1]
+
+
+def test_extract_batch_rejects_blank_text(client):
+    r = client.post("/action-items/extract-batch", json={"texts": ["- a", "   "]})
+    assert r.status_code == 400
+    assert get_backend().list_notes() == []
+
+
+@sqlite_only
+def test_insert_action_items_spans_multiple_statements(temp_db):
+    items = [f"item {n}" for n in range(db.INSERT_CHUNK_SIZE * 2 + 5)]
+    ids = get_backend().insert_action_items(items)
+    assert ids == sorted(ids)
+    assert [get_backend().get_action_item(i)["text"] for i in (ids[0], ids[-1])] == [
+        items[0],
+        items[-1],
+    ]
+
+
+def test_list_action_items_pages_within_a_note(client):
+    note_id = get_backend().insert_note("paged")["id"]
+    ids = get_backend().insert_action_items([f"item {n}" for n in range(5)], note_id=note_id)
+    get_backend().insert_action_items(
+        ["other note"], note_id=get_backend().insert_note("other")["id"]
+    )
+
+    r = client.get("/action-items", params={"note_id": note_id, "limit": 3})
+    body = r.json()
+    assert [item["id"] for item in body["data"]] == ids[::-1][:3]
+
+    r = client.get(
+        "/action-items", params={"note_id": note_id, "limit": 3, "cursor": body["next_cursor"]}
+    )
+    body = r.json()
+    assert [item["id"] for item in body["data"]] == ids[::-1][3:]
+    assert body["next_cursor"] is None
+
+
+@sqlite_only
+def test_list_action_items_streams_ndjson(client):
+    note_id = get_backend().insert_note("streamed")["id"]
+    get_backend().insert_action_items([f"item {n}" for n in range(1200)], note_id=note_id)
+
+    acquired = db.pool_stats()["acquired"]
+    with client.stream("GET", "/action-items", params={"note_id": note_id, "stream": 1}) as r:
+        lines = [json.loads(line) for line in r.iter_lines() if line]
+
+    assert len(lines) == 1200
+    assert lines[0]["text"] == "item 1199"
+    assert lines[-1]["text"] == "item 0"
+    assert lines[-1]["done"] is False
+    # Keyset pages of 500, each on a connection borrowed only for that page
+    assert db.pool_stats()["acquired"] == acquired + 3
+    assert db.pool_stats()["in_use"] == 0
+
+
+def test_slow_llm_extractions_do_not_block_reads(client, monkeypatch):
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def slow_llm(text, **kwargs):
+        started.release()
+        release.wait(timeout=10)
+        return ["from the model"]
+
+    monkeypatch.setattr(action_items_router, "extract_action_items_llm", slow_llm)
+    workers = settings.llm_max_concurrency + 2
+    responses = []
+    threads = [
+        threading.Thread(
+            target=lambda: responses.append(
+                client.post("/action-items/extract-llm", json={"text": "- slow"})
+            )
+        )
+        for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        # Every LLM worker is busy and more extractions are queued behind them
+        for _ in range(settings.llm_max_concurrency):
+            assert started.acquire(timeout=5)
+        assert client.get("/notes").status_code == 200
+        assert client.get("/action-items").status_code == 200
+        # The remaining extractions wait for an LLM worker instead of piling on
+        assert not started.acquire(timeout=0.1)
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join(timeout=10)
+
+    assert [r.status_code for r in responses] == [200] * workers
+
+
+@pytest.fixture()
+def traced_statements(temp_db, monkeypatch):
+    """Record the SQL statements executed on every pooled connection"""
+    statements = []
+    open_connection = ConnectionPool._open
+
+    def traced_open(self):
+        connection = open_connection(self)
+        connection.set_trace_callback(statements.append)
+        return connection
+
+    db.close_pool()
+    monkeypatch.setattr(ConnectionPool, "_open", traced_open)
+    db.init_db()
+    statements.clear()
+    return statements
+
+
+def _data_statements(statements):
+    return [
+        s
+        for s in statements
+        if s.split(None, 1)[0].upper() in {"SELECT", "INSERT", "UPDATE", "DELETE"}
+    ]
+
+
+@sqlite_only
+def test_mutating_endpoints_run_one_statement_on_one_connection(client, traced_statements):
+    acquired = db.pool_stats()["acquired"]
+    r = client.post("/notes", json={"content": "single round trip"})
+    assert r.status_code == 200
+    assert r.json()["data"]["content"] == "single round trip"
+    assert len(_data_statements(traced_statements)) == 1
+    assert db.pool_stats()["acquired"] == acquired + 1
+
+    item_id = get_backend().insert_action_items(["finish"])[0]
+    traced_statements.clear()
+    acquired = db.pool_stats()["acquired"]
+    r = client.post(f"/action-items/{item_id}/done", json={"done": True})
+    assert r.status_code == 200
+    # The response is the row the UPDATE returned
+    data = r.json()["data"]
+    assert {key: data[key] for key in ("id", "note_id", "text", "done")} == {
+        "id": item_id,
+        "note_id": None,
+        "text": "finish",
+        "done": True,
+    }
+    assert data["created_at"]
+    assert _data_statements(traced_statements) == [
+        "UPDATE action_items SET done = 1 WHERE id = %d "
+        "RETURNING id, note_id, text, done, created_at" % item_id
+    ]
+    assert db.pool_stats()["acquired"] == acquired + 1
+
+    traced_statements.clear()
+    assert client.post("/action-items/999999/done", json={"done": True}).status_code == 404
+    assert len(_data_statements(traced_statements)) == 1
+
+
+@sqlite_only
+def test_extract_persists_note_and_items_in_one_transaction(client, traced_statements):
+    acquired = db.pool_stats()["acquired"]
+    r = client.post("/action-items/extract", json={"text": "- one\n- two", "save_note": True})
+    assert r.status_code == 200
+    assert db.pool_stats()["acquired"] == acquired + 1
+    # One INSERT for the note and one multi-row INSERT for its items
+    assert [s.split()[2] for s in _data_statements(traced_statements)] == ["notes", "action_items"]
+
+    data = r.json()["data"]
+    assert get_backend().get_note(data["note_id"])["content"] == "- one\n- two"
+    assert [item["text"] for item in data["items"]] == ["one", "two"]
@@ -0,0 +1,191 @@
+import json
+import threading
+import time
+
+import pytest
+from ollama import ChatResponse, Message
+
+from ..app.config import settings
+from ..app.services import extract, llm
+from ..app.services.batching import MicroBatcher
+
+
+def _batcher(
+    batches,
+    singles,
+    max_tokens=10_000,
+    max_notes=16,
+    fail_batches=False,
+    window=0.1,
+    hold=None,
+    barrier=None,
+):
+    def run_batch(texts):
+        batches.append(list(texts))
+        if fail_batches:
+            raise ValueError("invalid batch")
+        return [text.upper() for text in texts]
+
+    def run_single(text):
+        singles.append(text)
+        if hold is not None:
+            hold.wait(5)
+        if barrier is not None:
+            barrier.wait()
+        return text.upper()
+
+    return MicroBatcher(
+        run_single=run_single,
+        run_batch=run_batch,
+        window_seconds=lambda: window,
+        max_tokens=lambda: max_tokens,
+        max_notes=lambda: max_notes,
+    )
+
+
+def _submit_concurrently(batcher, texts):
+    results = [None] * len(texts)
+
+    def worker(index):
+        results[index] = batcher.extract(texts[index])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_a_lone_note_is_not_held_for_the_window():
+    batches, singles = [], []
+    batcher = _batcher(batches, singles, window=10)
+    started = time.perf_counter()
+    assert batcher.extract("alone") == "ALONE"
+    assert batcher.extract("alone again") == "ALONE AGAIN"
+    assert time.perf_counter() - started < 1
+    assert singles == ["alone", "alone again"] and batches == []
+
+
+def test_notes_within_the_window_share_one_call():
+    batches, singles = [], []
+    hold = threading.Event()
+    batcher = _batcher(batches, singles, hold=hold)
+    # An idle batcher sends the first note straight away ...
+    first = batcher.submit("first")
+    while singles != ["first"]:
+        time.sleep(0.001)
+
+    # ... and packs the notes that arrive while that call is running
+    texts = [f"note {n}" for n in range(5)]
+    assert _submit_concurrently(batcher, texts) == [text.upper() for text in texts]
+    assert len(batches) == 1 and sorted(batches[0]) == texts
+    hold.set()
+    assert first.result() == "FIRST"
+    assert singles == ["first"]
+    assert batcher.stats()["batched_notes"] == 5
+
+
+def test_batches_respect_note_and_token_limits():
+    batches, singles = [], []
+    batcher = _batcher(batches, singles, max_notes=2)
+    futures = batcher.submit_many([f"note {n}" for n in range(5)])
+    assert [f.result() for f in futures] == [f"NOTE {n}" for n in range(5)]
+    assert [len(batch) for batch in batches] == [2, 2]
+    assert singles == ["note 4"]
+
+    batches, singles = [], []
+    batcher = _batcher(batches, singles, max_tokens=30)
+    futures = batcher.submit_many(["x" * 40] * 4)  # 11 estimated tokens each
+    [f.result() for f in futures]
+    assert [len(batch) for batch in batches] == [2, 2]
+
+
+def test_a_failed_batch_falls_back_to_per_note_calls():
+    batches, singles = [], []
+    batcher = _batcher(batches, singles, fail_batches=True)
+    futures = batcher.submit_many([f"note {n}" for n in range(3)])
+    assert [f.result() for f in futures] == ["NOTE 0", "NOTE 1", "NOTE 2"]
+    assert len(batches) == 1
+    assert sorted(singles) == ["note 0", "note 1", "note 2"]
+    assert batcher.stats()["fallbacks"] == 1
+
+
+def test_fallback_retries_run_in_parallel():
+    batches, singles = [], []
+    # Each retry waits for the other, so retrying one after another would time out
+    barrier = threading.Barrier(2, timeout=5)
+    batcher = _batcher(batches, singles, fail_batches=True, barrier=barrier)
+    futures = batcher.submit_many(["note 0", "note 1"])
+    assert [f.result(10) for f in futures] == ["NOTE 0", "NOTE 1"]
+    assert sorted(singles) == ["note 0", "note 1"]
+
+
+class FakeModel:
+    """Answers single prompts with one item and batch prompts per ``batch_answer``"""
+
+    def __init__(self, batch_answer=None):
+        self.prompts = []
+        self.batch_answer = batch_answer
+
+    def chat(self, messages, format=None, **kwargs):
+        prompt = messages[0]["content"]
+        self.prompts.append(prompt)
+        if "notes" in format["properties"]:
+            count = prompt.count("<note number=")
+            answer = self.batch_answer or [
+                {"number": n, "action_items": [f"item {n}", f"Item {n}"]}
+                for n in range(1, count + 1)
+            ]
+            content = json.dumps({"notes": answer})
+        else:
+            content = json.dumps({"action_items": ["single"]})
+        return ChatResponse(model="fake", message=Message(role="assistant", content=content))
+
+
+def test_batch_response_is_validated_and_fanned_out(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(llm, "chat", model.chat)
+    assert extract._call_llm_batch(["a", "b"]) == [["item 1"], ["item 2"]]
+
+    model.batch_answer = [{"number": 1, "action_items": ["only one"]}]
+    with pytest.raises(ValueError):
+        extract._call_llm_batch(["a", "b"])
+
+
+def test_bulk_endpoint_packs_notes_into_one_model_call(client, monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(llm, "chat", model.chat)
+    monkeypatch.setattr(settings, "llm_batch_window_ms", 50.0)
+
+    texts = ["We met about the launch.", "Budget review happened.", "Hiring sync."]
+    r = client.post("/action-items/extract-batch", json={"texts": texts, "use_llm": True})
+    assert r.status_code == 200
+    results = r.json()["data"]["results"]
+    assert len(model.prompts) == 1
+    assert '<note number="3">' in model.prompts[0]
+    # Order of notes within the batch follows submission order
+    assert [[item["text"] for item in result["items"]] for result in results] == [
+        ["item 1"],
+        ["item 2"],
+        ["item 3"],
+    ]
+    assert all(result["note_id"] is not None for result in results)
+
+    # Re-submitting is served from the per-note LLM cache
+    r = client.post("/action-items/extract-batch", json={"texts": texts, "use_llm": True})
+    assert len(model.prompts) == 1
+
+
+def test_invalid_batch_answer_falls_back_to_single_prompts(client, monkeypatch):
+    model = FakeModel(batch_answer=[{"number": 7, "action_items": []}])
+    monkeypatch.setattr(llm, "chat", model.chat)
+
+    texts = ["First note here.", "Second note here."]
+    r = client.post("/action-items/extract-batch", json={"texts": texts, "use_llm": True})
+    results = r.json()["data"]["results"]
+    assert [[item["text"] for item in result["items"]] for result in results] == [
+        ["single"],
+        ["single"],
+    ]
+    assert len(model.prompts) == 3
@@ -0,0 +1,79 @@
+import time
+
+from ..app.cache import LRUCache
+from ..app.repositories import ActionItemRepository, NoteRepository, action_item_cache, note_cache
+from ..app.storage import get_backend
+
+
+def test_lru_eviction_by_count_and_weight():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.stats()["evictions"] == 1
+
+    weighted = LRUCache(max_entries=10, max_weight=10, weigher=len)
+    weighted.put("x", "12345")
+    weighted.put("y", "123456")
+    assert weighted.get("x") == (False, None)
+    weighted.put("huge", "x" * 11)
+    assert weighted.get("huge") == (False, None)
+    assert weighted.stats()["weight"] == 6
+
+
+def test_ttl_expiry():
+    cache = LRUCache(ttl=0.01)
+    cache.put("k", "v")
+    time.sleep(0.02)
+    assert cache.get("k") == (False, None)
+    assert cache.stats()["expirations"] == 1
+
+
+def test_tag_invalidation_and_stale_load_protection():
+    cache = LRUCache()
+    cache.put((1, "page"), "one", tag=1)
+    cache.put((2, "page"), "two", tag=2)
+    cache.invalidate_tag(1)
+    assert cache.get((1, "page"))[0] is False
+    assert cache.get((2, "page")) == (True, "two")
+
+    def racing_loader():
+        cache.invalidate("other")  # a write lands while the value is being loaded
+        return "stale"
+
+    assert cache.get_or_load("k", racing_loader) == "stale"
+    assert cache.get("k")[0] is False
+
+
+def test_repository_lookups_are_cached_and_invalidated_by_writes(temp_db):
+    note_hits, item_hits = note_cache.stats()["hits"], action_item_cache.stats()["hits"]
+    note_id = NoteRepository.create_note("cached")["id"]
+    assert NoteRepository.get_note(note_id)["content"] == "cached"
+    assert NoteRepository.get_note(note_id)["content"] == "cached"
+    assert note_cache.stats()["hits"] == note_hits + 1
+
+    ActionItemRepository.create_action_items(["first"], note_id=note_id)
+    assert [r["text"] for r in ActionItemRepository.list_action_items(note_id)] == ["first"]
+    ActionItemRepository.list_action_items(note_id)
+    assert action_item_cache.stats()["hits"] == item_hits + 1
+
+    item_id = ActionItemRepository.create_action_items(["second"], note_id=note_id)[0]
+    assert [r["text"] for r in ActionItemRepository.list_action_items(note_id)] == [
+        "second",
+        "first",
+    ]
+
+    ActionItemRepository.mark_action_item_done(item_id, True)
+    assert ActionItemRepository.list_action_items(note_id)[0]["done"] == 1
+
+    # A miss for an id that does not exist yet is invalidated when it is created
+    assert NoteRepository.get_note(note_id + 1) is None
+    assert NoteRepository.create_note("next")["id"] == note_id + 1
+    assert NoteRepository.get_note(note_id + 1)["content"] == "next"
+
+    # Direct DB writes bypass invalidation, proving reads above were served from cache
+    get_backend().insert_action_items(["behind the cache"], note_id=note_id)
+    assert len(ActionItemRepository.list_action_items(note_id)) == 2
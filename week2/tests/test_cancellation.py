@@ -0,0 +1,221 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from ..app.cancellation import Cancellation, current_cancellation
+from ..app.config import settings
+from ..app.exceptions import ExtractionCancelledError
+from ..app.main import app
+from ..app.metrics import EXTRACTION_CANCELLATIONS, LLM_ABANDONED_CALLS
+from ..app.services import extract, llm
+from ..app.services.batching import MicroBatcher
+from ..app.services.singleflight import SingleFlight
+from ..app.storage import get_backend
+from ..benchmarks.fake_ollama import FakeOllamaServer
+
+
+def _counter(counter, *labels):
+    return counter._values.get(labels, 0.0)
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition never became true")
+        time.sleep(0.01)
+
+
+@pytest.fixture()
+def slow_ollama(monkeypatch):
+    """A fake Ollama server whose replies take half a second to stream"""
+    with FakeOllamaServer(latency_seconds=0.5) as server:
+        monkeypatch.setattr(settings, "ollama_host", server.url)
+        llm.close_client()
+        yield server
+        llm.close_client()
+
+
+def test_streamed_model_call_is_abandoned_mid_reply(temp_db, slow_ollama):
+    abandoned = _counter(LLM_ABANDONED_CALLS, "deadline", "streaming")
+
+    with pytest.raises(ExtractionCancelledError) as raised:
+        extract.extract_action_items_llm(
+            "- ship it", use_cache=False, cancellation=Cancellation.after(0.1)
+        )
+
+    assert raised.value.reason == "deadline"
+    # The caller stops waiting right away; the batched call notices at its next chunk
+    _wait_until(lambda: _counter(LLM_ABANDONED_CALLS, "deadline", "streaming") == abandoned + 1)
+    _wait_until(lambda: slow_ollama.stats()["aborted_streams"] == 1)
+    # Without a cancellation nothing is streamed and the reply is unchanged
+    assert extract.extract_action_items_llm("- ship it", use_cache=False) == ["ship it"]
+    assert slow_ollama.stats()["streamed_chats"] == 1
+
+
+def test_already_cancelled_call_never_reaches_the_model(temp_db, slow_ollama):
+    cancellation = Cancellation()
+    cancellation.cancel()
+
+    with pytest.raises(ExtractionCancelledError):
+        extract.extract_action_items_llm("- ship it", use_cache=False, cancellation=cancellation)
+    assert slow_ollama.stats()["chats"] == 0
+
+
+def test_request_deadline_returns_504_and_stores_nothing(client, slow_ollama):
+    cancelled = _counter(EXTRACTION_CANCELLATIONS, "deadline")
+    body = {"text": "Please send the notes.", "save_note": True, "bypass_cache": True}
+    headers = {"Idempotency-Key": "k", "X-Request-Timeout": "0.1"}
+
+    started = time.monotonic()
+    r = client.post("/action-items/extract-llm", json=body, headers=headers)
+
+    assert r.status_code == 504
+    assert time.monotonic() - started < 0.45
+    assert _counter(EXTRACTION_CANCELLATIONS, "deadline") == cancelled + 1
+    assert get_backend().list_notes() == [] and get_backend().list_action_items() == []
+    # The key was released, so the retry runs instead of replaying the 504
+    r = client.post("/action-items/extract-llm", json=body, headers={"Idempotency-Key": "k"})
+    assert r.status_code == 200 and len(get_backend().list_notes()) == 1
+    assert (
+        client.post(
+            "/action-items/extract-llm", json=body, headers={"X-Request-Timeout": "0"}
+        ).status_code
+        == 422
+    )
+
+
+def test_setting_caps_the_request_timeout(client, slow_ollama, monkeypatch):
+    monkeypatch.setattr(settings, "llm_request_timeout_seconds", 0.1)
+    body = {"text": "Please send the notes.", "bypass_cache": True}
+    assert (
+        client.post(
+            "/action-items/extract-llm", json=body, headers={"X-Request-Timeout": "30"}
+        ).status_code
+        == 504
+    )
+    assert client.post("/action-items/extract-tiered", json=body).status_code == 504
+    assert (
+        client.post(
+            "/action-items/extract-batch", json={"texts": [body["text"]], "use_llm": True}
+        ).status_code
+        == 504
+    )
+    # Confident heuristics never wait for the model, so they beat any deadline
+    assert client.post("/action-items/extract-tiered", json={"text": "- one"}).status_code == 200
+
+
+def test_client_disconnect_aborts_the_model_call_and_skips_writes(client, slow_ollama):
+    body = json.dumps(
+        {"text": "Please send the notes.", "save_note": True, "bypass_cache": True}
+    ).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/action-items/extract-llm",
+        "raw_path": b"/action-items/extract-llm",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    messages = []
+
+    async def call():
+        disconnected = asyncio.Event()
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        task = asyncio.create_task(app(scope, receive, send))
+        await asyncio.sleep(0.15)
+        disconnected.set()
+        await asyncio.wait_for(task, 0.3)
+
+    asyncio.run(call())
+
+    assert messages[0]["status"] == 499
+    _wait_until(lambda: slow_ollama.stats()["aborted_streams"] == 1)
+    assert get_backend().list_notes() == [] and get_backend().list_action_items() == []
+
+
+def test_shared_call_is_abandoned_only_when_every_caller_is():
+    flight = SingleFlight()
+    first, second = Cancellation(), Cancellation()
+    started, release = threading.Event(), threading.Event()
+    scopes = []
+    outcomes = {}
+
+    def work():
+        scopes.append(current_cancellation())
+        started.set()
+        release.wait(5)
+        return "done"
+
+    def call(name, cancellation):
+        try:
+            outcomes[name] = flight.do("key", work, cancellation)
+        except ExtractionCancelledError as e:
+            outcomes[name] = e.reason
+
+    leader = threading.Thread(target=call, args=("first", first))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call, args=("second", second))
+    follower.start()
+    _wait_until(lambda: flight._calls["key"].waiters == 1)
+
+    first.cancel()
+    assert not scopes[0].cancelled
+    second.cancel()
+    follower.join(5)
+    assert outcomes == {"second": "disconnected"}
+    assert scopes[0].cancelled
+
+    release.set()
+    leader.join(5)
+    # The leader's work finished regardless; its caller decides what to keep
+    assert outcomes["first"] == "done"
+
+
+def test_batcher_leaves_cancelled_texts_out_of_the_batch():
+    batches = []
+    batcher = MicroBatcher(
+        run_single=lambda text: text.upper(),
+        run_batch=lambda texts: batches.append(list(texts)) or [text.upper() for text in texts],
+        window_seconds=lambda: 0.1,
+        max_tokens=lambda: 10_000,
+        max_notes=lambda: 16,
+    )
+    cancelled = Cancellation()
+    futures = [
+        batcher.submit("a", Cancellation()),
+        batcher.submit("b", cancelled),
+        batcher.submit("c"),
+    ]
+    cancelled.cancel()
+
+    assert [futures[0].result(5), futures[2].result(5)] == ["A", "C"]
+    with pytest.raises(ExtractionCancelledError):
+        futures[1].result(5)
+    assert batches == [["a", "c"]]
+    assert batcher.stats()["dropped"] == 1
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from ..app.services import extract
+from ..app.services.chunking import chunk_text, estimate_tokens
+
+
+def test_chunks_respect_budget_and_keep_items_whole():
+    text = "\n".join(f"- item {n}\n  continuation of item {n} with detail" for n in range(50))
+    chunks = chunk_text(text, max_tokens=40, is_block_start=extract._is_action_line)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 40 + 1 for chunk in chunks)
+    for chunk in chunks:
+        assert chunk.startswith("- item ")
+    assert "\n".join(chunks) == text
+
+
+def test_oversized_line_is_split_at_sentences():
+    line = " ".join(f"Sentence number {n} is here." for n in range(40))
+    chunks = chunk_text(line, max_tokens=20, is_block_start=extract._is_action_line)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 80 for chunk in chunks)
+    assert " ".join(chunks) == line
+
+
+def test_long_notes_are_extracted_per_chunk_concurrently_and_merged(temp_db, monkeypatch):
+    monkeypatch.setattr(extract.settings, "llm_chunk_tokens", 64)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_model(text):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        # Every window reports a shared item too, which must be deduped
+        return extract.extract_action_items(text) + ["Shared follow-up"]
+
+    monkeypatch.setattr(extract, "_call_llm", fake_model)
+    text = "\n".join(f"- task number {n} for the long transcript" for n in range(40))
+
+    submitted = extract.llm_batcher.stats()["submitted"]
+    started = time.perf_counter()
+    items = extract.extract_action_items_llm(text)
+    elapsed = time.perf_counter() - started
+
+    windows = len(chunk_text(text, 64, extract._is_action_line))
+    assert windows > 4
+    assert items.count("Shared follow-up") == 1
+    assert [item for item in items if item != "Shared follow-up"] == [
+        f"task number {n} for the long transcript" for n in range(40)
+    ]
+    assert max(peak) > 1
+    assert max(peak) <= extract.settings.llm_chunk_concurrency
+    assert elapsed < windows * 0.05
+    # Windows of one note run in parallel rather than packed into one batched prompt
+    assert extract.llm_batcher.stats()["submitted"] == submitted
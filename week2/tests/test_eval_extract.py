@@ -0,0 +1,152 @@
+import json
+
+import pytest
+
+from ..app.config import settings
+from ..app.services.extract import PROMPT_VERSION, extract_action_items
+from ..benchmarks import eval_extract
+from ..benchmarks.fake_ollama import FakeOllamaServer
+
+
+def _perfect_recording(corpus):
+    """A model that always answers with the annotations"""
+    replies = {
+        note.id: {
+            "content": json.dumps({"action_items": note.action_items}),
+            "prompt_tokens": 100,
+            "output_tokens": 10,
+            "seconds": 0.5,
+        }
+        for note in corpus
+    }
+    return {"meta": {"source": "ollama", "prompt_version": PROMPT_VERSION}, "replies": replies}
+
+
+def test_corpus_is_reproducible_and_round_trips(tmp_path):
+    corpus = eval_extract.build_corpus(50, seed=3)
+    assert corpus == eval_extract.build_corpus(50, seed=3)
+    assert len({note.text for note in corpus}) == 50
+
+    path = tmp_path / "corpus.jsonl"
+    eval_extract.write_corpus(corpus, path)
+    assert eval_extract.load_corpus(path) == corpus
+
+
+def test_matching_tolerates_rephrasing_but_not_other_items():
+    gold = ["Send the budget by Friday", "todo: fix the docs"]
+    assert (
+        eval_extract.match_items(
+            ["Ana will send the budget by Friday.", "TODO: Fix the docs"], gold, 0.6
+        )
+        == 2
+    )
+    assert (
+        eval_extract.match_items(["Send the budget", "Send the budget by Friday"], gold, 0.6) == 1
+    )
+    assert eval_extract.match_items(["Attendees: Ana, Bo"], gold, 0.6) == 0
+
+    corpus = [eval_extract.AnnotatedNote("1", "", gold), eval_extract.AnnotatedNote("2", "", [])]
+    quality = eval_extract.score([["Send the budget by Friday", "Attendees: Ana"], []], corpus, 0.6)
+    assert (quality["true_positives"], quality["false_positives"], quality["false_negatives"]) == (
+        1,
+        1,
+        1,
+    )
+    assert quality["precision"] == quality["recall"] == 0.5
+    assert quality["exact_notes"] == 0.5
+
+
+def test_replayed_model_is_scored_against_the_heuristics():
+    corpus = eval_extract.build_corpus(60, seed=1)
+    report = eval_extract.evaluate(corpus, _perfect_recording(corpus), 0.6)
+
+    heuristic, model, tiered = report["heuristic"], report["llm"], report["tiered"]
+    assert model["quality"]["f1"] == 1.0 and model["errors"] == 0
+    assert heuristic["quality"]["f1"] < tiered["quality"]["f1"] < 1.0
+    assert model["latency"]["p50_ms"] == 500.0
+    assert model["tokens"]["per_item"] == pytest.approx(
+        110 * 60 / model["quality"]["true_positives"], abs=0.1
+    )
+    assert heuristic["tokens"]["total"] == 0
+    assert 0 < tiered["escalated_fraction"] < 1
+    assert tiered["tokens"]["total"] == round(110 * 60 * tiered["escalated_fraction"])
+
+
+def test_recording_is_replayed_offline(tmp_path):
+    corpus_path, recording_path = tmp_path / "corpus.jsonl", tmp_path / "recording.json"
+    eval_extract.write_corpus(eval_extract.build_corpus(20, seed=2), corpus_path)
+    host = settings.ollama_host
+
+    with FakeOllamaServer(latency_seconds=0, items=["Call the vendor"]) as server:
+        eval_extract.main(
+            [
+                "--corpus",
+                str(corpus_path),
+                "--record",
+                str(recording_path),
+                "--ollama-host",
+                server.url,
+                "--output",
+                str(tmp_path / "recorded.json"),
+            ]
+        )
+    assert server.stats()["chats"] == 20 and settings.ollama_host == host
+
+    # The server is gone; the replay only needs the recording
+    report = eval_extract.main(
+        [
+            "--corpus",
+            str(corpus_path),
+            "--replay",
+            str(recording_path),
+            "--output",
+            str(tmp_path / "replayed.json"),
+        ]
+    )
+    model = report["extractors"]["llm"]
+    assert report["meta"]["recording"]["source"] == "ollama" and "note" not in report["meta"]
+    assert model["quality"]["true_positives"] == 0 and model["errors"] == 0
+    assert model["quality"]["false_positives"] == 20
+    assert model["tokens"]["total"] > 0
+
+    recording = json.loads(recording_path.read_text())
+    recording["meta"]["prompt_version"] = PROMPT_VERSION - 1
+    recording_path.write_text(json.dumps(recording))
+    with pytest.raises(ValueError, match="prompt version"):
+        eval_extract.main(["--corpus", str(corpus_path), "--replay", str(recording_path)])
+
+
+def test_synthetic_run_is_labelled_and_regressions_fail(tmp_path, capsys):
+    output = tmp_path / "report.json"
+    report = eval_extract.main(["--notes", "30", "--output", str(output)])
+
+    assert report["meta"]["recording"]["source"] == "synthetic" and "note" in report["meta"]
+    # The synthetic model answers like the heuristics
+    assert report["extractors"]["llm"]["quality"] == report["extractors"]["heuristic"]["quality"]
+    assert eval_extract.regressions(report, report, 0.01, 0.25) == []
+
+    better = json.loads(output.read_text())
+    better["extractors"]["heuristic"]["quality"]["recall"] += 0.1
+    better["extractors"]["llm"]["replay_latency"]["p50_ms"] /= 10
+    # Heuristic timings are too noisy to gate on
+    better["extractors"]["heuristic"]["latency"]["p50_ms"] /= 10
+    previous = tmp_path / "previous.json"
+    previous.write_text(json.dumps(better))
+    with pytest.raises(SystemExit):
+        eval_extract.main(["--notes", "30", "--output", str(output), "--compare", str(previous)])
+    printed = capsys.readouterr().out
+    assert "regression: heuristic recall fell" in printed
+    assert "regression: llm replay_latency p50 rose" in printed
+    assert "heuristic latency" not in printed
+
+
+def test_generated_annotations_agree_with_what_the_heuristics_get_right():
+    # Every heuristic item is either annotated exactly or one of the non-task bullets
+    for note in eval_extract.build_corpus(200, seed=4):
+        found = extract_action_items(note.text)
+        distractors = [
+            item for item in found if item.startswith(("Attendees:", "Status:", "Notes taken"))
+        ]
+        assert eval_extract.match_items(found, note.action_items, 1.0) == len(found) - len(
+            distractors
+        )
@@ -1,7 +1,21 @@
+import io
 import os
+import random
+
 import pytest
 
-from ..app.services.extract import extract_action_items
+from ..app.services.extract import (
+    ActionItemStreamParser,
+    _is_action_line,
+    extract_action_items,
+    extract_action_items_detailed,
+    iter_action_items,
+)
+from ..benchmarks.bench_extract import (
+    _legacy_is_action_line,
+    legacy_extract_action_items,
+    make_note,
+)
 
 
 def test_extract_bullets_and_checkboxes():
@@ -17,3 +31,122 @@ def test_extract_bullets_and_checkboxes():
     assert "Set up database" in items
     assert "implement API extract endpoint" in items
     assert "Write tests" in items
+
+
+FUZZ_TOKENS = [
+    "-",
+    "*",
+    "•",
+    "1.",
+    "12.",
+    "1.5",
+    " ",
+    "  ",
+    "\t",
+    "\xa0",
+    "\n",
+    "\n",
+    "\n",
+    "\r",
+    "\r\n",
+    "\x0b",
+    "\x85",
+    "\u2028",
+    "todo:",
+    "TODO:",
+    "Action:",
+    "actİon:",
+    "next:",
+    "[ ]",
+    "[todo]",
+    "[TODO]",
+    "[x]",
+    "Fix",
+    "add",
+    "Check",
+    "investigate",
+    "notes",
+    "the",
+    "İ",
+    ".",
+    "!",
+    "?",
+    "x",
+]
+
+
+def _random_text(rng: random.Random) -> str:
+    return "".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(0, 60)))
+
+
+def _random_chunks(rng: random.Random, text: str):
+    chunks = []
+    while text:
+        size = rng.randint(1, 8)
+        chunks.append(text[:size])
+        text = text[size:]
+    return chunks
+
+
+def test_single_pass_extractor_matches_original_implementation():
+    rng = random.Random(1234)
+    for _ in range(5000):
+        text = _random_text(rng)
+        expected = legacy_extract_action_items(text)
+        detailed = extract_action_items_detailed(text)
+        assert detailed.items == expected, repr(text)
+        has_action_lines = any(_legacy_is_action_line(line) for line in text.splitlines())
+        assert detailed.used_fallback == (not has_action_lines), repr(text)
+        assert list(iter_action_items(_random_chunks(rng, text))) == expected, repr(text)
+        for line in text.splitlines():
+            assert _is_action_line(line) == _legacy_is_action_line(line), repr(line)
+
+
+def test_iter_action_items_streams_file_objects():
+    text = make_note(300_000, seed=3)
+    expected = legacy_extract_action_items(text)
+    assert expected
+    assert list(iter_action_items(io.StringIO(text))) == expected
+    assert extract_action_items(text) == expected
+
+
+def test_iter_action_items_falls_back_to_imperative_sentences():
+    text = "We met today. Fix the login bug! Nothing else.\nCheck the logs?"
+    assert list(iter_action_items(iter(text))) == ["Fix the login bug!", "Check the logs?"]
+
+
+def test_fallback_keeps_only_sentences_that_can_become_items():
+    parser = ActionItemStreamParser()
+    for _ in range(10_000):
+        parser.feed("chat message without any punctuation\n")
+    assert len(parser._sentence_parts) == 0
+    parser.feed("end. Fix the build\nwhen you can\n")
+    assert parser.close() == ["Fix the build\nwhen you can"]
+
+
+def test_buffered_chars_stay_within_the_budget_on_large_input_without_markers():
+    budget = 10_000
+    parser = ActionItemStreamParser(max_buffered_chars=budget)
+    sentences = [f"Fix bug number {n}. We chatted about it. " for n in range(50_000)]
+    found = []
+    for start in range(0, len(sentences), 100):
+        found += parser.feed("\n".join(sentences[start : start + 100]) + "\n")
+        assert parser._fallback_chars + parser._sentence_chars <= budget
+    # One imperative "sentence" that never ends is dropped, not buffered
+    for _ in range(10_000):
+        parser.feed("Add another line to the endless sentence\n")
+        assert sum(map(len, parser._sentence_parts)) <= budget
+    found += parser.close()
+
+    assert parser.used_fallback and parser.truncated
+    assert found == [f"Fix bug number {n}." for n in range(len(found))]
+    assert sum(map(len, found)) <= budget
+
+    # Past the budget repeats are no longer all caught, but nothing is lost
+    parser = ActionItemStreamParser(max_buffered_chars=100)
+    items = (
+        parser.feed("".join(f"- task {n}\n" for n in range(50)) + "- task 0\n- task 49\n")
+        + parser.close()
+    )
+    assert parser.truncated and sum(map(len, parser._seen)) <= 100
+    assert items == [f"task {n}" for n in range(50)] + ["task 49"]
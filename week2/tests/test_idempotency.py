@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+from ..app.config import settings
+from ..app.exceptions import DatabaseOperationError
+from ..app.repositories import AsyncActionItemRepository
+from ..app.services import extract
+from ..app.storage import get_backend
+
+
+@pytest.fixture()
+def model(monkeypatch):
+    """Fake model counting its calls; ``gate`` holds calls until set"""
+    calls = []
+    gate = threading.Event()
+    gate.set()
+
+    def fake_model(text):
+        calls.append(text)
+        gate.wait(5)
+        return ["Send the notes"]
+
+    monkeypatch.setattr(extract, "_call_llm", fake_model)
+    monkeypatch.setattr(settings, "llm_batch_enabled", False)
+    return calls, gate
+
+
+def _post(client, path, body, key):
+    return client.post(path, json=body, headers={"Idempotency-Key": key})
+
+
+def test_replayed_key_returns_stored_response_without_rerunning(client, model):
+    calls, _ = model
+    body = {"text": "Please send the notes.", "save_note": True, "bypass_cache": True}
+
+    first = _post(client, "/action-items/extract-llm", body, "retry-1")
+    second = _post(client, "/action-items/extract-llm", body, "retry-1")
+
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 1
+    assert len(get_backend().list_notes()) == 1 and len(get_backend().list_action_items()) == 1
+
+    # A different key is a different request
+    assert _post(client, "/action-items/extract-llm", body, "retry-2").json() != first.json()
+    assert len(calls) == 2
+
+
+def test_requests_without_key_are_not_deduplicated(client):
+    for _ in range(2):
+        assert (
+            client.post(
+                "/action-items/extract", json={"text": "- one", "save_note": True}
+            ).status_code
+            == 200
+        )
+    assert len(get_backend().list_notes()) == 2
+
+
+def test_key_reused_for_a_different_request_is_rejected(client):
+    assert _post(client, "/action-items/extract", {"text": "- one"}, "k").status_code == 200
+    r = _post(client, "/action-items/extract", {"text": "- two"}, "k")
+    assert r.status_code == 422
+    # Keys are scoped per endpoint
+    assert _post(client, "/action-items/extract-tiered", {"text": "- two"}, "k").status_code == 200
+
+
+def test_invalid_key_is_rejected(client):
+    assert _post(client, "/action-items/extract", {"text": "- one"}, "x" * 256).status_code == 400
+
+
+def test_duplicate_waits_for_the_in_flight_original(client, model):
+    calls, gate = model
+    gate.clear()
+    body = {"text": "Please send the notes.", "save_note": True, "bypass_cache": True}
+    responses = []
+
+    def send():
+        responses.append(_post(client, "/action-items/extract-llm", body, "slow"))
+
+    threads = [threading.Thread(target=send) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    gate.set()
+    for thread in threads:
+        thread.join(10)
+
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert len({r.content for r in responses}) == 1
+    assert sum(r.headers.get("idempotent-replayed") == "true" for r in responses) == 2
+    assert len(calls) == 1
+    assert len(get_backend().list_notes()) == 1
+
+
+def test_duplicate_gets_409_when_the_original_outlasts_the_wait(client, model, monkeypatch):
+    _, gate = model
+    gate.clear()
+    monkeypatch.setattr(settings, "idempotency_wait_seconds", 0.2)
+    body = {"text": "Please send the notes."}
+    original = []
+    thread = threading.Thread(
+        target=lambda: original.append(_post(client, "/action-items/extract-llm", body, "k"))
+    )
+    thread.start()
+    time.sleep(0.2)
+
+    assert _post(client, "/action-items/extract-llm", body, "k").status_code == 409
+    gate.set()
+    thread.join(10)
+    assert original[0].status_code == 200
+
+
+def test_server_errors_release_the_key_but_client_errors_are_replayed(client, monkeypatch):
+    real_create = AsyncActionItemRepository.create_extraction
+    failures = [DatabaseOperationError("insert_extraction_batch", "disk I/O error")]
+
+    async def flaky_create(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return await real_create(*args, **kwargs)
+
+    monkeypatch.setattr(AsyncActionItemRepository, "create_extraction", flaky_create)
+    body = {"text": "- one", "save_note": True}
+    assert _post(client, "/action-items/extract", body, "k").status_code == 500
+    assert _post(client, "/action-items/extract", body, "k").status_code == 200
+    assert len(get_backend().list_notes()) == 1
+
+    first = _post(client, "/action-items/extract", {"text": "   "}, "blank")
+    second = _post(client, "/action-items/extract", {"text": "   "}, "blank")
+    assert first.status_code == second.status_code == 400
+    assert second.headers["idempotent-replayed"] == "true"
+
+
+def test_keys_expire_after_the_ttl(client, monkeypatch):
+    monkeypatch.setattr(settings, "idempotency_ttl_seconds", 0.05)
+    body = {"text": "- one", "save_note": True}
+    first = _post(client, "/action-items/extract", body, "k")
+    time.sleep(0.1)
+    second = _post(client, "/action-items/extract", body, "k")
+
+    assert "idempotent-replayed" not in second.headers
+    assert second.json()["data"]["note_id"] != first.json()["data"]["note_id"]
+    assert get_backend().purge_idempotency_keys(time.time() + 1) == 1
+
+
+def test_job_submission_is_idempotent(client, model):
+    body = {"text": "Please send the notes.", "save_note": True}
+    first = _post(client, "/jobs/extract-llm", body, "job")
+    second = _post(client, "/jobs/extract-llm", body, "job")
+    assert first.status_code == second.status_code == 202
+    assert second.json()["data"]["id"] == first.json()["data"]["id"]
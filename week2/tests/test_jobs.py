@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+from ..app import jobs
+from ..app.config import settings
+from ..app.services import extract
+from ..app.storage import get_backend
+
+
+@pytest.fixture()
+def model(monkeypatch):
+    """Fake model whose behaviour per call is taken from ``outcomes`` (default: succeed)"""
+    calls = []
+    outcomes = []
+
+    def fake_model(text):
+        calls.append(text)
+        outcome = outcomes.pop(0) if outcomes else None
+        if isinstance(outcome, Exception):
+            raise outcome
+        return ["Schedule the retro"]
+
+    monkeypatch.setattr(extract, "_call_llm", fake_model)
+    monkeypatch.setattr(settings, "job_retry_backoff_seconds", 0.0)
+    monkeypatch.setattr(settings, "job_poll_interval_seconds", 0.05)
+    return calls, outcomes
+
+
+def test_submit_returns_job_id_and_result_can_be_collected(client, model):
+    r = client.post("/jobs/extract-llm", json={"text": "We should sync soon.", "save_note": True})
+    assert r.status_code == 202
+    job = r.json()["data"]
+    assert job["status"] in ("pending", "running", "succeeded")
+    assert job["kind"] == "extract_llm"
+
+    r = client.get(f"/jobs/{job['id']}", params={"wait": 5})
+    assert r.status_code == 200
+    finished = r.json()["data"]
+    assert finished["status"] == "succeeded"
+    assert finished["attempts"] == 1
+
+    r = client.get(f"/jobs/{job['id']}/result")
+    assert r.status_code == 200
+    result = r.json()["data"]
+    assert [item["text"] for item in result["items"]] == ["Schedule the retro"]
+    assert result["note_id"] is not None
+    assert get_backend().get_note(result["note_id"])["content"] == "We should sync soon."
+
+
+def test_failed_attempts_are_retried(client, model):
+    calls, outcomes = model
+    outcomes.append(RuntimeError("model down"))
+
+    job_id = client.post("/jobs/extract-llm", json={"text": "Retry me."}).json()["data"]["id"]
+    finished = client.get(f"/jobs/{job_id}", params={"wait": 5}).json()["data"]
+
+    assert finished["status"] == "succeeded"
+    assert finished["attempts"] == 2
+    assert len(calls) == 2
+
+
+def test_job_fails_after_max_attempts(client, model, monkeypatch):
+    calls, outcomes = model
+    monkeypatch.setattr(settings, "job_max_attempts", 2)
+    outcomes.extend([RuntimeError("model down"), RuntimeError("still down")])
+
+    job_id = client.post("/jobs/extract-llm", json={"text": "Doomed."}).json()["data"]["id"]
+    finished = client.get(f"/jobs/{job_id}", params={"wait": 5}).json()["data"]
+
+    assert finished["status"] == "failed"
+    assert finished["attempts"] == 2
+    assert "still down" in finished["error"]
+    r = client.get(f"/jobs/{job_id}/result")
+    assert r.status_code == 409
+    assert "still down" in r.json()["detail"]
+
+
+def test_unfinished_and_unknown_jobs(client, monkeypatch):
+    jobs.job_workers.stop()
+    job_id = client.post("/jobs/extract-llm", json={"text": "Later."}).json()["data"]["id"]
+
+    started = time.monotonic()
+    r = client.get(f"/jobs/{job_id}", params={"wait": 0.3})
+    assert r.json()["data"]["status"] == "pending"
+    assert time.monotonic() - started >= 0.3
+    assert client.get(f"/jobs/{job_id}/result").status_code == 409
+    assert client.get("/jobs/999999").status_code == 404
+
+
+def test_interrupted_jobs_are_requeued_on_start(temp_db, model):
+    row = get_backend().insert_job(jobs.JOB_EXTRACT_LLM, '{"text": "Crashed mid-call."}', 3, 0.0)
+    assert get_backend().claim_job(time.time())["id"] == row["id"]
+    assert get_backend().claim_job(time.time()) is None  # already claimed
+
+    # Simulates a restart: the new process finds the job still 'running'
+    pool = jobs.JobWorkerPool()
+    pool.start(workers=1)
+    try:
+        deadline = time.monotonic() + 5
+        while (
+            get_backend().get_job(row["id"])["status"] != "succeeded"
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.02)
+    finally:
+        pool.stop()
+    finished = get_backend().get_job(row["id"])
+    assert finished["status"] == "succeeded"
+    assert finished["attempts"] == 2
@@ -0,0 +1,67 @@
+import pytest
+from ollama import ChatResponse, Message
+
+from ..app.config import settings
+from ..app.services import extract, llm
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def chat(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.fail:
+            raise ConnectionError("connection refused")
+        load = 2_500_000_000 if len(self.calls) == 1 else 0
+        return ChatResponse(
+            model=kwargs["model"],
+            load_duration=load,
+            message=Message(role="assistant", content='{"action_items": ["Ship it", "ship it"]}'),
+        )
+
+
+@pytest.fixture()
+def fake_client(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(llm, "get_client", lambda: client)
+    return client
+
+
+def test_client_is_shared_and_closed(monkeypatch):
+    monkeypatch.setattr(settings, "ollama_host", "http://ollama.internal:11434")
+    llm.close_client()
+    try:
+        client = llm.get_client()
+        assert llm.get_client() is client
+        assert str(client._client.base_url).startswith("http://ollama.internal:11434")
+    finally:
+        llm.close_client()
+    assert llm._client is None
+
+
+def test_extraction_uses_configured_model_and_keep_alive(fake_client, monkeypatch):
+    monkeypatch.setattr(settings, "ollama_model", "llama3.2:1b")
+    monkeypatch.setattr(settings, "ollama_temperature", 0.3)
+    monkeypatch.setattr(settings, "ollama_keep_alive", "1h")
+
+    assert extract._call_llm("- ship it") == ["Ship it"]
+    call = fake_client.calls[0]
+    assert call["model"] == "llama3.2:1b"
+    assert call["options"] == {"temperature": 0.3}
+    assert call["keep_alive"] == "1h"
+
+
+def test_warm_up_reports_cold_and_warm_latency(fake_client):
+    report = llm.warm_up()
+    assert report.model == settings.ollama_model
+    assert report.load_seconds == 2.5
+    assert report.cold_seconds >= 0 and report.warm_seconds >= 0
+    assert len(fake_client.calls) == 2
+    assert all(call["keep_alive"] == settings.ollama_keep_alive for call in fake_client.calls)
+
+
+def test_warm_up_failure_does_not_raise(monkeypatch):
+    monkeypatch.setattr(llm, "get_client", lambda: FakeClient(fail=True))
+    assert llm.warm_up() is None
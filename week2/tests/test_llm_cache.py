@@ -0,0 +1,100 @@
+import pytest
+
+from ..app import db
+from ..app.services import extract, llm_cache
+from .conftest import sqlite_only
+
+
+@pytest.fixture()
+def fake_model(temp_db, monkeypatch):
+    calls = []
+
+    def fake_call_llm(text):
+        calls.append(text)
+        return [f"item {len(calls)}"]
+
+    monkeypatch.setattr(extract, "_call_llm", fake_call_llm)
+    return calls
+
+
+def test_repeated_text_is_served_from_cache(fake_model):
+    first = extract.extract_action_items_llm("- write report\n")
+    # Whitespace-only differences normalize to the same key
+    second = extract.extract_action_items_llm("   - write report   \r\n\r\n")
+    assert first == second == ["item 1"]
+    assert len(fake_model) == 1
+    assert llm_cache.stats()["hits"] >= 1
+
+
+def test_bypass_refreshes_cached_result(fake_model):
+    assert extract.extract_action_items_llm("- a") == ["item 1"]
+    assert extract.extract_action_items_llm("- a", use_cache=False) == ["item 2"]
+    assert extract.extract_action_items_llm("- a") == ["item 2"]
+    assert len(fake_model) == 2
+
+
+def test_key_depends_on_model_and_prompt_version():
+    base = llm_cache.cache_key("- a", "m1", 0.0, 1)
+    assert base == llm_cache.cache_key("  - a  ", "m1", 0.0, 1)
+    assert base != llm_cache.cache_key("- a", "m2", 0.0, 1)
+    assert base != llm_cache.cache_key("- a", "m1", 0.5, 1)
+    assert base != llm_cache.cache_key("- a", "m1", 0.0, 2)
+
+
+def test_failures_are_not_cached(temp_db, monkeypatch):
+    def broken(text):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(extract, "_call_llm", broken)
+    assert extract.extract_action_items_llm("- a") == []
+    monkeypatch.setattr(extract, "_call_llm", lambda text: ["recovered"])
+    assert extract.extract_action_items_llm("- a") == ["recovered"]
+
+
+def test_lru_eviction_respects_size_cap(fake_model, monkeypatch):
+    monkeypatch.setattr(extract.settings, "llm_cache_max_entries", 2)
+    monkeypatch.setattr(db, "LLM_CACHE_TOUCH_SECONDS", 0.0)
+    for text in ("- a", "- b"):
+        extract.extract_action_items_llm(text)
+    extract.extract_action_items_llm("- a")  # touch "a" so "b" is least recently used
+    extract.extract_action_items_llm("- c")
+    assert len(fake_model) == 3
+
+    extract.extract_action_items_llm("- a")
+    assert len(fake_model) == 3
+    extract.extract_action_items_llm("- b")
+    assert len(fake_model) == 4
+
+
+@sqlite_only
+def test_hits_are_reads_and_touch_last_used_at_coarsely(temp_db):
+    def last_used(key):
+        with db.get_db_connection() as connection:
+            return connection.execute(
+                "SELECT last_used_at FROM llm_extraction_cache WHERE key = ?", (key,)
+            ).fetchone()[0]
+
+    assert db.put_llm_cache_entry("a", "m", '["a"]', 1000.0, 2) == 0
+    assert db.get_llm_cache_entry("a", 1000.0 + db.LLM_CACHE_TOUCH_SECONDS / 2) == '["a"]'
+    assert last_used("a") == 1000.0
+    assert db.get_llm_cache_entry("a", 1000.0 + db.LLM_CACHE_TOUCH_SECONDS) == '["a"]'
+    assert last_used("a") == 1000.0 + db.LLM_CACHE_TOUCH_SECONDS
+
+    # Replacing an entry does not count towards the cap; a new one past it evicts
+    assert db.put_llm_cache_entry("a", "m", '["a2"]', 2000.0, 2) == 0
+    assert db.put_llm_cache_entry("b", "m", '["b"]', 2001.0, 2) == 0
+    assert db.put_llm_cache_entry("c", "m", '["c"]', 2002.0, 2) == 1
+    assert db.get_llm_cache_entry("a", 2003.0) is None
+    # The running count starts from the table again when the pool is reopened
+    db.close_pool()
+    assert db.put_llm_cache_entry("d", "m", '["d"]', 2004.0, 2) == 1
+    assert [db.get_llm_cache_entry(key, 2005.0) for key in "bcd"] == [None, '["c"]', '["d"]']
+
+
+def test_extract_llm_endpoint_honours_bypass_flag(client, fake_model):
+    for bypass in (False, False, True):
+        r = client.post(
+            "/action-items/extract-llm", json={"text": "- ship", "bypass_cache": bypass}
+        )
+        assert r.status_code == 200
+    assert len(fake_model) == 2
@@ -0,0 +1,91 @@
+from ..app import db
+from ..app.config import settings
+from ..app.services import extract, llm
+from ..benchmarks import load_test
+from ..benchmarks.fake_ollama import FakeOllamaServer
+
+
+def test_fake_ollama_answers_single_batched_and_streamed_chats(monkeypatch):
+    with FakeOllamaServer(latency_seconds=0) as server:
+        monkeypatch.setattr(settings, "ollama_host", server.url)
+        llm.close_client()
+        try:
+            assert extract._call_llm("- buy milk\nhello\n* fix bug") == ["buy milk", "fix bug"]
+            assert extract._call_llm_batch(["- a thing", "todo: b", "nothing"]) == [
+                ["a thing"],
+                ["todo: b"],
+                [],
+            ]
+            parts = list(
+                llm.chat([{"role": "user", "content": extract.build_prompt("- x")}], stream=True)
+            )
+        finally:
+            llm.close_client()
+
+    assert "".join(part.message.content for part in parts) == '{"action_items": ["x"]}'
+    assert parts[-1].done and not any(part.done for part in parts[:-1])
+    assert server.stats()["chats"] == 3 and server.stats()["notes"] == 5
+
+
+def test_percentile_interpolates():
+    assert load_test.percentile([], 50) == 0.0
+    assert load_test.percentile([1.0], 99) == 1.0
+    assert load_test.percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert load_test.percentile([1.0, 2.0, 3.0, 4.0], 100) == 4.0
+
+
+def test_load_test_reports_every_level_and_restores_settings(tmp_path, capsys):
+    db_path, host = db.DB_PATH, settings.ollama_host
+    output = tmp_path / "report.json"
+
+    report = load_test.main(
+        [
+            "--concurrency",
+            "1,4",
+            "--requests",
+            "30",
+            "--seed-notes",
+            "3",
+            "--llm-latency-ms",
+            "1",
+            "--llm-per-note-ms",
+            "0",
+            "--output",
+            str(output),
+        ]
+    )
+
+    assert [level["concurrency"] for level in report["levels"]] == [1, 4]
+    for level in report["levels"]:
+        assert level["overall"]["requests"] == 30
+        assert level["overall"]["errors"] == 0
+        assert set(level["operations"]) <= set(load_test.OPERATIONS)
+        assert (
+            level["overall"]["p50_ms"] <= level["overall"]["p95_ms"] <= level["overall"]["p99_ms"]
+        )
+    assert output.exists()
+    assert load_test.compare(report, report)[0] == "concurrency 1:"
+    assert (db.DB_PATH, settings.ollama_host) == (db_path, host)
+
+
+def test_mark_done_is_skipped_until_there_are_action_items(tmp_path):
+    report = load_test.main(
+        [
+            "--concurrency",
+            "2",
+            "--requests",
+            "10",
+            "--seed-notes",
+            "0",
+            "--mix",
+            "mark_done=1",
+            "--llm-latency-ms",
+            "0",
+            "--output",
+            str(tmp_path / "report.json"),
+        ]
+    )
+
+    [level] = report["levels"]
+    assert level["skipped"] == {"mark_done": 10}
+    assert level["overall"]["requests"] == 0 and level["operations"] == {}
@@ -0,0 +1,125 @@
+import re
+
+import pytest
+
+from ..app import db
+from ..app.metrics import DB_CALL_SECONDS, EXTRACTION_SECONDS, Histogram, Registry, _Metric, timed
+from ..app.services import extract
+from ..app.storage import get_backend
+
+
+def _sample(body, name, **labels):
+    """Value of the sample ``name`` whose labels include ``labels``"""
+    for line in body.splitlines():
+        if line.startswith("#") or not line.startswith(name):
+            continue
+        match = re.match(r"([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$", line)
+        if match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match.group(2) or ""))
+        if all(found.get(key) == value for key, value in labels.items()):
+            return float(match.group(3))
+    return None
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram("demo_seconds", "Demo.", ("op",), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "read")
+    body = registry.render()
+    assert 'demo_seconds_bucket{op="read",le="0.1"} 1' in body
+    assert 'demo_seconds_bucket{op="read",le="1"} 2' in body
+    assert 'demo_seconds_bucket{op="read",le="+Inf"} 3' in body
+    assert 'demo_seconds_count{op="read"} 3' in body
+    assert "# TYPE demo_seconds histogram" in body
+
+
+def test_metric_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("demo", "Demo.")
+
+
+def test_timed_generators_cover_the_whole_iteration():
+    histogram = Histogram("gen_seconds", "Demo.", ("function", "outcome"))
+
+    @timed(histogram)
+    def numbers():
+        yield 1
+        raise RuntimeError("boom")
+
+    iterator = numbers()
+    assert next(iterator) == 1
+    assert histogram.snapshot("numbers", "error") == (0, 0.0)
+    try:
+        next(iterator)
+    except RuntimeError:
+        pass
+    assert histogram.snapshot("numbers", "error")[0] == 1
+
+
+def test_metrics_endpoint_reports_routes_db_and_extraction(client, monkeypatch):
+    db_calls_before = DB_CALL_SECONDS.snapshot("insert_extraction_batch", "ok")[0]
+    client.post("/action-items/extract", json={"text": "- ship it", "save_note": True})
+    client.get("/notes/999999")
+
+    def broken(text):
+        raise RuntimeError("model down")
+
+    monkeypatch.setattr(extract, "_call_llm", broken)
+    failures_before = EXTRACTION_SECONDS.snapshot("extract_action_items_llm", "error")[0]
+    assert extract.extract_action_items_llm("Nothing here.", use_cache=False) == []
+    assert (
+        EXTRACTION_SECONDS.snapshot("extract_action_items_llm", "error")[0] == failures_before + 1
+    )
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = r.text
+
+    assert (
+        _sample(body, "week2_http_requests_total", route="/action-items/extract", status="200") >= 1
+    )
+    assert _sample(body, "week2_http_requests_total", route="/notes/{note_id}", status="404") >= 1
+    assert (
+        _sample(body, "week2_http_request_duration_seconds_count", route="/action-items/extract")
+        >= 1
+    )
+    # The scrape itself is in flight while the body is rendered
+    assert _sample(body, "week2_http_requests_in_flight", method="GET") == 1
+    assert (
+        _sample(
+            body,
+            "week2_extraction_duration_seconds_count",
+            function="extract_action_items",
+            outcome="ok",
+        )
+        >= 1
+    )
+    assert (
+        _sample(
+            body,
+            "week2_extraction_duration_seconds_count",
+            function="extract_action_items_llm",
+            outcome="error",
+        )
+        >= 1
+    )
+    assert _sample(body, "week2_lookup_cache_hits_total", cache="notes") is not None
+    assert _sample(body, "week2_llm_singleflight_in_flight") == 0
+    assert body.count("# TYPE week2_lookup_cache_hits_total counter") == 1
+    if get_backend().name == "sqlite":
+        assert (
+            _sample(
+                body,
+                "week2_db_call_duration_seconds_count",
+                function="insert_extraction_batch",
+                outcome="ok",
+            )
+            == db_calls_before + 1
+        )
+        assert _sample(body, "week2_db_pool_max_size") == db.get_pool().max_size
+    else:
+        # Memory storage never opens the database, not even for its pool stats
+        assert "week2_db_pool" not in body
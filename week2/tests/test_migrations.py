@@ -0,0 +1,100 @@
+import sqlite3
+
+from ..app import db
+from ..app.migrations import LATEST_VERSION, MIGRATIONS, apply_migrations, get_schema_version
+from .conftest import sqlite_only
+
+
+def _query_plan(connection, sql, params=()):
+    rows = connection.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[3] for row in rows]
+
+
+@sqlite_only
+def test_init_db_applies_all_migrations_once(temp_db):
+    with db.get_db_connection() as connection:
+        assert get_schema_version(connection) == LATEST_VERSION
+        # Re-running is a no-op
+        assert apply_migrations(connection) == LATEST_VERSION
+    assert db.init_db() == LATEST_VERSION
+
+
+def test_upgrades_database_created_before_migrations(tmp_path):
+    connection = sqlite3.connect(tmp_path / "legacy.db")
+    connection.execute(
+        "CREATE TABLE notes (id INTEGER PRIMARY KEY AUTOINCREMENT, content TEXT NOT NULL, "
+        "created_at TEXT DEFAULT (datetime('now')))"
+    )
+    connection.execute(
+        "CREATE TABLE action_items (id INTEGER PRIMARY KEY AUTOINCREMENT, note_id INTEGER, "
+        "text TEXT NOT NULL, done INTEGER DEFAULT 0, created_at TEXT DEFAULT (datetime('now')))"
+    )
+    connection.execute("INSERT INTO notes (content) VALUES ('kept')")
+    connection.commit()
+
+    assert apply_migrations(connection) == LATEST_VERSION
+    assert connection.execute("SELECT content FROM notes").fetchone()[0] == "kept"
+    connection.close()
+
+
+def test_covering_index_from_earlier_builds_is_replaced(tmp_path):
+    connection = sqlite3.connect(tmp_path / "covering.db")
+    for migration in MIGRATIONS[:5]:
+        for statement in migration.statements:
+            connection.execute(statement)
+    connection.execute(
+        "CREATE INDEX idx_action_items_note_id "
+        "ON action_items (note_id, id, text, done, created_at)"
+    )
+    connection.execute("PRAGMA user_version = 5")
+    connection.commit()
+
+    assert apply_migrations(connection) == LATEST_VERSION
+    indexes = connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'action_items'"
+    ).fetchall()
+    assert [name for (name,) in indexes] == ["idx_action_items_note"]
+    connection.close()
+
+
+def _uses_index(step):
+    # A SEARCH, or an ordered walk of an index; never a full table scan
+    return step.startswith("SEARCH") or (step.startswith("SCAN") and "INDEX" in step)
+
+
+@sqlite_only
+def test_listing_queries_use_indexes_without_scanning_or_sorting(temp_db):
+    with db.get_db_connection() as connection:
+        for page in ((db.MAX_ROWID, -1), (db.MAX_ROWID, 100), (42, 100)):
+            by_note = _query_plan(connection, db.LIST_ACTION_ITEMS_BY_NOTE_SQL, (1, *page))
+            unfiltered = _query_plan(connection, db.LIST_ACTION_ITEMS_SQL, page)
+            notes = _query_plan(connection, db.LIST_NOTES_SQL, page)
+
+            assert by_note == [
+                "SEARCH action_items USING INDEX idx_action_items_note (note_id=? AND id<?)"
+            ]
+            assert unfiltered == ["SEARCH action_items USING INTEGER PRIMARY KEY (rowid<?)"]
+            assert notes == ["SEARCH notes USING INTEGER PRIMARY KEY (rowid<?)"]
+            for plan in (by_note, unfiltered, notes):
+                assert not any(step.startswith("SCAN") for step in plan)
+                assert not any("TEMP B-TREE" in step for step in plan)
+
+
+@sqlite_only
+def test_hot_lookups_are_served_by_indexes(temp_db):
+    queries = [
+        ("SELECT items FROM llm_extraction_cache WHERE key = ?", ("k",)),
+        ("SELECT key FROM llm_extraction_cache ORDER BY last_used_at ASC LIMIT ?", (10,)),
+        (
+            "SELECT id FROM jobs WHERE status = 'pending' AND run_after <= ? "
+            "ORDER BY run_after, id LIMIT 1",
+            (0,),
+        ),
+        ("SELECT status FROM idempotency_keys WHERE scope = ? AND key = ?", ("s", "k")),
+        ("DELETE FROM idempotency_keys WHERE expires_at <= ?", (0,)),
+    ]
+    with db.get_db_connection() as connection:
+        for sql, params in queries:
+            plan = _query_plan(connection, sql, params)
+            assert plan and all(_uses_index(step) for step in plan), (sql, plan)
+            assert not any("TEMP B-TREE" in step for step in plan), (sql, plan)
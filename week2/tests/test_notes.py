@@ -0,0 +1,59 @@
+import json
+
+from ..app import db
+from ..app.storage import get_backend
+
+
+def _page(client, url, **params):
+    r = client.get(url, params=params)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    return body["data"], body["next_cursor"]
+
+
+def test_create_and_get_note(client):
+    r = client.post("/notes", json={"content": "  Hello world  "})
+    assert r.status_code == 200, r.text
+    note = r.json()["data"]
+    assert note["content"] == "Hello world"
+
+    r = client.get(f"/notes/{note['id']}")
+    assert r.status_code == 200
+    assert r.json()["data"] == note
+
+    assert client.get("/notes/999999").status_code == 404
+
+
+def test_list_notes_pages_with_cursor(client):
+    for n in range(5):
+        get_backend().insert_note(f"note {n}")
+
+    seen = []
+    notes, cursor = _page(client, "/notes", limit=2)
+    seen.extend(note["content"] for note in notes)
+    while cursor is not None:
+        notes, cursor = _page(client, "/notes", limit=2, cursor=cursor)
+        seen.extend(note["content"] for note in notes)
+
+    assert seen == [f"note {n}" for n in reversed(range(5))]
+
+
+def test_list_notes_rejects_bad_cursor_and_limit(client):
+    assert client.get("/notes", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/notes", params={"limit": 0}).status_code == 422
+
+
+def test_list_notes_streams_ndjson(client):
+    for n in range(3):
+        get_backend().insert_note(f"note {n}")
+    paged = client.get("/notes").json()["data"]
+
+    for kwargs in ({"params": {"stream": 1}}, {"headers": {"Accept": "application/x-ndjson"}}):
+        with client.stream("GET", "/notes", **kwargs) as r:
+            assert r.status_code == 200
+            assert r.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in r.iter_lines() if line]
+        assert lines == paged
+
+    if get_backend().name == "sqlite":
+        assert db.pool_stats()["in_use"] == 0
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from ..app import db
+from ..app.pool import ConnectionPool, PoolClosedError, PoolTimeoutError
+from .conftest import sqlite_only
+
+
+def test_connections_are_configured_and_reused(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", max_size=2, busy_timeout_ms=1234)
+    with pool.connection() as first:
+        assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert first.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert first.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+    with pool.connection() as second:
+        assert second is first
+
+    stats = pool.stats()
+    assert stats["size"] == 1
+    assert stats["in_use"] == 0
+    assert stats["acquired"] == 2
+    pool.close()
+
+
+def test_exhausted_pool_waits_and_records_metrics(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", max_size=1, timeout=5)
+    held = pool.acquire()
+    released = threading.Timer(0.05, pool.release, args=(held,))
+    released.start()
+
+    with pool.connection() as connection:
+        assert connection is held
+        assert pool.stats()["in_use"] == 1
+
+    stats = pool.stats()
+    assert stats["waits"] == 1
+    assert stats["wait_time_seconds"] > 0
+    pool.close()
+
+
+def test_timeout_and_close(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", max_size=1, timeout=0.01)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    pool.release(held)
+
+    pool.close()
+    with pytest.raises(PoolClosedError):
+        pool.acquire()
+
+
+@sqlite_only
+def test_db_functions_share_the_pool(temp_db):
+    note_id = db.insert_note("pooled note")["id"]
+    db.insert_action_items(["first", "second"], note_id=note_id)
+    assert len(db.list_action_items(note_id)) == 2
+
+    stats = db.pool_stats()
+    assert stats["size"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_close_wakes_blocked_acquirers(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", max_size=1, timeout=10)
+    held = pool.acquire()
+    errors = []
+
+    def wait_for_connection():
+        try:
+            pool.acquire()
+        except PoolClosedError as e:
+            errors.append(e)
+
+    waiters = [threading.Thread(target=wait_for_connection) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    while pool.stats()["waits"] < 3:
+        time.sleep(0.001)
+
+    pool.close()
+    for waiter in waiters:
+        waiter.join(timeout=1)
+    assert not any(waiter.is_alive() for waiter in waiters)
+    assert len(errors) == 3
+
+    pool.release(held)
+    assert pool.stats()["in_use"] == 0
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from ..app.config import settings
+from ..app.main import app
+from ..app.services import extract, llm
+from ..app.services.extract import StreamedItemsParser
+from ..app.storage import get_backend
+from ..benchmarks.fake_ollama import FakeOllamaServer
+
+NOTE = "Kickoff notes.\n- Draft the agenda\nWe agreed to ship on Friday."
+
+
+@pytest.fixture()
+def slow_ollama(monkeypatch):
+    """Fake Ollama streaming its answer over half a second"""
+    with FakeOllamaServer(
+        latency_seconds=0.5, items=["Email the team", "draft the agenda"]
+    ) as server:
+        monkeypatch.setattr(settings, "ollama_host", server.url)
+        llm.close_client()
+        yield server
+        llm.close_client()
+
+
+def _stream(payload, headers=(), disconnect_after=None):
+    """POST to /action-items/extract-stream over raw ASGI; return (status, [(secs, event, data)])"""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/action-items/extract-stream",
+        "raw_path": b"/action-items/extract-stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    status = []
+    events = []
+
+    async def call():
+        received = False
+        done = asyncio.Event()
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            if disconnect_after is None:
+                await done.wait()
+            else:
+                await asyncio.sleep(disconnect_after)
+            return {"type": "http.disconnect"}
+
+        started = time.monotonic()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+                return
+            for block in message.get("body", b"").decode().split("\n\n"):
+                if block:
+                    event, data = block.split("\n")
+                    events.append(
+                        (
+                            time.monotonic() - started,
+                            event[len("event: ") :],
+                            json.loads(data[len("data: ") :]),
+                        )
+                    )
+            if not message.get("more_body", False):
+                done.set()
+
+        await asyncio.wait_for(app(scope, receive, send), 10)
+
+    asyncio.run(call())
+    return status[0], events
+
+
+def test_heuristic_items_arrive_before_the_model_answers(client, slow_ollama):
+    status, events = _stream({"text": NOTE, "save_note": True})
+
+    assert status == 200
+    assert [event for _, event, _ in events] == ["heuristic", "llm_item", "llm_item", "done"]
+    first_at, _, heuristic = events[0]
+    assert heuristic == {"items": ["Draft the agenda"]}
+    assert first_at < 0.25 < events[1][0]
+    assert [data["text"] for _, event, data in events if event == "llm_item"] == [
+        "Email the team",
+        "draft the agenda",
+    ]
+
+    done = events[-1][2]
+    assert [item["text"] for item in done["items"]] == ["Draft the agenda", "Email the team"]
+    assert done["llm_failed"] is False
+    assert get_backend().get_note(done["note_id"])["content"] == NOTE
+    assert [row["id"] for row in get_backend().list_action_items(done["note_id"])] == [
+        item["id"] for item in done["items"]
+    ][::-1]
+
+
+def test_cached_llm_result_is_replayed_without_the_model(client, slow_ollama):
+    _stream({"text": NOTE})
+    status, events = _stream({"text": NOTE})
+
+    assert [event for _, event, _ in events] == ["heuristic", "llm_item", "llm_item", "done"]
+    assert events[-1][0] < 0.25
+    assert slow_ollama.stats()["chats"] == 1
+
+
+def test_model_failure_still_stores_the_heuristic_items(client, monkeypatch):
+    def broken(*args, **kwargs):
+        raise ConnectionError("connection refused")
+        yield
+
+    monkeypatch.setattr(llm, "stream_chat", broken)
+    status, events = _stream({"text": NOTE, "save_note": True})
+
+    assert [event for _, event, _ in events] == ["heuristic", "llm_error", "done"]
+    assert "connection refused" in events[1][2]["detail"]
+    assert [item["text"] for item in events[-1][2]["items"]] == ["Draft the agenda"]
+    assert events[-1][2]["llm_failed"] is True
+
+
+def test_deadline_ends_the_stream_without_storing(client, slow_ollama):
+    status, events = _stream({"text": NOTE, "save_note": True}, [(b"x-request-timeout", b"0.1")])
+
+    assert [event for _, event, _ in events] == ["heuristic", "error"]
+    assert events[-1][2] == {"detail": "Extraction deadline exceeded"}
+    assert get_backend().list_notes() == [] and get_backend().list_action_items() == []
+
+
+def test_disconnect_aborts_the_model_stream_and_skips_writes(client, slow_ollama):
+    status, events = _stream({"text": NOTE, "save_note": True}, disconnect_after=0.15)
+
+    assert [event for _, event, _ in events] == ["heuristic"]
+    deadline = time.monotonic() + 5
+    while slow_ollama.stats()["aborted_streams"] == 0:
+        assert time.monotonic() < deadline, "the model stream was never aborted"
+        time.sleep(0.01)
+    assert get_backend().list_notes() == [] and get_backend().list_action_items() == []
+
+
+def test_blank_text_is_rejected_before_streaming(client):
+    assert client.post("/action-items/extract-stream", json={"text": "   "}).status_code == 400
+
+
+def test_streamed_items_parser_yields_each_item_once_complete():
+    reply = '{"action_items": ["Say \\"hi\\"", "Caf\\u00e9 run" , "x"]}'
+    parser = StreamedItemsParser()
+    completed = [parser.feed(char) for char in reply]
+
+    items = [item for batch in completed for item in batch]
+    assert items == ['Say "hi"', "Café run", "x"]
+    # Each item is produced by the chunk carrying its closing quote
+    closing = [index for index, batch in enumerate(completed) if batch]
+    assert [reply[index] for index in closing] == ['"', '"', '"']
+    assert parser.feed("") == []
+    assert extract.merge_action_items(["A", "b"], ["a", "C"]) == ["A", "b", "C"]
+
+
+def test_streamed_items_parser_keeps_only_the_unconsumed_tail():
+    items = [f"item {n}" for n in range(200)]
+    reply = (
+        " " * 1000
+        + '{"reasoning": "'
+        + "x" * 1000
+        + '", "action_items": '
+        + json.dumps(items)
+        + "}"
+    )
+    parser = StreamedItemsParser()
+    found = []
+    for start in range(0, len(reply), 7):
+        found += parser.feed(reply[start : start + 7])
+        assert len(parser._buffer) <= 80
+    assert found == items
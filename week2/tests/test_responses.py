@@ -0,0 +1,78 @@
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from ..app import responses
+from ..app.schemas.note import Note
+from ..app.schemas.response import APIResponse
+from ..app.storage import get_backend
+
+TRICKY_TEXTS = [
+    "plain",
+    "naïve café ✓ 🚀",
+    'quote " and \\ backslash',
+    "tab\tand\u001fcontrol",
+    "line sep",
+]
+
+
+def _legacy_body(data, next_cursor=None) -> bytes:
+    """How these routes were encoded before: APIResponse through jsonable_encoder"""
+    return JSONResponse(
+        jsonable_encoder(APIResponse(success=True, data=data, next_cursor=next_cursor))
+    ).body
+
+
+def _legacy_note(row) -> Note:
+    return Note(id=row["id"], content=row["content"], created_at=row["created_at"])
+
+
+@pytest.fixture(params=["orjson", "pydantic"])
+def encoder_backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(responses, "orjson", None)
+    return request.param
+
+
+def test_note_routes_match_legacy_encoding(client, encoder_backend):
+    for text in TRICKY_TEXTS:
+        get_backend().insert_note(text)
+    rows = get_backend().list_notes(limit=len(TRICKY_TEXTS))
+
+    r = client.get("/notes", params={"limit": len(TRICKY_TEXTS) - 1})
+    assert r.headers["content-type"] == "application/json"
+    next_cursor = r.json()["next_cursor"]
+    assert next_cursor is not None
+    assert r.content == _legacy_body([_legacy_note(row) for row in rows[:-1]], next_cursor)
+
+    r = client.get(f"/notes/{rows[0]['id']}")
+    assert r.content == _legacy_body(_legacy_note(rows[0]))
+
+    r = client.post("/notes", json={"content": TRICKY_TEXTS[1]})
+    assert r.content == _legacy_body(_legacy_note(get_backend().get_note(r.json()["data"]["id"])))
+
+
+def test_action_item_list_matches_legacy_encoding(client, encoder_backend):
+    [(note_id, _)] = get_backend().insert_extraction_batch([(TRICKY_TEXTS[0], TRICKY_TEXTS)])
+
+    r = client.get("/action-items", params={"note_id": note_id, "limit": 3})
+    rows = get_backend().list_action_items(note_id=note_id, limit=3)
+    legacy = [
+        {
+            "id": row["id"],
+            "note_id": row["note_id"],
+            "text": row["text"],
+            "done": bool(row["done"]),
+            "created_at": row["created_at"],
+        }
+        for row in rows
+    ]
+    assert r.content == _legacy_body(legacy, r.json()["next_cursor"])
+
+
+def test_note_record_parses_fractional_timestamps(encoder_backend):
+    row = {"id": 1, "content": "x", "created_at": "2024-05-01 12:00:00.25"}
+    encoder = responses.ResponseEncoder(responses.NoteRecord)
+    assert encoder.encode(responses.note_record(row)) == Note(**row).model_dump_json().encode()
@@ -0,0 +1,102 @@
+import threading
+
+from ..app.config import settings
+from ..app.services import extract
+from ..app.services.singleflight import SingleFlight
+
+
+def _run_concurrently(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _wait_for_waiters(flight, key, count):
+    for _ in range(500):
+        with flight._lock:
+            call = flight._calls.get(key)
+            if call is not None and call.waiters == count:
+                return
+        threading.Event().wait(0.01)
+    raise AssertionError("followers never joined the in-flight call")
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def slow():
+        executions.append(1)
+        release.wait(timeout=5)
+        return ["shared"]
+
+    threads, results, errors = _run_concurrently(5, lambda: flight.do("key", slow))
+    _wait_for_waiters(flight, "key", 4)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == [["shared"]] * 5
+    assert errors == [None] * 5
+    assert len(executions) == 1
+    assert flight.stats() == {"calls": 5, "executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_errors_propagate_to_every_waiter_and_are_not_remembered():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(timeout=5)
+        raise RuntimeError("boom")
+
+    threads, _, errors = _run_concurrently(3, lambda: flight.do("key", failing))
+    _wait_for_waiters(flight, "key", 2)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert flight.do("key", lambda: "next") == "next"
+
+
+def test_identical_llm_requests_coalesce(temp_db, monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def slow_model(text):
+        calls.append(text)
+        release.wait(timeout=5)
+        return ["review budget"]
+
+    monkeypatch.setattr(extract, "_call_llm", slow_model)
+    monkeypatch.setattr(extract, "llm_flight", SingleFlight())
+    key = extract.cache_key(
+        "- review budget",
+        settings.ollama_model,
+        settings.ollama_temperature,
+        extract.PROMPT_VERSION,
+    )
+
+    threads, results, _ = _run_concurrently(
+        4, lambda: extract.extract_action_items_llm("- review budget")
+    )
+    _wait_for_waiters(extract.llm_flight, key, 3)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == [["review budget"]] * 4
+    assert len(calls) == 1
+    assert extract.llm_flight.stats()["coalesced"] == 3
@@ -0,0 +1,180 @@
+import json
+
+import pytest
+
+from ..app import db, storage
+from ..app.config import settings
+from ..app.repositories import ActionItemRepository, NoteRepository
+
+
+@pytest.fixture()
+def backend(temp_db):
+    """Each storage backend in turn, selected through settings like in production"""
+    return storage.get_backend()
+
+
+def _ids(rows):
+    return [row["id"] for row in rows]
+
+
+def test_notes_page_newest_first_with_keyset_cursor(backend):
+    ids = [backend.insert_note(f"note {n}")["id"] for n in range(7)]
+    assert ids == sorted(ids)
+
+    assert _ids(backend.list_notes()) == ids[::-1]
+    assert _ids(backend.list_notes(limit=3)) == ids[:3:-1]
+    assert _ids(backend.list_notes(limit=3, before_id=ids[4])) == ids[3:0:-1]
+    assert _ids(backend.list_notes(limit=10, before_id=ids[1])) == ids[:1]
+    assert backend.list_notes(before_id=ids[0]) == []
+    assert _ids(backend.iter_notes(before_id=ids[5])) == ids[4::-1]
+
+    note = backend.get_note(ids[2])
+    assert (note["content"], len(note["created_at"])) == ("note 2", len("2024-05-01 12:00:00"))
+    assert backend.get_note(ids[-1] + 100) is None
+
+
+def test_action_items_filter_by_note_and_mark_done(backend):
+    (first, first_items), (second, second_items) = backend.insert_extraction_batch(
+        [("first", ["a", "b", "c"]), ("second", ["d"])]
+    )
+    loose = backend.insert_action_items(["e", "f"])
+    assert first_items + second_items + loose == sorted(first_items + second_items + loose)
+
+    assert _ids(backend.list_action_items()) == (first_items + second_items + loose)[::-1]
+    assert _ids(backend.list_action_items(first, limit=2)) == first_items[:0:-1]
+    assert _ids(backend.list_action_items(first, before_id=first_items[1])) == first_items[:1]
+    assert _ids(backend.iter_action_items(second)) == second_items
+    assert backend.list_action_items(second + 1000) == []
+    assert [row["note_id"] for row in backend.list_action_items(limit=2)] == [None, None]
+
+    row = backend.mark_action_item_done(first_items[0], True)
+    assert (row["done"], row["text"], row["note_id"]) == (1, "a", first)
+    assert backend.get_action_item(first_items[0])["done"] == 1
+    assert backend.mark_action_item_done(loose[-1] + 100, True) is None
+
+
+def test_extraction_without_notes_stores_only_items(backend):
+    [(note_id, item_ids)] = backend.insert_extraction_batch([("unsaved", ["x"])], save_notes=False)
+    assert note_id is None
+    assert backend.get_action_item(item_ids[0])["text"] == "x"
+    assert backend.list_notes() == []
+
+
+def test_repositories_use_the_configured_backend(backend):
+    note = NoteRepository.create_note("via repository")
+    note_id, ids = ActionItemRepository.create_extraction("extracted", ["item"], save_note=True)
+
+    assert NoteRepository.get_note(note["id"])["content"] == "via repository"
+    assert _ids(ActionItemRepository.list_action_items(note_id)) == ids
+    if backend.name == "sqlite":
+        assert _ids(db.list_notes()) == [note_id, note["id"]]
+    else:
+        assert not db.DB_PATH.exists()
+
+
+def test_jobs_are_claimed_by_run_after_then_id(backend):
+    late = backend.insert_job("kind", json.dumps({"n": 1}), 3, 20.0)
+    first = backend.insert_job("kind", json.dumps({"n": 2}), 3, 10.0)
+    second = backend.insert_job("kind", json.dumps({"n": 3}), 3, 10.0)
+    assert (first["status"], first["attempts"], first["result"]) == ("pending", 0, None)
+
+    assert backend.claim_job(5.0) is None
+    claimed = backend.claim_job(15.0)
+    assert (claimed["id"], claimed["status"], claimed["attempts"]) == (first["id"], "running", 1)
+    assert backend.claim_job(15.0)["id"] == second["id"]
+    assert backend.claim_job(15.0) is None
+
+    backend.reschedule_job(first["id"], "flaky", 30.0)
+    assert backend.claim_job(25.0)["id"] == late["id"]
+    assert backend.claim_job(25.0) is None
+    retried = backend.claim_job(30.0)
+    assert (retried["id"], retried["attempts"], retried["error"]) == (first["id"], 2, "flaky")
+
+    backend.fail_job(late["id"], "gave up")
+    assert backend.get_job(late["id"])["status"] == "failed"
+    assert backend.requeue_running_jobs() == 2
+    assert [backend.claim_job(40.0)["id"] for _ in range(2)] == [second["id"], first["id"]]
+
+    note_id, ids = backend.complete_extraction_job(
+        first["id"], "job note", ["do it"], save_note=True
+    )
+    done = backend.get_job(first["id"])
+    assert (done["status"], done["error"]) == ("succeeded", None)
+    assert json.loads(done["result"]) == db.extraction_job_result(note_id, ids, ["do it"])
+    assert backend.get_note(note_id)["content"] == "job note"
+    assert backend.get_job(second["id"] + 100) is None
+
+
+def test_llm_cache_entries_are_evicted_least_recently_used_first(backend, monkeypatch):
+    monkeypatch.setattr(db, "LLM_CACHE_TOUCH_SECONDS", 0.0)
+    assert backend.put_llm_cache_entry("a", "m", '["a"]', 1.0, 2) == 0
+    assert backend.put_llm_cache_entry("b", "m", '["b"]', 2.0, 2) == 0
+    assert backend.get_llm_cache_entry("a", 3.0) == '["a"]'
+    assert backend.put_llm_cache_entry("c", "m", '["c"]', 4.0, 2) == 1
+    assert backend.get_llm_cache_entry("b", 5.0) is None
+    assert [backend.get_llm_cache_entry(key, 6.0) for key in ("a", "c")] == ['["a"]', '["c"]']
+
+
+def test_idempotency_keys_are_claimed_completed_and_expire(backend):
+    assert backend.claim_idempotency_key("s", "k", "h1", 100.0, 10.0) == (True, None)
+    claimed, row = backend.claim_idempotency_key("s", "k", "h2", 105.0, 10.0)
+    assert (claimed, row["request_hash"], row["status"]) == (False, "h1", "in_progress")
+    # An unfinished claim can be taken over once its lock lapses
+    assert backend.claim_idempotency_key("s", "k", "h2", 110.0, 10.0) == (True, None)
+    assert backend.claim_idempotency_key("other", "k", "h1", 110.0, 10.0)[0]
+
+    backend.complete_idempotency_key("s", "k", 200, '{"ok": true}', 200.0)
+    backend.release_idempotency_key("s", "k")  # completed keys are kept
+    claimed, row = backend.claim_idempotency_key("s", "k", "h3", 150.0, 10.0)
+    assert (claimed, row["status"], row["status_code"], row["response"]) == (
+        False,
+        "completed",
+        200,
+        '{"ok": true}',
+    )
+
+    backend.release_idempotency_key("other", "k")
+    assert backend.claim_idempotency_key("other", "k", "h4", 111.0, 10.0) == (True, None)
+    assert backend.purge_idempotency_keys(150.0) == 1
+    assert backend.purge_idempotency_keys(float("inf")) == 1
+
+
+@pytest.mark.parametrize("temp_db", ["memory"], indirect=True)
+def test_memory_backend_serves_the_api_and_jobs(temp_db, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from ..app.main import app
+    from ..app.services import extract
+
+    monkeypatch.setattr(settings, "ollama_warmup", False)
+    monkeypatch.setattr(settings, "job_poll_interval_seconds", 0.05)
+    monkeypatch.setattr(extract, "_call_llm", lambda text: ["Ship it"])
+
+    with TestClient(app) as client:
+        note = client.post("/notes", json={"content": "in memory"}).json()["data"]
+        assert client.get(f"/notes/{note['id']}").json()["data"] == note
+
+        extracted = client.post(
+            "/action-items/extract", json={"text": "- one\n- two", "save_note": True}
+        ).json()["data"]
+        item_id = extracted["items"][0]["id"]
+        assert client.post(f"/action-items/{item_id}/done", json={"done": True}).status_code == 200
+        listed = client.get("/action-items", params={"note_id": extracted["note_id"]}).json()[
+            "data"
+        ]
+        assert [(item["text"], item["done"]) for item in listed] == [("two", False), ("one", True)]
+
+        job_id = client.post(
+            "/jobs/extract-llm", json={"text": "Ship it.", "save_note": True}
+        ).json()["data"]["id"]
+        assert (
+            client.get(f"/jobs/{job_id}", params={"wait": 5}).json()["data"]["status"]
+            == "succeeded"
+        )
+        result = client.get(f"/jobs/{job_id}/result").json()["data"]
+        assert client.get(f"/notes/{result['note_id']}").json()["data"]["content"] == "Ship it."
+
+    # Nothing, not even the job queue, reached the disk
+    assert not db.DB_PATH.exists()
+    # and the in-memory data went away with the app
+    assert storage.get_backend().list_notes() == []
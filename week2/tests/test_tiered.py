@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from ..app.services import extract, tiered
+
+
+@pytest.fixture()
+def model_calls(temp_db, monkeypatch):
+    calls = []
+
+    def fake_model(text):
+        calls.append(text)
+        return ["Schedule the retro"]
+
+    monkeypatch.setattr(extract, "_call_llm", fake_model)
+    tiered.tiered_stats.reset()
+    return calls
+
+
+def _tiered(text):
+    return asyncio.run(tiered.extract_action_items_tiered_async(text))
+
+
+def test_confident_heuristics_skip_the_model(model_calls):
+    result = _tiered("- [ ] Set up database\nTODO: write docs")
+    assert result == (["Set up database", "TODO: write docs"], tiered.TIER_HEURISTIC)
+    assert model_calls == []
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "We talked about the roadmap for a while.",  # zero matches
+        "Fix the flaky test. The rest was chatter.",  # sentence-split fallback
+    ],
+)
+def test_unconfident_heuristics_escalate(model_calls, text):
+    result = _tiered(text)
+    assert result == (["Schedule the retro"], tiered.TIER_LLM)
+    assert model_calls == [text]
+
+
+def test_model_failure_falls_back_to_heuristics(temp_db, monkeypatch):
+    def broken(text):
+        raise RuntimeError("model down")
+
+    monkeypatch.setattr(extract, "_call_llm", broken)
+    tiered.tiered_stats.reset()
+    result = _tiered("Fix the flaky test. Then relax.")
+    assert result == (["Fix the flaky test."], tiered.TIER_HEURISTIC_FALLBACK)
+    assert tiered.tiered_stats.snapshot()["llm_failures"] == 1
+
+
+def test_endpoint_reports_tier_and_stats(client, model_calls):
+    r = client.post("/action-items/extract-tiered", json={"text": "- ship it", "save_note": True})
+    assert r.status_code == 200
+    data = r.json()["data"]
+    assert data["tier"] == "heuristic"
+    assert [item["text"] for item in data["items"]] == ["ship it"]
+    assert data["note_id"] is not None
+
+    r = client.post("/action-items/extract-tiered", json={"text": "Nothing obvious here."})
+    assert r.json()["data"]["tier"] == "llm"
+
+    stats = client.get("/action-items/extract-tiered/stats").json()["data"]
+    assert stats["requests"] == 2
+    assert stats["heuristic_served"] == 1
+    assert stats["heuristic_fraction"] == 0.5
+    assert stats["estimated_seconds_saved"] >= 0
@@ -0,0 +1,199 @@
+import asyncio
+import json
+
+import pytest
+
+from ..app.config import settings
+from ..app.main import app
+from ..app.services.extract import extract_action_items
+from ..app.storage import get_backend
+
+
+def _upload(parts, content_type=b"text/plain", query=b"", between_parts=None):
+    """POST ``parts`` as separate body messages over raw ASGI; returns (status, json body).
+
+    ``between_parts`` is awaited before each part after the first, e.g. to
+    check what the app did with the earlier ones.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/action-items/extract-upload",
+        "raw_path": b"/action-items/extract-upload",
+        "query_string": query,
+        "root_path": "",
+        "headers": [(b"content-type", content_type)],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    pending = list(parts)
+    messages = []
+
+    async def call():
+        sent = 0
+
+        async def receive():
+            nonlocal sent
+            if sent and between_parts is not None and pending:
+                await between_parts(sent)
+            sent += 1
+            if pending:
+                return {"type": "http.request", "body": pending.pop(0), "more_body": bool(pending)}
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        await asyncio.wait_for(app(scope, receive, send), 10)
+
+    asyncio.run(call())
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    return messages[0]["status"], json.loads(body)
+
+
+def test_items_are_stored_in_batches_while_the_upload_arrives(client, monkeypatch):
+    monkeypatch.setattr(settings, "upload_insert_batch_size", 2)
+    lines = [f"- task {n}\nchatter {n}\n".encode() for n in range(9)]
+    stored_while_uploading = []
+
+    async def between_parts(sent):
+        stored_while_uploading.append(len(get_backend().list_action_items()))
+
+    status, body = _upload(lines, between_parts=between_parts)
+
+    assert status == 200
+    assert body["data"] == {
+        "note_id": None,
+        "items_created": 9,
+        "used_fallback": False,
+        "truncated": False,
+    }
+    texts = [row["text"] for row in get_backend().list_action_items()][::-1]
+    assert texts == extract_action_items(b"".join(lines).decode())
+    # Full batches were written before the rest of the body came in
+    assert stored_while_uploading[-1] == 8
+    assert stored_while_uploading == sorted(stored_while_uploading)
+
+
+def test_text_is_decoded_across_reads(client):
+    text = "Notes\r\n- Café with Zoë\r\n- naïve fix\r\nDone"
+    data = text.encode("utf-8")
+    # Split inside the two-byte "é" and between "\r" and "\n"
+    split = data.index("é".encode()) + 1
+    crlf = data.index(b"\r\n", split) + 1
+    status, body = _upload([data[:split], data[split:crlf], data[crlf:]])
+    assert status == 200 and body["data"]["items_created"] == 2
+    assert [row["text"] for row in get_backend().list_action_items()][::-1] == [
+        "Café with Zoë",
+        "naïve fix",
+    ]
+
+    status, body = _upload(
+        ["- Grüße senden\n".encode("latin-1")], content_type=b"text/plain; charset=latin-1"
+    )
+    assert status == 200 and get_backend().list_action_items()[0]["text"] == "Grüße senden"
+
+
+def test_sentence_fallback_and_note_attachment(client):
+    note = client.post("/notes", json={"content": "Transcript of the call"}).json()["data"]
+    query = f"note_id={note['id']}".encode()
+    status, body = _upload([b"We talked. Fix the ", b"login bug! Then lunch."], query=query)
+
+    assert status == 200
+    assert body["data"] == {
+        "note_id": note["id"],
+        "items_created": 1,
+        "used_fallback": True,
+        "truncated": False,
+    }
+    assert [row["text"] for row in get_backend().list_action_items(note["id"])] == [
+        "Fix the login bug!"
+    ]
+    assert _upload([b"- x\n"], query=b"note_id=999")[0] == 404
+
+
+def test_bad_uploads_are_rejected(client, monkeypatch):
+    assert _upload([b"{}"], content_type=b"application/json")[0] == 415
+    assert _upload([b"- x\n"], content_type=b"text/plain; charset=no-such-charset")[0] == 415
+    assert _upload([b"- caf\xe9\n"])[0] == 400
+    assert get_backend().list_action_items() == []
+
+    monkeypatch.setattr(settings, "upload_insert_batch_size", 1)
+    monkeypatch.setattr(settings, "upload_max_line_chars", 10)
+    status, body = _upload([b"- short\n", b"- longer than", b" ten characters"])
+    assert status == 413
+    assert (
+        body["detail"] == "Upload has a line longer than 10 characters "
+        "(1 action items were stored before the error)"
+    )
+
+
+def test_multipart_upload(client):
+    pytest.importorskip("python_multipart")
+    files = {
+        "file": (
+            "chat.txt",
+            "- Send the recap\nhello\n".encode("utf-16"),
+            "text/plain; charset=utf-16",
+        )
+    }
+    r = client.post("/action-items/extract-upload", files=files)
+
+    assert r.status_code == 200 and r.json()["data"]["items_created"] == 1
+    assert get_backend().list_action_items()[0]["text"] == "Send the recap"
+    assert (
+        client.post("/action-items/extract-upload", files={"other": ("a.txt", b"- x")}).status_code
+        == 400
+    )
+
+
+def test_multipart_file_part_is_scanned_while_the_upload_arrives(client, monkeypatch):
+    pytest.importorskip("python_multipart")
+    monkeypatch.setattr(settings, "upload_insert_batch_size", 2)
+    lines = [f"- task {n}\n".encode() for n in range(6)]
+    parts = [
+        b'--xyz\r\nContent-Disposition: form-data; name="comment"\r\n\r\n- not a task\r\n',
+        b'--xyz\r\nContent-Disposition: form-data; name="file"; filename="chat.txt"\r\n'
+        b"Content-Type: text/plain\r\n\r\n",
+        *lines,
+        b"\r\n--xyz--\r\n",
+    ]
+    stored_while_uploading = []
+
+    async def between_parts(sent):
+        stored_while_uploading.append(len(get_backend().list_action_items()))
+
+    status, body = _upload(
+        parts, content_type=b"multipart/form-data; boundary=xyz", between_parts=between_parts
+    )
+
+    assert status == 200 and body["data"]["items_created"] == 6
+    assert [row["text"] for row in get_backend().list_action_items()][::-1] == [
+        f"task {n}" for n in range(6)
+    ]
+    # Every item was stored before the closing boundary came in
+    assert stored_while_uploading[-1] == 6
+    assert stored_while_uploading == sorted(stored_while_uploading)
+    assert (
+        _upload([b"--xyz\r\nbroken"], content_type=b"multipart/form-data; boundary=xyz")[0] == 400
+    )
+    assert _upload([b"- x\n"], content_type=b"multipart/form-data")[0] == 400
+
+
+def test_large_upload_without_markers_is_buffered_within_budget(client, monkeypatch):
+    monkeypatch.setattr(settings, "upload_max_buffered_chars", 1000)
+    parts = [
+        b"".join(b"Fix item %d. Idle chat here.\n" % (n * 1000 + i) for i in range(1000))
+        for n in range(20)
+    ]
+    status, body = _upload(parts)
+
+    assert status == 200
+    data = body["data"]
+    assert data["used_fallback"] and data["truncated"]
+    texts = [row["text"] for row in get_backend().list_action_items()][::-1]
+    assert len(texts) == data["items_created"] and sum(map(len, texts)) <= 1000
+    assert texts == [f"Fix item {n}." for n in range(len(texts))]